@@ -0,0 +1,4 @@
+from medical_app.backend.asgi import create_asgi_app
+
+# serve with an asgi server, e.g. uvicorn asgi:application
+application = create_asgi_app()
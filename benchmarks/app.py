@@ -0,0 +1,86 @@
+"""Flask app on a throwaway database, trusting tokens signed by a locally generated key.
+
+Benchmarks therefore need neither auth0 nor network access.
+"""
+
+import json
+import pathlib
+import tempfile
+import time
+from typing import Iterable, Tuple
+
+from authlib.jose import JsonWebKey, jwt
+from flask import Flask
+
+from config import Config
+from medical_app.backend import create_app, db
+
+ALL_SCOPES = (
+    "delete:medics delete:patients delete:records get:patients get:records "
+    "write:medics write:patients write:records"
+)
+
+
+class LocalTokenIssuer:
+    """Sign access tokens the way auth0 does, with a key generated on the fly."""
+
+    def __init__(self, issuer: str, audience: str) -> None:
+        self.issuer = issuer
+        self.audience = audience
+        self.key = JsonWebKey.generate_key(
+            "RSA", 2048, is_private=True, options={"kid": "bench"}
+        )
+
+    @property
+    def jwks(self) -> dict:
+        return {"keys": [self.key.as_dict(is_private=False)]}
+
+    def mint(self, scopes: Iterable[str] = ALL_SCOPES.split(), ttl: int = 3600) -> str:
+        """Return signed access token.
+
+        :param scopes: scopes granted by the token
+        :param ttl: seconds until the token expires
+        :return: encoded jwt
+        """
+        now = int(time.time())
+        claims = {
+            "iss": self.issuer,
+            "aud": self.audience,
+            "sub": "bench|1",
+            "iat": now,
+            "exp": now + ttl,
+            "scope": " ".join(scopes),
+        }
+        return jwt.encode({"alg": "RS256", "kid": "bench"}, claims, self.key).decode()
+
+
+def create_bench_app(
+    database_url: str, **config_overrides
+) -> Tuple[Flask, LocalTokenIssuer]:
+    """Create app with fresh schema and a token issuer it trusts.
+
+    :param database_url: sqlalchemy url of the database, all tables are dropped
+    :param config_overrides: additional flask config
+    :return: app and token issuer
+    """
+    token_issuer = LocalTokenIssuer(
+        f"https://{Config.AUTH0_DOMAIN}/", Config.API_AUDIENCE
+    )
+    jwks_path = pathlib.Path(tempfile.mkdtemp()) / "jwks.json"
+    jwks_path.write_text(json.dumps(token_issuer.jwks))
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_url
+        APP_SECRET_KEY = "bench"
+        AUTH0_CLIENT_ID = "bench"
+        AUTH0_CLIENT_SECRET = "bench"
+        JWKS_SOURCE = jwks_path.as_uri()
+
+    for key, value in config_overrides.items():
+        setattr(BenchConfig, key, value)
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app, token_issuer
@@ -0,0 +1,198 @@
+"""Compare throughput and latency of asgi:application with wsgi:application under load.
+
+Both entry points are started as servers in subprocesses, gunicorn with threads for the wsgi
+app and uvicorn for the asgi app, on the same seeded database. Concurrent clients, each a
+thread with a keep-alive connection, request pages of the records of a medic, which the
+asgi app serves with async handlers. Run against postgres for realistic numbers::
+
+    python -m benchmarks.bench_asgi --database-url postgresql://localhost/bench \\
+        --clients 64 --workers 2
+
+The clients share one process with the gil, so keep an eye on whether they, rather than
+the servers, saturate a cpu.
+"""
+
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+from benchmarks.app import create_bench_app
+from benchmarks.seed import seed
+from medical_app.backend import db
+
+N_MEDICS = 100
+N_PATIENTS = 10_000
+N_RECORDS = 100_000
+HOST = "127.0.0.1"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def _server_commands(port: int, workers: int, threads: int) -> Dict[str, List[str]]:
+    return {
+        "wsgi": [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            f"--bind={HOST}:{port}",
+            f"--workers={workers}",
+            f"--threads={threads}",
+            "--log-level=warning",
+            "wsgi:application",
+        ],
+        "asgi": [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            f"--host={HOST}",
+            f"--port={port}",
+            f"--workers={workers}",
+            "--log-level=warning",
+            "asgi:application",
+        ],
+    }
+
+
+def _wait_until_serving(port: int, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            socket.create_connection((HOST, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server did not listen on port {port} within {timeout} s")
+
+
+def _load(port: int, token: str, n_clients: int, seconds: float) -> List[float]:
+    headers = {"Authorization": f"Bearer {token}"}
+    durations: List[float] = []
+    n_errors = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client_loop(client_index: int) -> None:
+        nonlocal n_errors
+        connection = http.client.HTTPConnection(HOST, port, timeout=30)
+        medic_id = client_index % N_MEDICS + 1
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                connection.request(
+                    "GET", f"/medics/{medic_id}/records?limit=50", headers=headers
+                )
+                response = connection.getresponse()
+                response.read()
+                failed = response.status != 200
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                failed = True
+            duration = time.perf_counter() - start
+            with lock:
+                durations.append(duration)
+                n_errors += failed
+        connection.close()
+
+    threads = [
+        threading.Thread(target=client_loop, args=(i,)) for i in range(n_clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if n_errors:
+        print(f"  {n_errors} failed requests", file=sys.stderr)
+    return durations
+
+
+def run(
+    database_url: str,
+    servers: List[str],
+    n_clients: int,
+    seconds: float,
+    workers: int,
+    threads: int,
+) -> None:
+    # measure the views themselves, not the response cache
+    app, token_issuer = create_bench_app(database_url, RESPONSE_CACHE_SIZE=0)
+    with app.app_context():
+        with db.engine.begin() as connection:
+            seed(connection, N_MEDICS, N_PATIENTS, N_RECORDS)
+        db.engine.dispose()
+    token = token_issuer.mint()
+    env = {
+        **os.environ,
+        "SQLALCHEMY_DATABASE_URI": database_url,
+        "JWKS_SOURCE": app.config["JWKS_SOURCE"],
+        "APP_SECRET_KEY": "bench",
+        "RESPONSE_CACHE_SIZE": "0",
+        # one pool per worker, large enough for its threads or concurrent requests
+        "DB_POOL_SIZE": str(max(threads, n_clients // workers)),
+    }
+
+    print(
+        f"{n_clients} clients for {seconds:.0f} s, {workers} workers"
+        f" ({threads} threads each for wsgi)"
+    )
+    print(f"{'server':>8}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}")
+    for server in servers:
+        port = _free_port()
+        process = subprocess.Popen(
+            _server_commands(port, workers, threads)[server],
+            env=env,
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            _wait_until_serving(port, process, timeout=30)
+            # warm up connections, caches of the jwks and verified tokens
+            _load(port, token, n_clients, 1)
+            durations = _load(port, token, n_clients, seconds)
+        finally:
+            process.terminate()
+            process.wait()
+        quantiles = statistics.quantiles(durations, n=100)
+        print(
+            f"{server:>8}{len(durations) / seconds:9.0f}{quantiles[49] * 1000:9.1f}"
+            f"{quantiles[98] * 1000:9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database-url",
+        default=f"sqlite:///{tempfile.gettempdir()}/bench_asgi.db",
+    )
+    parser.add_argument(
+        "--servers", nargs="+", choices=["wsgi", "asgi"], default=["wsgi", "asgi"]
+    )
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--threads", type=int, default=8, help="threads per gunicorn worker"
+    )
+    args = parser.parse_args()
+
+    run(
+        args.database_url,
+        args.servers,
+        args.clients,
+        args.seconds,
+        args.workers,
+        args.threads,
+    )
@@ -0,0 +1,72 @@
+"""Compare throughput of creating patients one per request against the batch endpoint.
+
+Usage::
+
+    python -m benchmarks.bench_batch_insert --patients 5000
+"""
+
+import argparse
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.app import create_bench_app
+from medical_app.backend import db
+from medical_app.backend.models import Medic
+
+
+def _patients(n: int, prefix: str) -> List[Dict]:
+    return [
+        {
+            "firstName": "Bench",
+            "lastName": "Patient",
+            "email": f"{prefix}{i}@bench.com",
+            "medicIds": [1],
+        }
+        for i in range(n)
+    ]
+
+
+def run(database_url: str, n_patients: int, batch_size: int) -> None:
+    app, token_issuer = create_bench_app(database_url)
+    headers = {"Authorization": f"Bearer {token_issuer.mint()}"}
+    client = app.test_client()
+    with app.app_context():
+        Medic(first_name="Bench", last_name="Medic", email="medic@bench.com").insert()
+
+        start = time.perf_counter()
+        for patient in _patients(n_patients, "single"):
+            assert (
+                client.post("/patients", json=patient, headers=headers).status_code
+                == 201
+            )
+        per_item_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        patients = _patients(n_patients, "batch")
+        for i in range(0, n_patients, batch_size):
+            res = client.post(
+                "/patients:batch", json=patients[i : i + batch_size], headers=headers
+            )
+            assert res.status_code == 201
+        batch_seconds = time.perf_counter() - start
+        db.session.remove()
+
+    print(f"{n_patients} patients on {database_url}")
+    print(f"POST /patients:       {n_patients / per_item_seconds:10.0f} patients/s")
+    print(
+        f"POST /patients:batch: {n_patients / batch_seconds:10.0f} patients/s "
+        f"({batch_size} per request, {per_item_seconds / batch_seconds:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database-url", default=f"sqlite:///{tempfile.gettempdir()}/bench_batch.db"
+    )
+    parser.add_argument("--patients", type=int, default=5_000)
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    args = parser.parse_args()
+
+    run(args.database_url, args.patients, args.batch_size)
@@ -0,0 +1,80 @@
+"""Measure bandwidth and latency saved by conditional GETs with If-None-Match.
+
+Every endpoint is requested once unconditionally and once revalidating the etag
+of the first response, which is answered with an empty 304::
+
+    python -m benchmarks.bench_conditional_get --requests 200
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.app import create_bench_app
+from benchmarks.seed import seed
+from medical_app.backend import db
+
+N_MEDICS = 100
+N_PATIENTS = 2_000
+N_RECORDS = 40_000
+
+# patient ids follow the medic ids, see seed
+FIRST_PATIENT_ID = N_MEDICS + 1
+URLS = (
+    "/medics?limit=50",
+    "/medics/1",
+    "/medics/1/patients?limit=50",
+    f"/patients/{FIRST_PATIENT_ID}",
+    f"/patients/{FIRST_PATIENT_ID}/records?limit=50",
+)
+
+
+def _measure(client, url: str, headers: Dict[str, str], n_requests: int):
+    durations: List[float] = []
+    n_bytes = 0
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        res = client.get(url, headers=headers)
+        durations.append(time.perf_counter() - start)
+        n_bytes += len(res.data)
+    return statistics.median(durations) * 1000, n_bytes / n_requests, res
+
+
+def run(database_url: str, n_requests: int) -> None:
+    # measure the views themselves, not the response cache in front of /medics
+    app, token_issuer = create_bench_app(database_url, RESPONSE_CACHE_SIZE=0)
+    headers = {"Authorization": f"Bearer {token_issuer.mint()}"}
+    client = app.test_client()
+    with app.app_context():
+        with db.engine.begin() as connection:
+            seed(connection, N_MEDICS, N_PATIENTS, N_RECORDS)
+        db.session.remove()
+
+    print(
+        f"{'endpoint':<35}{'200 ms':>9}{'304 ms':>9}{'200 bytes':>11}{'304 bytes':>11}"
+    )
+    for url in URLS:
+        full_ms, full_bytes, res = _measure(client, url, headers, n_requests)
+        conditional_headers = {**headers, "If-None-Match": res.headers["ETag"]}
+        not_modified_ms, not_modified_bytes, res = _measure(
+            client, url, conditional_headers, n_requests
+        )
+        assert res.status_code == 304
+        print(
+            f"{url:<35}{full_ms:9.2f}{not_modified_ms:9.2f}"
+            f"{full_bytes:11.0f}{not_modified_bytes:11.0f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database-url",
+        default=f"sqlite:///{tempfile.gettempdir()}/bench_conditional_get.db",
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    run(args.database_url, args.requests)
@@ -0,0 +1,109 @@
+"""Compare resolving linked ids per id against one IN query, and time create endpoints with them.
+
+Creating a medic with 1k patientIds used to cost one SELECT per id::
+
+    python -m benchmarks.bench_id_resolution --ids 1000
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+from benchmarks.app import create_bench_app
+from benchmarks.seed import seed
+from medical_app.backend import db
+from medical_app.backend.api_helper_functions import resolve_ids
+from medical_app.backend.models import Patient
+
+N_MEDICS = 1_000
+N_PATIENTS = 10_000
+
+
+def _median_ms(function: Callable, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1000
+
+
+def _get_per_id(ids: List[int]) -> None:
+    # what the create endpoints did before, one SELECT per linked id
+    for id_ in ids:
+        assert db.session.get(Patient, id_)
+
+
+def run(database_url: str, n_ids: int, repeat: int) -> None:
+    app, token_issuer = create_bench_app(database_url, RESPONSE_CACHE_SIZE=0)
+    headers = {"Authorization": f"Bearer {token_issuer.mint()}"}
+    client = app.test_client()
+    with app.app_context():
+        with db.engine.begin() as connection:
+            seed(connection, N_MEDICS, N_PATIENTS, 0)
+    # patient ids follow the medic ids, see seed
+    patient_ids = list(range(N_MEDICS + 1, N_MEDICS + 1 + n_ids))
+    medic_ids = list(range(1, min(n_ids, N_MEDICS) + 1))
+
+    print(f"{n_ids} ids, median of {repeat} runs")
+    print(f"{'variant':<40}{'ms':>10}")
+    with app.app_context():
+        for name, function in {
+            "session.get per id": lambda: _get_per_id(patient_ids),
+            "resolve_ids, one IN query": lambda: resolve_ids(
+                Patient, patient_ids, "patientIds"
+            ),
+        }.items():
+
+            def resolve_in_fresh_session() -> None:
+                # an empty identity map, as in a new request
+                function()
+                db.session.remove()
+
+            print(f"{name:<40}{_median_ms(resolve_in_fresh_session, repeat):10.1f}")
+
+    n_created = 0
+
+    def post(url: str, ids_key: str, ids: List[int]) -> None:
+        nonlocal n_created
+        n_created += 1
+        res = client.post(
+            url,
+            json={
+                "firstName": "Bench",
+                "lastName": "User",
+                "email": f"created{n_created}@bench.com",
+                ids_key: ids,
+            },
+            headers=headers,
+        )
+        assert res.status_code == 201, res.json
+
+    variants = {
+        f"POST /medics, {len(patient_ids)} patientIds": lambda: post(
+            "/medics", "patientIds", patient_ids
+        ),
+        f"POST /patients, {len(medic_ids)} medicIds": lambda: post(
+            "/patients", "medicIds", medic_ids
+        ),
+        f"PATCH /medics/1, {len(patient_ids)} patientIds": lambda: client.patch(
+            "/medics/1", json={"patientIds": patient_ids[::-1]}, headers=headers
+        ),
+    }
+    for name, function in variants.items():
+        print(f"{name:<40}{_median_ms(function, repeat):10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database-url",
+        default=f"sqlite:///{tempfile.gettempdir()}/bench_id_resolution.db",
+    )
+    parser.add_argument("--ids", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    run(args.database_url, args.ids, args.repeat)
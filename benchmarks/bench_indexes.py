@@ -0,0 +1,114 @@
+"""Compare query plans and latency of the hot lookups with and without secondary indexes.
+
+Usage::
+
+    python -m benchmarks.bench_indexes --records 1000000
+    python -m benchmarks.bench_indexes --database-url postgresql://user:pw@localhost/bench
+
+The target database is dropped and recreated, never point it at real data.
+"""
+
+import argparse
+import datetime
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+from sqlalchemy import Connection, Engine, Index, Select, create_engine, select, text
+
+from benchmarks.seed import seed
+from medical_app.backend import db
+from medical_app.backend.models import Record, association_table
+
+BENCHMARKED_INDEXES: List[Index] = [
+    index for table in (Record.__table__, association_table) for index in table.indexes
+]
+
+
+def _queries(n_medics: int, n_patients: int) -> Dict[str, Select]:
+    patient_id = n_medics + n_patients // 2
+    medic_id = n_medics // 2
+    start = datetime.datetime(2010, 1, 1)
+    return {
+        "records of patient": select(Record.id).where(Record.patient_id == patient_id),
+        "record of patient by id": select(Record.id).where(
+            Record.patient_id == patient_id, Record.id == 1
+        ),
+        "patients of medic": select(association_table.c.patient_id).where(
+            association_table.c.medic_id == medic_id
+        ),
+        "records diagnosed in range": select(Record.id).where(
+            Record.date_diagnosis.between(start, start + datetime.timedelta(days=7))
+        ),
+    }
+
+
+def _explain(connection: Connection, query: Select) -> str:
+    compiled = query.compile(connection, compile_kwargs={"literal_binds": True})
+    prefix = "EXPLAIN QUERY PLAN" if connection.dialect.name == "sqlite" else "EXPLAIN"
+    rows = connection.execute(text(f"{prefix} {compiled}")).all()
+    return "\n".join(f"    {row[-1]}" for row in rows)
+
+
+def _time(connection: Connection, query: Select, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        connection.execute(query).all()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1000
+
+
+def run(
+    engine: Engine, n_medics: int, n_patients: int, n_records: int, repeat: int
+) -> None:
+    db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for index in BENCHMARKED_INDEXES:
+            index.drop(connection)
+        print(f"seeding {n_records} records ...")
+        seed(connection, n_medics, n_patients, n_records)
+
+    queries = _queries(n_medics, n_patients)
+    results = {}
+    for phase in ("without indexes", "with indexes"):
+        if phase == "with indexes":
+            with engine.begin() as connection:
+                for index in BENCHMARKED_INDEXES:
+                    index.create(connection)
+        print(f"\n=== {phase} ===")
+        with engine.connect() as connection:
+            if connection.dialect.name == "postgresql":
+                connection.execute(text("ANALYZE"))
+            for name, query in queries.items():
+                results[(phase, name)] = _time(connection, query, repeat)
+                print(f"{name}: {results[(phase, name)]:.3f} ms (median)")
+                print(_explain(connection, query))
+
+    print("\n=== summary ===")
+    for name in queries:
+        before = results[("without indexes", name)]
+        after = results[("with indexes", name)]
+        print(f"{name}: {before:.3f} ms -> {after:.3f} ms ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database-url", default=f"sqlite:///{tempfile.gettempdir()}/bench_indexes.db"
+    )
+    parser.add_argument("--medics", type=int, default=1_000)
+    parser.add_argument("--patients", type=int, default=100_000)
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    run(
+        create_engine(args.database_url),
+        args.medics,
+        args.patients,
+        args.records,
+        args.repeat,
+    )
@@ -0,0 +1,82 @@
+"""Compare json providers on the payload of a patient with many records.
+
+Serialization alone and GET /patients/<id> end to end are timed with flask's default
+provider, the stdlib fallback and orjson::
+
+    python -m benchmarks.bench_json --records 10000
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from typing import Callable
+
+from flask.json.provider import DefaultJSONProvider
+
+from benchmarks.app import create_bench_app
+from benchmarks.loading_strategies import PATIENT_WITH_RECORDS_AND_MEDIC_IDS
+from benchmarks.seed import seed
+from medical_app.backend import db
+from medical_app.backend.json_provider import (
+    OrjsonJSONProvider,
+    StdlibJSONProvider,
+    orjson,
+)
+from medical_app.backend.models import Patient
+
+PATIENT_ID = 2
+
+PROVIDERS = {
+    "flask default": DefaultJSONProvider,
+    "stdlib fallback": StdlibJSONProvider,
+}
+if orjson is not None:
+    PROVIDERS["orjson"] = OrjsonJSONProvider
+
+
+def _median_ms(function: Callable, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1000
+
+
+def run(database_url: str, n_records: int, repeat: int) -> None:
+    # measure the providers, not the response cache
+    app, token_issuer = create_bench_app(database_url, RESPONSE_CACHE_SIZE=0)
+    headers = {"Authorization": f"Bearer {token_issuer.mint()}"}
+    client = app.test_client()
+    with app.app_context():
+        with db.engine.begin() as connection:
+            seed(connection, n_medics=1, n_patients=1, n_records=n_records)
+        patient = db.session.get(
+            Patient, PATIENT_ID, options=PATIENT_WITH_RECORDS_AND_MEDIC_IDS
+        )
+        payload = {"status": "success", "data": patient.format_for_json()}
+        db.session.remove()
+
+    print(f"patient with {n_records} records, median of {repeat} runs")
+    print(f"{'provider':<18}{'serialize ms':>14}{'GET ms':>10}")
+    for name, provider_class in PROVIDERS.items():
+        app.json = provider_class(app)
+        with app.app_context():
+            serialize_ms = _median_ms(lambda: app.json.response(payload), repeat)
+        get_ms = _median_ms(
+            lambda: client.get(f"/patients/{PATIENT_ID}", headers=headers), repeat
+        )
+        print(f"{name:<18}{serialize_ms:14.1f}{get_ms:10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database-url", default=f"sqlite:///{tempfile.gettempdir()}/bench_json.db"
+    )
+    parser.add_argument("--records", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    run(args.database_url, args.records, args.repeat)
@@ -0,0 +1,93 @@
+"""Compare serializing lists from hydrated ORM instances against rows of column selects.
+
+Both variants produce the same dicts, see medical_app/backend/serializers.py::
+
+    python -m benchmarks.bench_list_serialization --medics 1000
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from typing import Callable
+
+from sqlalchemy import select
+
+from benchmarks.app import create_bench_app
+from benchmarks.loading_strategies import (
+    MEDIC_WITH_PATIENT_IDS,
+    PATIENT_WITH_RECORDS_AND_MEDIC_IDS,
+)
+from benchmarks.seed import seed
+from medical_app.backend import db
+from medical_app.backend.models import Medic, Patient
+from medical_app.backend.serializers import (
+    MEDIC_COLUMNS,
+    PATIENT_COLUMNS,
+    serialize_medic_rows,
+    serialize_patient_rows,
+)
+
+
+def _median_ms(function: Callable, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        # start every run with an empty identity map, as a new request does
+        db.session.remove()
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1000
+
+
+def run(database_url: str, n_medics: int, repeat: int) -> None:
+    app, _ = create_bench_app(database_url)
+    n_patients = n_medics * 10
+    with app.app_context():
+        with db.engine.begin() as connection:
+            seed(connection, n_medics, n_patients, n_records=n_patients * 5)
+
+        variants = {
+            f"{n_medics} medics": (
+                lambda: [
+                    medic.format_for_json()
+                    for medic in db.session.scalars(
+                        select(Medic).options(*MEDIC_WITH_PATIENT_IDS)
+                    )
+                ],
+                lambda: serialize_medic_rows(
+                    db.session.execute(select(*MEDIC_COLUMNS)).all()
+                ),
+            ),
+            f"{n_patients} patients": (
+                lambda: [
+                    patient.format_for_json()
+                    for patient in db.session.scalars(
+                        select(Patient).options(*PATIENT_WITH_RECORDS_AND_MEDIC_IDS)
+                    )
+                ],
+                lambda: serialize_patient_rows(
+                    db.session.execute(select(*PATIENT_COLUMNS)).all()
+                ),
+            ),
+        }
+        print(f"median of {repeat} runs")
+        print(f"{'list':<18}{'orm ms':>10}{'rows ms':>10}")
+        for name, (orm_variant, rows_variant) in variants.items():
+            orm_ms = _median_ms(orm_variant, repeat)
+            rows_ms = _median_ms(rows_variant, repeat)
+            print(f"{name:<18}{orm_ms:10.1f}{rows_ms:10.1f}")
+        db.session.remove()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database-url",
+        default=f"sqlite:///{tempfile.gettempdir()}/bench_list_serialization.db",
+    )
+    parser.add_argument("--medics", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    run(args.database_url, args.medics, args.repeat)
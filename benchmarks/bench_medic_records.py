@@ -0,0 +1,98 @@
+"""Compare loading the records of a medic's caseload per patient against GET /medics/<id>/records.
+
+The per patient variant is what dashboards did before: list the patients of the medic, then
+request the records of every patient. A deep page and the streamed caseload are timed too::
+
+    python -m benchmarks.bench_medic_records --records 500000
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, Optional
+
+from benchmarks.app import create_bench_app
+from benchmarks.seed import seed
+from medical_app.backend import db
+
+N_MEDICS = 20
+N_PATIENTS = 10_000
+MEDIC_ID = 1
+PAGE_SIZE = 50
+DEEP_PAGE = 101
+
+
+def _median_ms(function: Callable, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1000
+
+
+def run(database_url: str, n_records: int, repeat: int) -> None:
+    # measure the views themselves, not the response cache
+    app, token_issuer = create_bench_app(database_url, RESPONSE_CACHE_SIZE=0)
+    headers = {"Authorization": f"Bearer {token_issuer.mint()}"}
+    client = app.test_client()
+    with app.app_context():
+        with db.engine.begin() as connection:
+            seed(connection, N_MEDICS, N_PATIENTS, n_records)
+        db.session.remove()
+
+    def get(url: str) -> Dict:
+        res = client.get(url, headers=headers)
+        assert res.status_code == 200, res.json
+        return res.json
+
+    def first_page_per_patient() -> int:
+        patients = get(f"/medics/{MEDIC_ID}/patients?limit=10000&include=")["data"]
+        n_requests = 1
+        for patient in patients:
+            get(f"/patients/{patient['id']}/records?limit={PAGE_SIZE}")
+            n_requests += 1
+        return n_requests
+
+    def first_page_of_caseload() -> None:
+        get(f"/medics/{MEDIC_ID}/records?limit={PAGE_SIZE}")
+
+    def page_url(cursor: Optional[str]) -> str:
+        after = f"&after={cursor}" if cursor else ""
+        return f"/medics/{MEDIC_ID}/records?limit={PAGE_SIZE}&sort=id{after}"
+
+    # cursor of a deep page, the last one if the caseload of a small seed has fewer pages
+    deep_page, cursor = 1, None
+    while deep_page < DEEP_PAGE:
+        next_cursor = get(page_url(cursor))["next"]
+        if next_cursor is None:
+            break
+        deep_page, cursor = deep_page + 1, next_cursor
+
+    n_requests = first_page_per_patient()
+    print(f"caseload of medic {MEDIC_ID}, median of {repeat} runs")
+    print(f"{'variant':<45}{'ms':>10}")
+    variants = {
+        f"per patient ({n_requests} requests)": first_page_per_patient,
+        "GET /medics/<id>/records": first_page_of_caseload,
+        f"page {deep_page} by cursor": lambda: get(page_url(cursor)),
+        "stream whole caseload as ndjson": lambda: client.get(
+            f"/medics/{MEDIC_ID}/records:export", headers=headers
+        ).get_data(),
+    }
+    for name, function in variants.items():
+        print(f"{name:<45}{_median_ms(function, repeat):10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database-url",
+        default=f"sqlite:///{tempfile.gettempdir()}/bench_medic_records.db",
+    )
+    parser.add_argument("--records", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    run(args.database_url, args.records, args.repeat)
@@ -0,0 +1,120 @@
+"""Load test the connection pool: concurrent requests against different pool sizes.
+
+Every thread stands for a concurrent client of one worker process. With fewer connections
+than threads, requests queue for a connection, which shows up as pool wait time and, past
+DB_POOL_TIMEOUT, as timeouts. Run against postgres for realistic numbers::
+
+    python -m benchmarks.bench_pool --database-url postgresql://localhost/bench \\
+        --threads 32 --pools 2+0 5+10 20+10
+"""
+
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+from typing import List, Tuple
+
+from benchmarks.app import create_bench_app
+from benchmarks.seed import seed
+from config import Config
+from medical_app.backend import db
+from medical_app.backend.pool_metrics import pool_metrics
+
+N_MEDICS = 100
+N_PATIENTS = 10_000
+N_RECORDS = 100_000
+
+
+def _parse_pool(pool: str) -> Tuple[int, int]:
+    pool_size, max_overflow = pool.split("+")
+    return int(pool_size), int(max_overflow)
+
+
+def run(
+    database_url: str, pools: List[str], n_threads: int, seconds: float, timeout: float
+) -> None:
+    print(f"{n_threads} threads for {seconds:.0f} s each")
+    print(
+        f"{'pool':>8}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}"
+        f"{'wait ms':>10}{'max wait':>10}{'timeouts':>10}{'connects':>10}"
+    )
+    for pool in pools:
+        pool_size, max_overflow = _parse_pool(pool)
+
+        class PoolConfig(Config):
+            DB_POOL_SIZE = pool_size
+            DB_MAX_OVERFLOW = max_overflow
+            DB_POOL_TIMEOUT = timeout
+
+        # measure the views themselves, not the response cache
+        app, token_issuer = create_bench_app(
+            database_url,
+            RESPONSE_CACHE_SIZE=0,
+            SQLALCHEMY_ENGINE_OPTIONS=PoolConfig.engine_options(database_url),
+        )
+        with app.app_context():
+            with db.engine.begin() as connection:
+                seed(connection, N_MEDICS, N_PATIENTS, N_RECORDS)
+        # pool timeouts are counted as errors, do not log a traceback for each of them
+        app.logger.disabled = True
+        headers = {"Authorization": f"Bearer {token_issuer.mint()}"}
+        durations: List[float] = []
+        n_errors = 0
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def client_loop(thread_index: int) -> None:
+            nonlocal n_errors
+            client = app.test_client()
+            medic_id = thread_index % N_MEDICS + 1
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                res = client.get(
+                    f"/medics/{medic_id}/records?limit=50", headers=headers
+                )
+                duration = time.perf_counter() - start
+                with lock:
+                    durations.append(duration)
+                    n_errors += res.status_code != 200
+
+        threads = [
+            threading.Thread(target=client_loop, args=(i,)) for i in range(n_threads)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with app.app_context():
+            metrics = pool_metrics(db.engine.pool)
+            db.engine.dispose()
+        quantiles = statistics.quantiles(durations, n=100)
+        print(
+            f"{pool:>8}{len(durations) / seconds:9.0f}{quantiles[49] * 1000:9.1f}"
+            f"{quantiles[98] * 1000:9.1f}{n_errors:8}"
+            f"{metrics['waitMsTotal'] / max(metrics['checkouts'], 1):10.2f}"
+            f"{metrics['waitMsMax']:10.1f}{metrics['timeouts']:10}{metrics['connects']:10}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database-url",
+        default=f"sqlite:///{tempfile.gettempdir()}/bench_pool.db",
+    )
+    parser.add_argument(
+        "--pools",
+        nargs="+",
+        default=["1+0", "2+2", "5+10"],
+        help="pool size + max overflow",
+    )
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument(
+        "--pool-timeout", type=float, default=1, help="seconds to wait for a connection"
+    )
+    args = parser.parse_args()
+
+    run(args.database_url, args.pools, args.threads, args.seconds, args.pool_timeout)
@@ -0,0 +1,60 @@
+"""Measure throughput and peak memory of streaming a patient's record history.
+
+Peak memory is traced for patients with a growing number of records and should stay flat,
+as records are fetched through a server-side cursor and written chunk by chunk::
+
+    python -m benchmarks.bench_record_export --records 1000000
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.app import create_bench_app
+from benchmarks.seed import seed
+from medical_app.backend import db
+
+PATIENT_ID = 2
+
+
+def run(database_url: str, n_records: int) -> None:
+    for n in (n_records // 100, n_records // 10, n_records):
+        app, token_issuer = create_bench_app(database_url)
+        headers = {"Authorization": f"Bearer {token_issuer.mint()}"}
+        client = app.test_client()
+        with app.app_context():
+            with db.engine.begin() as connection:
+                seed(connection, n_medics=1, n_patients=1, n_records=n)
+            db.session.remove()
+
+        for export_format in ("ndjson", "csv"):
+            tracemalloc.start()
+            start = time.perf_counter()
+            res = client.get(
+                f"/patients/{PATIENT_ID}/records:export?format={export_format}",
+                headers=headers,
+                buffered=False,
+            )
+            assert res.status_code == 200
+            n_bytes = sum(len(chunk) for chunk in res.response)
+            res.close()
+            seconds = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                f"GET records:export {export_format:>6} {n:>9} records: "
+                f"{n / seconds:10.0f} records/s, {n_bytes / 2**20:8.1f} MiB sent, "
+                f"peak memory {peak / 2**20:.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database-url", default=f"sqlite:///{tempfile.gettempdir()}/bench_export.db"
+    )
+    parser.add_argument("--records", type=int, default=100_000)
+    args = parser.parse_args()
+
+    run(args.database_url, args.records)
@@ -0,0 +1,98 @@
+"""Measure latency of filtered and sorted record lists with and without the date indexes.
+
+Patients get long record histories and every variant of GET /patients/<id>/records is timed
+end to end, once without and once with the (patient_id, <date>, id) indexes::
+
+    python -m benchmarks.bench_record_filters --records 500000
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+from sqlalchemy import Index, text
+
+from benchmarks.app import create_bench_app
+from benchmarks.seed import seed
+from medical_app.backend import db
+from medical_app.backend.models import Record
+
+DATE_INDEXES: List[Index] = [
+    index
+    for index in Record.__table__.indexes
+    if index.name.startswith("ix_record_patient_id_date")
+]
+QUERIES = (
+    "",
+    "&sort=-date_diagnosis",
+    "&filter[date_diagnosis][gte]=2010-01-01&filter[date_diagnosis][lt]=2011-01-01",
+    "&filter[date_symptom_onset][gte]=2020-01-01&sort=date_symptom_onset",
+    "&filter[ongoing]=true",
+    "&filter[ongoing]=true&sort=-date_diagnosis",
+    "&filter[title]=diagnosis 42",
+)
+
+
+def _median_ms(client, url: str, headers: Dict[str, str], n_requests: int) -> float:
+    durations: List[float] = []
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        res = client.get(url, headers=headers)
+        durations.append(time.perf_counter() - start)
+    assert res.status_code == 200, res.json
+    return statistics.median(durations) * 1000
+
+
+def run(database_url: str, n_patients: int, n_records: int, n_requests: int) -> None:
+    app, token_issuer = create_bench_app(database_url)
+    headers = {"Authorization": f"Bearer {token_issuer.mint()}"}
+    client = app.test_client()
+    # patient ids follow the id of the only medic, see seed
+    base_url = "/patients/2/records?limit=50"
+    with app.app_context():
+        with db.engine.begin() as connection:
+            for index in DATE_INDEXES:
+                index.drop(connection)
+            print(f"seeding {n_records} records of {n_patients} patients ...")
+            seed(connection, 1, n_patients, n_records)
+            n_history = connection.scalar(
+                text("SELECT count(*) FROM record WHERE patient_id = 2")
+            )
+
+        results = {}
+        for phase in ("without indexes", "with indexes"):
+            if phase == "with indexes":
+                with db.engine.begin() as connection:
+                    for index in DATE_INDEXES:
+                        index.create(connection)
+            if db.engine.dialect.name == "postgresql":
+                with db.engine.begin() as connection:
+                    connection.execute(text("ANALYZE"))
+            for query in QUERIES:
+                results[(phase, query)] = _median_ms(
+                    client, base_url + query, headers, n_requests
+                )
+        db.session.remove()
+
+    print(f"patient with {n_history} records, median of {n_requests} requests")
+    print(f"{'query':<80}{'ms before':>10}{'ms after':>10}")
+    for query in QUERIES:
+        before = results[("without indexes", query)]
+        after = results[("with indexes", query)]
+        print(f"{query or '(none)':<80}{before:10.2f}{after:10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database-url",
+        default=f"sqlite:///{tempfile.gettempdir()}/bench_record_filters.db",
+    )
+    parser.add_argument("--patients", type=int, default=10)
+    parser.add_argument("--records", type=int, default=500_000)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    run(args.database_url, args.patients, args.records, args.requests)
@@ -0,0 +1,94 @@
+"""Measure throughput and peak memory of streaming ndjson record ingestion.
+
+Peak memory is traced for uploads of growing size and should stay flat,
+as the body is parsed line by line and inserted in chunks::
+
+    python -m benchmarks.bench_record_ingest --records 100000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.app import create_bench_app
+from benchmarks.seed import seed
+from medical_app.backend import db
+
+N_PATIENTS = 1_000
+
+
+def _write_ndjson(path: str, n_records: int, first_patient_id: int) -> None:
+    with open(path, "w") as f:
+        for i in range(n_records):
+            record = {
+                "title": f"diagnosis {i % 500}",
+                "description": f"imported record {i}",
+                "dateDiagnosis": "2023-02-14",
+                "dateSymptomOnset": "2023-02-07",
+                "patientId": first_patient_id + i % N_PATIENTS,
+            }
+            f.write(json.dumps(record) + "\n")
+
+
+def run(database_url: str, n_records: int, n_single: int) -> None:
+    app, token_issuer = create_bench_app(database_url)
+    headers = {"Authorization": f"Bearer {token_issuer.mint()}"}
+    client = app.test_client()
+    with app.app_context():
+        with db.engine.begin() as connection:
+            seed(connection, n_medics=10, n_patients=N_PATIENTS, n_records=0)
+        first_patient_id = 11
+
+        record = {
+            "title": "flu",
+            "description": "single record",
+            "dateDiagnosis": "2023-02-14",
+            "dateSymptomOnset": "2023-02-07",
+        }
+        start = time.perf_counter()
+        for _ in range(n_single):
+            res = client.post(
+                f"/patients/{first_patient_id}/records", json=record, headers=headers
+            )
+            assert res.status_code == 201
+        single_rate = n_single / (time.perf_counter() - start)
+        print(f"POST /patients/<id>/records: {single_rate:10.0f} records/s")
+
+        for n in (n_records // 10, n_records):
+            path = os.path.join(tempfile.mkdtemp(), "records.ndjson")
+            _write_ndjson(path, n, first_patient_id)
+            with open(path, "rb") as body:
+                tracemalloc.start()
+                start = time.perf_counter()
+                res = client.post(
+                    "/records:batch",
+                    input_stream=body,
+                    content_length=os.path.getsize(path),
+                    content_type="application/x-ndjson",
+                    headers=headers,
+                )
+                seconds = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            assert res.status_code == 201, res.json
+            print(
+                f"POST /records:batch {n:>9} records: {n / seconds:10.0f} records/s, "
+                f"peak memory {peak / 2**20:.1f} MiB"
+            )
+            os.remove(path)
+        db.session.remove()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database-url", default=f"sqlite:///{tempfile.gettempdir()}/bench_ingest.db"
+    )
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--single", type=int, default=500)
+    args = parser.parse_args()
+
+    run(args.database_url, args.records, args.single)
@@ -0,0 +1,109 @@
+"""Compare full text search of records against substring scans, and its cost on inserts.
+
+GET /records:search is timed end to end next to the equivalent unindexed LIKE query.
+Seeding is timed with and without the triggers keeping the search index up to date::
+
+    python -m benchmarks.bench_record_search --records 500000
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict
+
+from sqlalchemy import and_, or_, select, text
+
+from benchmarks.app import create_bench_app
+from benchmarks.seed import seed
+from medical_app.backend import db
+from medical_app.backend.models import Record
+
+N_MEDICS = 100
+N_PATIENTS = 10_000
+
+# patient ids follow the medic ids, see seed
+SEARCHES: Dict[str, Dict[str, str]] = {
+    "all records": {"q": "diagnosis 42"},
+    "records of patient": {"q": "diagnosis 42", "patient_id": str(N_MEDICS + 1)},
+    "records of medic": {"q": "diagnosis 42", "medic_id": "1"},
+    "no match": {"q": "asthma"},
+}
+
+
+def _median_ms(function: Callable, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1000
+
+
+def _like_query(args: Dict[str, str]):
+    # what clients would have to do without the search index, all matches are needed to rank
+    statement = select(Record.id).where(
+        and_(
+            *(
+                or_(Record.title.contains(term), Record.description.contains(term))
+                for term in args["q"].split()
+            )
+        )
+    )
+    if "patient_id" in args:
+        statement = statement.where(Record.patient_id == int(args["patient_id"]))
+    return statement
+
+
+def run(database_url: str, n_records: int, repeat: int) -> None:
+    app, token_issuer = create_bench_app(database_url)
+    headers = {"Authorization": f"Bearer {token_issuer.mint()}"}
+    client = app.test_client()
+    with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            # time seeding without the search triggers, then rebuild the index
+            with db.engine.begin() as connection:
+                for trigger in ("insert", "delete", "update"):
+                    connection.execute(text(f"DROP TRIGGER record_search_{trigger}"))
+                start = time.perf_counter()
+                seed(connection, N_MEDICS, N_PATIENTS, n_records)
+                print(f"seeding without index: {time.perf_counter() - start:.1f} s")
+            db.drop_all()
+            db.create_all()
+        with db.engine.begin() as connection:
+            start = time.perf_counter()
+            seed(connection, N_MEDICS, N_PATIENTS, n_records)
+            print(f"seeding with index: {time.perf_counter() - start:.1f} s")
+            if db.engine.dialect.name == "postgresql":
+                connection.execute(text("ANALYZE"))
+
+        print(f"\n{n_records} records, median of {repeat} runs")
+        print(f"{'search':<22}{'search ms':>11}{'like ms':>10}")
+        for name, args in SEARCHES.items():
+            search_ms = _median_ms(
+                lambda: client.get(
+                    "/records:search", query_string=args, headers=headers
+                ),
+                repeat,
+            )
+            if "medic_id" in args:
+                like_ms = float("nan")
+            else:
+                like_ms = _median_ms(
+                    lambda: db.session.execute(_like_query(args)).all(), repeat
+                )
+            print(f"{name:<22}{search_ms:11.2f}{like_ms:10.2f}")
+        db.session.remove()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database-url",
+        default=f"sqlite:///{tempfile.gettempdir()}/bench_record_search.db",
+    )
+    parser.add_argument("--records", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    run(args.database_url, args.records, args.repeat)
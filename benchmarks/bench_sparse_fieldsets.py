@@ -0,0 +1,91 @@
+"""Measure payload size, sql statements and latency of sparse fieldset variants.
+
+Every endpoint is requested with its complete representation and with narrower fields and
+include query args, which skip the queries of relationships that are not included::
+
+    python -m benchmarks.bench_sparse_fieldsets --requests 50
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+from sqlalchemy import event
+
+from benchmarks.app import create_bench_app
+from benchmarks.seed import seed
+from medical_app.backend import db
+
+N_MEDICS = 100
+N_PATIENTS = 2_000
+N_RECORDS = 40_000
+
+# patient ids follow the medic ids, see seed
+FIRST_PATIENT_ID = N_MEDICS + 1
+URLS = (
+    "/medics?limit=50",
+    "/medics?limit=50&include=",
+    "/medics?limit=50&include=&fields=lastName",
+    "/medics/1/patients?limit=50",
+    "/medics/1/patients?limit=50&include=medics",
+    "/medics/1/patients?limit=50&include=",
+    f"/patients/{FIRST_PATIENT_ID}",
+    f"/patients/{FIRST_PATIENT_ID}?fields[records]=title,date_diagnosis",
+    f"/patients/{FIRST_PATIENT_ID}?include=medics",
+    f"/patients/{FIRST_PATIENT_ID}/records?limit=50",
+    f"/patients/{FIRST_PATIENT_ID}/records?limit=50&fields=title",
+)
+
+
+def _measure(client, url: str, headers: Dict[str, str], n_requests: int):
+    statements: List[str] = []
+
+    def count(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append(statement)
+
+    durations: List[float] = []
+    event.listen(db.engine, "before_cursor_execute", count)
+    try:
+        for _ in range(n_requests):
+            start = time.perf_counter()
+            res = client.get(url, headers=headers)
+            durations.append(time.perf_counter() - start)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count)
+    assert res.status_code == 200, res.json
+    return (
+        statistics.median(durations) * 1000,
+        len(res.data),
+        len(statements) / n_requests,
+    )
+
+
+def run(database_url: str, n_requests: int) -> None:
+    # measure the views themselves, not the response cache in front of /medics
+    app, token_issuer = create_bench_app(database_url, RESPONSE_CACHE_SIZE=0)
+    headers = {"Authorization": f"Bearer {token_issuer.mint()}"}
+    client = app.test_client()
+    with app.app_context():
+        with db.engine.begin() as connection:
+            seed(connection, N_MEDICS, N_PATIENTS, N_RECORDS)
+        db.session.remove()
+
+        print(f"median of {n_requests} requests")
+        print(f"{'endpoint':<60}{'ms':>8}{'bytes':>10}{'statements':>12}")
+        for url in URLS:
+            ms, n_bytes, n_statements = _measure(client, url, headers, n_requests)
+            print(f"{url:<60}{ms:8.2f}{n_bytes:10d}{n_statements:12.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database-url",
+        default=f"sqlite:///{tempfile.gettempdir()}/bench_sparse_fieldsets.db",
+    )
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    run(args.database_url, args.requests)
@@ -0,0 +1,117 @@
+"""Measure cold start of the wsgi application: import time and network lookups.
+
+Every run imports wsgi in a fresh interpreter, as a gunicorn worker does on boot.
+Pass a git ref to compare against an older revision of the code, e.g. the commit
+before validators were built lazily::
+
+    python -m benchmarks.bench_startup --runs 10 --baseline-ref HEAD~1
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+from config import basedir
+
+PROBE = """
+import json, socket, time
+
+lookups = []
+_getaddrinfo = socket.getaddrinfo
+
+
+def getaddrinfo(host, *args, **kwargs):
+    lookups.append(host)
+    return _getaddrinfo(host, *args, **kwargs)
+
+
+socket.getaddrinfo = getaddrinfo
+start = time.perf_counter()
+try:
+    import wsgi
+    error = None
+except Exception as e:
+    error = repr(e)
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "lookups": lookups,
+    "error": error,
+}))
+"""
+
+
+def measure(source_dir: pathlib.Path, runs: int) -> Dict:
+    env = {
+        **os.environ,
+        "SQLALCHEMY_DATABASE_URI": "sqlite://",
+        "APP_SECRET_KEY": "bench",
+        "PYTHONPATH": str(source_dir),
+    }
+    results: List[Dict] = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-c", PROBE],
+            cwd=source_dir,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        results.append(json.loads(completed.stdout.splitlines()[-1]))
+    durations = [result["seconds"] * 1000 for result in results]
+    return {
+        "median_ms": statistics.median(durations),
+        "min_ms": min(durations),
+        "network_lookups": results[0]["lookups"],
+        "error": results[0]["error"],
+    }
+
+
+def report(name: str, result: Dict) -> None:
+    print(f"=== {name} ===")
+    print(
+        f"import wsgi: {result['median_ms']:.1f} ms median, {result['min_ms']:.1f} ms min"
+    )
+    print(f"network lookups during import: {result['network_lookups'] or 'none'}")
+    if result["error"]:
+        print(f"import failed: {result['error']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--baseline-ref", help="git ref to compare against")
+    args = parser.parse_args()
+
+    report("working tree", measure(basedir, args.runs))
+
+    if args.baseline_ref:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            worktree = pathlib.Path(tmp_dir) / "baseline"
+            subprocess.run(
+                [
+                    "git",
+                    "worktree",
+                    "add",
+                    "--detach",
+                    str(worktree),
+                    args.baseline_ref,
+                ],
+                cwd=basedir,
+                check=True,
+                capture_output=True,
+            )
+            try:
+                report(args.baseline_ref, measure(worktree, args.runs))
+            finally:
+                subprocess.run(
+                    ["git", "worktree", "remove", "--force", str(worktree)],
+                    cwd=basedir,
+                    check=True,
+                )
@@ -0,0 +1,80 @@
+"""Compare the stats endpoints reading the summary table against GROUP BY over all records.
+
+Records are seeded in steps, the summary table is rebuilt after each step since seeding
+bypasses the session. Reads from the summary should stay flat as records grow::
+
+    python -m benchmarks.bench_stats --records 100000 200000 400000
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+from benchmarks.app import create_bench_app
+from benchmarks.seed import seed
+from medical_app.backend import db
+from medical_app.backend.stats.summary import rebuild_summary
+
+N_MEDICS = 100
+N_PATIENTS = 10_000
+URLS = [
+    "/stats/records",
+    "/stats/patients?limit=50",
+    f"/stats/patients/{N_MEDICS + 1}",
+    "/stats/medics?limit=50",
+]
+
+
+def _median_ms(function: Callable, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1000
+
+
+def run(database_url: str, record_steps: List[int], repeat: int) -> None:
+    # measure the views themselves, not the response cache
+    app, token_issuer = create_bench_app(database_url, RESPONSE_CACHE_SIZE=0)
+    headers = {"Authorization": f"Bearer {token_issuer.mint()}"}
+    client = app.test_client()
+
+    def get(url: str) -> None:
+        res = client.get(url, headers=headers)
+        assert res.status_code == 200, res.json
+
+    print(f"median of {repeat} runs")
+    print(f"{'records':>10}  {'url':<32}{'summary ms':>12}{'group by ms':>13}")
+    for n_records in sorted(record_steps):
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            with db.engine.begin() as connection:
+                seed(connection, N_MEDICS, N_PATIENTS, n_records)
+            rebuild_summary()
+            db.session.commit()
+            db.session.remove()
+        for url in URLS:
+            app.config["STATS_FROM_SUMMARY"] = True
+            summary_ms = _median_ms(lambda: get(url), repeat)
+            app.config["STATS_FROM_SUMMARY"] = False
+            group_by_ms = _median_ms(lambda: get(url), repeat)
+            print(f"{n_records:>10}  {url:<32}{summary_ms:12.2f}{group_by_ms:13.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database-url",
+        default=f"sqlite:///{tempfile.gettempdir()}/bench_stats.db",
+    )
+    parser.add_argument(
+        "--records", type=int, nargs="+", default=[100_000, 200_000, 400_000]
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    run(args.database_url, args.records, args.repeat)
@@ -0,0 +1,26 @@
+"""Eager-loading profiles of the ORM serialization the benchmarks compare against.
+
+Relationships in models.py are lazy by default. Serializing a list of entities with
+format_for_json would therefore fire one query per entity and relationship (N+1 queries).
+The profiles load all serialized relationships upfront with one additional query per
+relationship, the fastest way to serialize model instances. The read endpoints skip the ORM
+entirely, see medical_app/backend/serializers.py.
+"""
+
+from typing import Tuple
+
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from medical_app.backend.models import Medic, Patient
+
+LoaderProfile = Tuple[LoaderOption, ...]
+
+# medic with ids of its patients, as Medic.format_for_json serializes it
+MEDIC_WITH_PATIENT_IDS: LoaderProfile = (selectinload(Medic.patients),)
+
+# patient with its records and ids of its medics, as Patient.format_for_json serializes it
+PATIENT_WITH_RECORDS_AND_MEDIC_IDS: LoaderProfile = (
+    selectinload(Patient.records),
+    selectinload(Patient.medics),
+)
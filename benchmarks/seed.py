@@ -0,0 +1,90 @@
+"""Generate synthetic medics, patients and records for benchmarks.
+
+Rows are inserted with bulk executemany statements on the core tables, so seeding
+millions of records takes seconds rather than hours of ORM unit of work.
+"""
+
+import datetime
+import random
+from typing import Iterator, Sequence
+
+from sqlalchemy import Connection, Table
+
+from medical_app.backend.api_helper_functions import chunked
+from medical_app.backend.models import Medic, Patient, Record, User, association_table
+
+CHUNK_SIZE = 10_000
+
+
+def _insert(connection: Connection, table: Table, rows: Iterator[dict]) -> None:
+    for chunk in chunked(rows, CHUNK_SIZE):
+        connection.execute(table.insert(), chunk)
+
+
+def seed(
+    connection: Connection,
+    n_medics: int = 100,
+    n_patients: int = 10_000,
+    n_records: int = 100_000,
+    medics_per_patient: int = 2,
+    random_seed: int = 0,
+) -> None:
+    """Populate empty tables with synthetic data.
+
+    Medics get the user ids 1 to n_medics, patients the following n_patients ids.
+    Records are distributed randomly across patients.
+
+    :param connection: connection to the database, the caller is responsible for committing
+    :param n_medics: number of medics to create
+    :param n_patients: number of patients to create
+    :param n_records: number of records to create
+    :param medics_per_patient: number of medics linked to each patient
+    :param random_seed: seed for reproducible data
+    """
+    rng = random.Random(random_seed)
+    medic_ids: Sequence[int] = range(1, n_medics + 1)
+    patient_ids: Sequence[int] = range(n_medics + 1, n_medics + n_patients + 1)
+
+    _insert(
+        connection,
+        User.__table__,
+        (
+            {
+                "id": user_id,
+                "first_name": f"first{user_id}",
+                "last_name": f"last{user_id}",
+                "email": f"user{user_id}@bench.com",
+            }
+            for user_id in range(1, n_medics + n_patients + 1)
+        ),
+    )
+    _insert(connection, Medic.__table__, ({"id": id_} for id_ in medic_ids))
+    _insert(connection, Patient.__table__, ({"id": id_} for id_ in patient_ids))
+    _insert(
+        connection,
+        association_table,
+        (
+            {"patient_id": patient_id, "medic_id": medic_id}
+            for patient_id in patient_ids
+            for medic_id in rng.sample(medic_ids, min(medics_per_patient, n_medics))
+        ),
+    )
+
+    start = datetime.datetime(2000, 1, 1)
+
+    def records() -> Iterator[dict]:
+        for record_id in range(1, n_records + 1):
+            onset = start + datetime.timedelta(days=rng.randrange(8000))
+            offset = onset + datetime.timedelta(days=rng.randrange(1, 60))
+            yield {
+                "id": record_id,
+                "title": f"diagnosis {record_id % 500}",
+                "description": f"synthetic record {record_id}",
+                "date_symptom_onset": onset,
+                "date_diagnosis": onset + datetime.timedelta(days=rng.randrange(14)),
+                # roughly every tenth record has ongoing symptoms
+                "date_symptom_offset": offset if rng.random() > 0.1 else None,
+                "patient_id": rng.choice(patient_ids),
+            }
+
+    _insert(connection, Record.__table__, records())
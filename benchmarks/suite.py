@@ -0,0 +1,478 @@
+"""Benchmark every API route and compare the results with a saved baseline.
+
+Each scenario sends one kind of request to the app, authenticated with a locally minted
+token, against a database seeded with the given numbers of medics, patients and records.
+Requests which consume a resource, like deletes, get a fresh one from an untimed setup
+request. Latency percentiles and throughput are reported per scenario::
+
+    python -m benchmarks.suite --records 200000 --save
+    # after a change, compare with the baseline of an earlier commit
+    python -m benchmarks.suite --records 200000 --baseline benchmarks/baselines/<commit>.json
+
+With --baseline, the exit code is 1 if the p50 or p99 latency of any scenario regressed by
+more than --threshold percent. Baselines are only comparable if taken with the same
+arguments and database on the same machine. Routes of the login pages are not covered,
+they redirect to auth0.
+"""
+
+import argparse
+import fnmatch
+import itertools
+import json
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from flask.testing import FlaskClient
+
+from benchmarks.app import create_bench_app
+from benchmarks.seed import seed
+from medical_app.backend import db
+from medical_app.backend.stats.summary import rebuild_summary
+
+BASELINE_DIR = pathlib.Path(__file__).parent / "baselines"
+# latency percentiles compared with the baseline
+COMPARED = ("p50", "p99")
+
+
+class Request(NamedTuple):
+    """Request of a scenario, see FlaskClient.open for the arguments."""
+
+    method: str
+    path: str
+    json: Any = None
+    data: Optional[str] = None
+    content_type: Optional[str] = None
+
+
+class Scenario(NamedTuple):
+    """Kind of request to benchmark.
+
+    make_request is called with the client, the number of the request, unique across the
+    clients of a run, and the seeded data. Requests it sends itself are not timed.
+    """
+
+    name: str
+    make_request: Callable[[FlaskClient, int, "SeedInfo"], Request]
+
+
+class SeedInfo(NamedTuple):
+    """Numbers of seeded rows, see seed for the ids they get."""
+
+    n_medics: int
+    n_patients: int
+    n_records: int
+
+    def medic_id(self, n: int) -> int:
+        return n % self.n_medics + 1
+
+    def patient_id(self, n: int) -> int:
+        # patient ids follow the medic ids
+        return self.n_medics + n % self.n_patients + 1
+
+
+def _person(kind: str, n: int, **links: Any) -> Dict[str, Any]:
+    return {
+        "firstName": f"{kind}{n}",
+        "lastName": "Bench",
+        "email": f"{kind}{n}@suite.bench.com",
+        **links,
+    }
+
+
+def _record(n: int, **links: Any) -> Dict[str, Any]:
+    return {
+        "title": f"diagnosis {n % 500}",
+        "description": f"benchmark record {n}",
+        "dateDiagnosis": "2023-02-14",
+        "dateSymptomOnset": "2023-02-07",
+        **links,
+    }
+
+
+def _created_id(client: FlaskClient, path: str, body: Dict[str, Any]) -> int:
+    res = client.post(path, json=body)
+    if res.status_code != 201:
+        raise RuntimeError(f"Setup request POST {path} failed with {res.status_code}")
+    return res.json["data"]["id"]
+
+
+SCENARIOS: List[Scenario] = [
+    # medics
+    Scenario("GET /medics", lambda c, n, s: Request("GET", "/medics?limit=50")),
+    Scenario(
+        "GET /medics/<id>",
+        lambda c, n, s: Request("GET", f"/medics/{s.medic_id(n)}"),
+    ),
+    Scenario(
+        "GET /medics/<id>/patients",
+        lambda c, n, s: Request("GET", f"/medics/{s.medic_id(n)}/patients?limit=50"),
+    ),
+    Scenario(
+        "GET /medics/<id>/records",
+        lambda c, n, s: Request("GET", f"/medics/{s.medic_id(n)}/records?limit=50"),
+    ),
+    Scenario(
+        "GET /medics/<id>/records:export",
+        lambda c, n, s: Request("GET", f"/medics/{s.medic_id(n)}/records:export"),
+    ),
+    Scenario(
+        "POST /medics",
+        lambda c, n, s: Request(
+            "POST", "/medics", json=_person("medic", n, patientIds=[s.patient_id(n)])
+        ),
+    ),
+    Scenario(
+        "POST /medics:batch",
+        lambda c, n, s: Request(
+            "POST",
+            "/medics:batch",
+            json=[
+                _person("batchmedic", n * 10 + i, patientIds=[s.patient_id(n + i)])
+                for i in range(10)
+            ],
+        ),
+    ),
+    Scenario(
+        "PATCH /medics/<id>",
+        lambda c, n, s: Request(
+            "PATCH",
+            f"/medics/{s.medic_id(n)}",
+            json={"firstName": f"patched{n}", "patientIds": [s.patient_id(n)]},
+        ),
+    ),
+    Scenario(
+        "PUT /medics/<id>/patients/<id>",
+        lambda c, n, s: Request(
+            "PUT",
+            f"/medics/{s.medic_id(n)}/patients/"
+            f"{_created_id(c, '/patients', _person('linkedpatient', n))}",
+        ),
+    ),
+    Scenario(
+        "DELETE /medics/<id>",
+        lambda c, n, s: Request(
+            "DELETE",
+            f"/medics/{_created_id(c, '/medics', _person('deletedmedic', n))}",
+        ),
+    ),
+    # patients
+    Scenario(
+        "GET /patients/<id>",
+        lambda c, n, s: Request("GET", f"/patients/{s.patient_id(n)}"),
+    ),
+    Scenario(
+        "GET /patients/<id>/records",
+        lambda c, n, s: Request("GET", f"/patients/{s.patient_id(n)}/records"),
+    ),
+    Scenario(
+        "GET /patients/<id>/records:export",
+        lambda c, n, s: Request("GET", f"/patients/{s.patient_id(n)}/records:export"),
+    ),
+    Scenario(
+        "POST /patients",
+        lambda c, n, s: Request(
+            "POST", "/patients", json=_person("patient", n, medicIds=[s.medic_id(n)])
+        ),
+    ),
+    Scenario(
+        "POST /patients:batch",
+        lambda c, n, s: Request(
+            "POST",
+            "/patients:batch",
+            json=[
+                _person("batchpatient", n * 10 + i, medicIds=[s.medic_id(n + i)])
+                for i in range(10)
+            ],
+        ),
+    ),
+    Scenario(
+        "DELETE /patients/<id>",
+        lambda c, n, s: Request(
+            "DELETE",
+            f"/patients/{_created_id(c, '/patients', _person('deletedpatient', n))}",
+        ),
+    ),
+    # records
+    Scenario(
+        "GET /patients/<id>/records/<id>",
+        lambda c, n, s: Request(
+            "GET",
+            f"/patients/{s.patient_id(n)}/records/"
+            f"{_created_id(c, f'/patients/{s.patient_id(n)}/records', _record(n))}",
+        ),
+    ),
+    Scenario(
+        "POST /patients/<id>/records",
+        lambda c, n, s: Request(
+            "POST", f"/patients/{s.patient_id(n)}/records", json=_record(n)
+        ),
+    ),
+    Scenario(
+        "POST /records:batch",
+        lambda c, n, s: Request(
+            "POST",
+            "/records:batch",
+            data="\n".join(
+                json.dumps(_record(n * 100 + i, patientId=s.patient_id(n + i)))
+                for i in range(100)
+            ),
+            content_type="application/x-ndjson",
+        ),
+    ),
+    Scenario(
+        "DELETE /patients/<id>/records/<id>",
+        lambda c, n, s: Request(
+            "DELETE",
+            f"/patients/{s.patient_id(n)}/records/"
+            f"{_created_id(c, f'/patients/{s.patient_id(n)}/records', _record(n))}",
+        ),
+    ),
+    Scenario(
+        "GET /records:search",
+        lambda c, n, s: Request("GET", f"/records:search?q=diagnosis+{n % 500}"),
+    ),
+    # stats and metrics
+    Scenario("GET /stats/records", lambda c, n, s: Request("GET", "/stats/records")),
+    Scenario(
+        "GET /stats/patients",
+        lambda c, n, s: Request("GET", "/stats/patients?limit=50"),
+    ),
+    Scenario(
+        "GET /stats/patients/<id>",
+        lambda c, n, s: Request("GET", f"/stats/patients/{s.patient_id(n)}"),
+    ),
+    Scenario(
+        "GET /stats/medics", lambda c, n, s: Request("GET", "/stats/medics?limit=50")
+    ),
+    Scenario("GET /metrics/pool", lambda c, n, s: Request("GET", "/metrics/pool")),
+    Scenario(
+        "GET /metrics/response-cache",
+        lambda c, n, s: Request("GET", "/metrics/response-cache"),
+    ),
+]
+
+
+def _percentile(quantiles: List[float], percent: int) -> float:
+    return quantiles[percent - 1] * 1000
+
+
+def run_scenario(
+    app: Any,
+    headers: Dict[str, str],
+    scenario: Scenario,
+    seed_info: SeedInfo,
+    n_requests: int,
+    n_clients: int,
+    numbers: Iterator[int],
+) -> Dict[str, float]:
+    """Send n_requests of scenario from each of n_clients concurrent clients.
+
+    :param app: flask app
+    :param headers: headers of every request, i.e. the authorization
+    :param scenario: scenario
+    :param seed_info: seeded data
+    :param n_requests: number of timed requests per client
+    :param n_clients: number of concurrent clients
+    :param numbers: numbers of the requests, unique within a run so created users differ
+    :raise: RuntimeError if a request fails
+    :return: latency percentiles in ms and throughput in requests per second
+    """
+    durations: List[float] = []
+    failures: List[str] = []
+    lock = threading.Lock()
+
+    def client_loop() -> None:
+        client = app.test_client()
+        client.environ_base["HTTP_AUTHORIZATION"] = headers["Authorization"]
+        for _ in range(n_requests):
+            request = scenario.make_request(client, next(numbers), seed_info)
+            start = time.perf_counter()
+            res = client.open(
+                request.path,
+                method=request.method,
+                json=request.json,
+                data=request.data,
+                content_type=request.content_type,
+            )
+            res.get_data()
+            duration = time.perf_counter() - start
+            with lock:
+                durations.append(duration)
+                if res.status_code >= 300:
+                    failures.append(f"{request.method} {request.path}: {res.status}")
+
+    threads = [threading.Thread(target=client_loop) for _ in range(n_clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if failures:
+        raise RuntimeError(f"{len(failures)} failed requests, e.g. {failures[0]}")
+
+    quantiles = statistics.quantiles(durations, n=100, method="inclusive")
+    return {
+        "rps": n_clients / statistics.fmean(durations),
+        "p50": _percentile(quantiles, 50),
+        "p90": _percentile(quantiles, 90),
+        "p99": _percentile(quantiles, 99),
+        "max": max(durations) * 1000,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+) -> List[str]:
+    """Print change of the latencies since the baseline and return the regressed scenarios.
+
+    :param results: results by scenario name
+    :param baseline: results of the baseline by scenario name
+    :param threshold: percentage by which a latency may grow without counting as regression
+    :return: names of regressed scenarios
+    """
+    print(
+        f"\n{'scenario':<38}" + "".join(f"{name + ' change':>13}" for name in COMPARED)
+    )
+    regressed = []
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<38}{'not in baseline':>26}")
+            continue
+        changes = [
+            (result[key] - baseline[name][key]) / baseline[name][key] * 100
+            for key in COMPARED
+        ]
+        is_regression = any(change > threshold for change in changes)
+        print(
+            f"{name:<38}"
+            + "".join(f"{change:+12.1f}%" for change in changes)
+            + ("  REGRESSION" if is_regression else "")
+        )
+        if is_regression:
+            regressed.append(name)
+    return regressed
+
+
+def run(args: argparse.Namespace) -> int:
+    scenarios = [
+        scenario
+        for scenario in SCENARIOS
+        if any(fnmatch.fnmatch(scenario.name, pattern) for pattern in args.scenarios)
+    ]
+    # measure the views themselves, not the response cache
+    app, token_issuer = create_bench_app(args.database_url, RESPONSE_CACHE_SIZE=0)
+    with app.app_context():
+        with db.engine.begin() as connection:
+            seed(connection, args.medics, args.patients, args.records)
+        # seeding bypasses the session, which keeps the stats summary up to date
+        rebuild_summary()
+        db.session.commit()
+        db.session.remove()
+    seed_info = SeedInfo(args.medics, args.patients, args.records)
+    headers = {"Authorization": f"Bearer {token_issuer.mint()}"}
+    numbers = itertools.count()
+
+    print(
+        f"{args.medics} medics, {args.patients} patients, {args.records} records, "
+        f"{args.clients} clients x {args.requests} requests per scenario"
+    )
+    print(
+        f"{'scenario':<38}{'req/s':>9}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+    )
+    results: Dict[str, Dict[str, float]] = {}
+    for scenario in scenarios:
+        # warm up caches of the app and database, e.g. verified tokens and query plans
+        run_scenario(app, headers, scenario, seed_info, 5, 1, numbers)
+        result = run_scenario(
+            app, headers, scenario, seed_info, args.requests, args.clients, numbers
+        )
+        results[scenario.name] = result
+        print(
+            f"{scenario.name:<38}{result['rps']:9.0f}{result['p50']:9.2f}"
+            f"{result['p90']:9.2f}{result['p99']:9.2f}{result['max']:9.2f}"
+        )
+    with app.app_context():
+        db.engine.dispose()
+
+    report = {
+        "commit": _git_commit(),
+        "arguments": {
+            key: getattr(args, key)
+            for key in ("medics", "patients", "records", "requests", "clients")
+        },
+        "database": app.config["SQLALCHEMY_DATABASE_URI"].split(":", 1)[0],
+        "results": results,
+    }
+    if args.save:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path = BASELINE_DIR / f"{report['commit']}.json"
+        path.write_text(json.dumps(report, indent=2))
+        print(f"\nSaved baseline {path}")
+    if args.baseline:
+        baseline = json.loads(pathlib.Path(args.baseline).read_text())
+        if (baseline["arguments"], baseline["database"]) != (
+            report["arguments"],
+            report["database"],
+        ):
+            print(
+                f"\nBaseline was taken with {baseline['arguments']} on "
+                f"{baseline['database']}, results are not comparable",
+                file=sys.stderr,
+            )
+        if compare(results, baseline["results"], args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database-url",
+        default=f"sqlite:///{tempfile.gettempdir()}/bench_suite.db",
+    )
+    parser.add_argument("--medics", type=int, default=100)
+    parser.add_argument("--patients", type=int, default=10_000)
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument(
+        "--requests", type=int, default=100, help="timed requests per client"
+    )
+    parser.add_argument("--clients", type=int, default=1, help="concurrent clients")
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        default=["*"],
+        help="glob patterns of the scenario names to run, e.g. 'GET /medics*'",
+    )
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help=f"save results as baseline of the current commit in {BASELINE_DIR}",
+    )
+    parser.add_argument("--baseline", help="baseline file to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10,
+        help="percentage by which p50 or p99 may grow without counting as regression",
+    )
+
+    sys.exit(run(parser.parse_args()))
@@ -11,10 +11,86 @@ basedir: pathlib.Path = pathlib.Path(__file__).parent.resolve()
 class Config:
     # db
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # connection pool per worker process, see engine_options. Connections are opened on demand
+    # up to DB_POOL_SIZE kept open plus DB_MAX_OVERFLOW closed after use, requests beyond that
+    # wait up to DB_POOL_TIMEOUT seconds. Recycle connections before the server or proxies in
+    # between drop idle ones, pre ping detects dropped ones before they are handed out.
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() in (
+        "1",
+        "true",
+    )
+    # postgres cancels statements running longer, 0 disables the timeout
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", 0))
+    # reads of a client go to the primary for that long after its last change, as replicas lag
+    REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 10))
+    # number of rows per bulk insert and per IN query of batch endpoints
+    BATCH_CHUNK_SIZE = int(os.environ.get("BATCH_CHUNK_SIZE", 1000))
     # auth
     AUTH0_DOMAIN = "medical-app.eu.auth0.com"
     ALGORITHMS = ["RS256"]
     API_AUDIENCE = "patients-medics-info-api"
+    # json web key set location: http(s) url, file:///<path> or env:<variable name>,
+    # defaults to the jwks url of the auth0 domain
+    JWKS_SOURCE = os.environ.get("JWKS_SOURCE")
+    JWKS_CACHE_TTL = int(os.environ.get("JWKS_CACHE_TTL", 3600))
+    JWKS_SNAPSHOT_PATH = os.environ.get("JWKS_SNAPSHOT_PATH")
+    # number of verified tokens to cache, 0 disables the cache
+    TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", 1024))
+    # cache of public medic responses: memory:// or sqlite:///<path> to share it across workers,
+    # number of cached responses, 0 disables the cache. memory:// is only consistent with a
+    # single worker process, as writes only invalidate the entries of the worker handling them.
+    RESPONSE_CACHE_URI = os.environ.get("RESPONSE_CACHE_URI", "memory://")
+    RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", 1024))
+    # seconds until cached responses expire, bounding how long workers that missed an
+    # invalidation serve stale responses, 0 keeps them until invalidated
+    RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", 10))
+    # read stats from the incrementally maintained summary table instead of GROUP BY over records
+    STATS_FROM_SUMMARY = os.environ.get("STATS_FROM_SUMMARY", "true").lower() in (
+        "1",
+        "true",
+    )
+
+    @classmethod
+    def engine_options(cls, database_uri: str) -> dict:
+        """Return SQLALCHEMY_ENGINE_OPTIONS configuring the connection pool of database_uri.
+
+        :param database_uri: sqlalchemy url of the database
+        :return: engine options, empty for in-memory sqlite databases which have no pool
+        """
+        if database_uri in ("sqlite://", "sqlite:///:memory:"):
+            return {}
+        options = {
+            "pool_size": cls.DB_POOL_SIZE,
+            "max_overflow": cls.DB_MAX_OVERFLOW,
+            "pool_timeout": cls.DB_POOL_TIMEOUT,
+            "pool_recycle": cls.DB_POOL_RECYCLE,
+            "pool_pre_ping": cls.DB_POOL_PRE_PING,
+        }
+        if cls.DB_STATEMENT_TIMEOUT_MS and database_uri.startswith("postgresql"):
+            options["connect_args"] = {
+                "options": f"-c statement_timeout={cls.DB_STATEMENT_TIMEOUT_MS}"
+            }
+        return options
+
+    @classmethod
+    def replica_binds(cls, replica_uris: str) -> dict:
+        """Return SQLALCHEMY_REPLICAS, see medical_app/backend/replicas.py.
+
+        :param replica_uris: comma separated sqlalchemy urls of the replicas
+        :return: url and pool options of each replica by key
+        """
+        return {
+            f"replica_{i}": {"url": uri, **cls.engine_options(uri)}
+            for i, uri in enumerate(
+                uri.strip().replace("postgres://", "postgresql://")
+                for uri in replica_uris.split(",")
+                if uri.strip()
+            )
+        }
 
 
 load_dotenv(basedir / ".env_test")
@@ -60,6 +136,10 @@ class ProdConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get("SQLALCHEMY_DATABASE_URI", "").replace(
         "postgres://", "postgresql://"
     )
+    SQLALCHEMY_ENGINE_OPTIONS = Config.engine_options(SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_REPLICAS = Config.replica_binds(
+        os.environ.get("SQLALCHEMY_REPLICA_URIS", "")
+    )
     APP_SECRET_KEY = os.environ.get("APP_SECRET_KEY")
     AUTH0_CLIENT_ID = os.environ.get("AUTH0_CLIENT_ID")
     AUTH0_CLIENT_SECRET = os.environ.get("AUTH0_CLIENT_SECRET")
@@ -5,17 +5,33 @@ from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 
 from config import ProdConfig
+from medical_app.backend.authentication.authentication_decorator import (
+    ResourceProtectorReraiseError,
+)
+from medical_app.backend.json_provider import JSONProvider
+from medical_app.backend.pool_metrics import use_timed_pool
+from medical_app.backend.replicas import ReadReplicas, RoutingSession
+from medical_app.backend.response_cache import ResponseCache
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
+# token validator is registered in create_app, so importing routes needs no network
+require_auth = ResourceProtectorReraiseError()
+response_cache = ResponseCache()
+read_replicas = ReadReplicas()
 
 
 def create_app(config_class=ProdConfig):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.json = JSONProvider(app)
 
+    use_timed_pool(app)
     db.init_app(app)
     migrate.init_app(app, db)
+    require_auth.init_app(app)
+    response_cache.init_app(app)
+    read_replicas.init_app(app)
 
     CORS(app, resources=["https://app.swaggerhub.com/*"])
 
@@ -27,6 +43,10 @@ def create_app(config_class=ProdConfig):
 
     app.register_blueprint(errors_bp)
 
+    from medical_app.backend.stats import bp as stats_bp
+
+    app.register_blueprint(stats_bp)
+
     from medical_app.backend.authentication import bp as auth_bp
 
     oauth = OAuth(app)
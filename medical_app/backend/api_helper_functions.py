@@ -1,17 +1,285 @@
-from typing import Sequence
+import base64
+import hashlib
+import json
+from datetime import date, datetime
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
+from sqlalchemy import DateTime, Integer, Select, select, tuple_
+from werkzeug.exceptions import UnprocessableEntity
 
-def paginate(collection_: Sequence, offset: int = 0, limit: int = 10) -> Sequence:
-    """Return paginated range of collection.
+from medical_app.backend import db
 
-    :param collection_: indexable sequence of objects
-    :param offset: return elements starting from offset index position
-    :param limit: maximum number of elements to return,
-            actual returned number can be lower if there are less elements in collection after offset.
-    :return: collection from offset to offest + limit
+T = TypeVar("T")
+
+
+def paginate_query(
+    query: Select,
+    key_column: Any,
+    offset: int = 0,
+    limit: int = 10,
+    after: Optional[int] = None,
+) -> Tuple[List[Any], Optional[int]]:
+    """Return paginated range of a select statement, sliced inside the database.
+
+    If after is given, keyset pagination is used: only rows with a key greater than after
+    are returned and offset is ignored. Otherwise, offset and limit are pushed down into the query.
+
+    :param query: select statement of one entity or of columns to paginate
+    :param key_column: unique, sortable column the pages are ordered by, e.g. the primary key
+    :param offset: return rows starting from offset position
+    :param limit: maximum number of rows to return
+    :param after: key of the last row of the previous page
+    :return: rows of the requested page and cursor of the next page, None if it is the last page
+    """
+    query = query.order_by(key_column)
+    if after is not None:
+        query = query.where(key_column > after)
+    else:
+        query = query.offset(offset)
+    # fetch one additional row to find out whether there is a next page
+    result = db.session.execute(query.limit(limit + 1))
+    # a select of one entity returns entities, a select of columns rows
+    descriptions = query.column_descriptions
+    is_entity = len(descriptions) == 1 and isinstance(descriptions[0]["expr"], type)
+    rows = result.scalars().all() if is_entity else result.all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = getattr(rows[-1], key_column.key)
+    else:
+        next_cursor = None
+    return rows, next_cursor
+
+
+def keyset_page_query(
+    query: Select,
+    sort_columns: Sequence[Any],
+    descending: bool = False,
+    limit: int = 10,
+    after: Optional[Sequence[Any]] = None,
+) -> Select:
+    """Return select statement of a page ordered by several columns, continuing after a position.
+
+    The page is located with a row value comparison, e.g. (date_diagnosis, id) < (:date, :id),
+    which an index on the sort columns answers without counting the previous rows like offset.
+    Pass the fetched rows to keyset_page to get the page and the position of its last row.
+
+    :param query: select statement of rows containing the sort columns
+    :param sort_columns: non-nullable columns the rows are ordered by, unique in combination
+    :param descending: whether to order descending instead of ascending
+    :param limit: maximum number of rows of the page
+    :param after: values of the sort columns of the last row of the previous page
+    :return: statement fetching the rows of the page and one more
+    """
+    position = tuple_(*sort_columns)
+    if after is not None:
+        bound = tuple_(*after)
+        query = query.where(position < bound if descending else position > bound)
+    query = query.order_by(
+        *(column.desc() if descending else column.asc() for column in sort_columns)
+    )
+    # fetch one additional row to find out whether there is a next page
+    return query.limit(limit + 1)
+
+
+def keyset_page(
+    rows: List[Any], sort_columns: Sequence[Any], limit: int
+) -> Tuple[List[Any], Optional[Tuple[Any, ...]]]:
+    """Return rows of a page fetched by keyset_page_query and position of its last row.
+
+    :param rows: rows returned by the statement of keyset_page_query
+    :param sort_columns: columns the rows are ordered by
+    :param limit: maximum number of rows of the page
+    :return: rows of the page and position of its last row, None if it is the last page
+    """
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, tuple(getattr(rows[-1], column.key) for column in sort_columns)
+    return rows, None
+
+
+def encode_cursor(position: Sequence[Any]) -> str:
+    """Return opaque pagination cursor of a position, see keyset_page.
+
+    :param position: values of the sort columns, datetimes are encoded in iso format
+    :return: url safe cursor
+    """
+    values = [
+        value.isoformat() if isinstance(value, datetime) else value
+        for value in position
+    ]
+    payload = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_columns: Sequence[Any]) -> Tuple[Any, ...]:
+    """Return position encoded in pagination cursor, see encode_cursor.
+
+    :param cursor: cursor as returned by encode_cursor
+    :param sort_columns: integer and datetime columns of the position, to restore their types
+    :raise: ValueError if the cursor is malformed or does not match the columns
+    :return: values of the sort columns
+    """
+    values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    if not isinstance(values, list) or len(values) != len(sort_columns):
+        raise ValueError(f"Cursor does not match {len(sort_columns)} columns")
+    position = []
+    for column, value in zip(sort_columns, values):
+        if isinstance(column.type, DateTime) and isinstance(value, str):
+            position.append(datetime.fromisoformat(value))
+        elif isinstance(column.type, Integer) and type(value) is int:
+            position.append(value)
+        else:
+            raise ValueError(f"Invalid cursor value {value!r} of {column.key}")
+    return tuple(position)
+
+
+def chunked(iterable: Iterable[T], chunk_size: int) -> Iterator[List[T]]:
+    """Split iterable into lists of at most chunk_size elements.
+
+    :param iterable: elements to split
+    :param chunk_size: maximum number of elements per chunk
+    :return: iterator over chunks
+    """
+    chunk: List[T] = []
+    for element in iterable:
+        chunk.append(element)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class UnknownIdsError(UnprocessableEntity):
+    """Ids referenced by a request do not exist, answered with 422 listing them."""
+
+    def __init__(self, ids_key: str, missing_ids: List[int]) -> None:
+        super().__init__(f"Unknown {ids_key} {missing_ids}")
+        self.ids_key = ids_key
+        self.missing_ids = missing_ids
+
+
+def parse_ids(ids: Any, ids_key: str) -> List[int]:
+    """Return ids of a request without duplicates, in their order.
+
+    :param ids: value of ids_key in the request
+    :param ids_key: request key of the ids, e.g. patientIds
+    :raises ValueError: if ids is not an array of integers
+    :return: ids
+    """
+    if not isinstance(ids, list) or not all(
+        isinstance(id_, int) and not isinstance(id_, bool) for id_ in ids
+    ):
+        raise ValueError(f"{ids_key} must be an array of ids")
+    return list(dict.fromkeys(ids))
+
+
+def load_by_ids(
+    model: Type[T], ids: Iterable[int], chunk_size: int = 1000
+) -> Dict[int, T]:
+    """Return existing instances of model with the given ids, one IN query per chunk of ids.
+
+    :param model: model with an integer id column
+    :param ids: ids to load
+    :param chunk_size: maximum number of ids per IN query
+    :return: instances by id
+    """
+    instances: Dict[int, T] = {}
+    for ids_chunk in chunked(set(ids), chunk_size):
+        instances.update(
+            (instance.id, instance)
+            for instance in db.session.scalars(
+                select(model).where(model.id.in_(ids_chunk))
+            )
+        )
+    return instances
+
+
+def resolve_ids(
+    model: Type[T], ids: Any, ids_key: str, chunk_size: int = 1000
+) -> List[T]:
+    """Return instances of model referenced by the ids of a request, see load_by_ids.
+
+    :param model: model with an integer id column
+    :param ids: value of ids_key in the request
+    :param ids_key: request key of the ids, e.g. patientIds
+    :param chunk_size: maximum number of ids per IN query
+    :raises ValueError: if ids is not an array of integers
+    :raises UnknownIdsError: if some of the ids do not exist
+    :return: instances in the order of their ids, without duplicates
+    """
+    ids = parse_ids(ids, ids_key)
+    instances = load_by_ids(model, ids, chunk_size)
+    if missing_ids := [id_ for id_ in ids if id_ not in instances]:
+        raise UnknownIdsError(ids_key, missing_ids)
+    return [instances[id_] for id_ in ids]
+
+
+def resolve_existing_ids(
+    model: Type[Any], ids: Any, ids_key: str, chunk_size: int = 1000
+) -> List[int]:
+    """Return ids of a request after checking they exist, selecting only the id column.
+
+    :param model: model with an integer id column
+    :param ids: value of ids_key in the request
+    :param ids_key: request key of the ids, e.g. patientIds
+    :param chunk_size: maximum number of ids per IN query
+    :raises ValueError: if ids is not an array of integers
+    :raises UnknownIdsError: if some of the ids do not exist
+    :return: ids without duplicates, in their order
+    """
+    ids = parse_ids(ids, ids_key)
+    existing_ids: Set[int] = set()
+    for ids_chunk in chunked(ids, chunk_size):
+        existing_ids.update(
+            db.session.scalars(select(model.id).where(model.id.in_(ids_chunk)))
+        )
+    if missing_ids := [id_ for id_ in ids if id_ not in existing_ids]:
+        raise UnknownIdsError(ids_key, missing_ids)
+    return ids
+
+
+def parse_date(date_str: str) -> datetime:
+    """Parse date string of format YYYY-MM-DD.
+
+    Uses date.fromisoformat, which is implemented in C and much faster than datetime.strptime.
+
+    :param date_str: date string, e.g. 2023-02-14
+    :raise: ValueError if date_str is not a valid date of format YYYY-MM-DD
+    :return: datetime at midnight of the date
+    """
+    if not (
+        isinstance(date_str, str)
+        and len(date_str) == 10
+        and date_str[4] == date_str[7] == "-"
+    ):
+        raise ValueError(f"Invalid date {date_str!r}, expected format YYYY-MM-DD")
+    parsed_date = date.fromisoformat(date_str)
+    return datetime(parsed_date.year, parsed_date.month, parsed_date.day)
+
+
+def make_etag(*parts: Any) -> str:
+    """Return strong entity tag identifying a representation by the given parts.
+
+    The parts are typically ids and version counters of all rows shown in the representation,
+    so the tag can be computed and compared without serializing the response body.
+
+    :param parts: values whose repr determines the tag
+    :return: unquoted entity tag
     """
-    end_index = offset + limit
-    return collection_[offset:end_index]
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
 
 
 def convert_camel_case_to_underscore(camel_case_name: str) -> str:
@@ -0,0 +1,352 @@
+"""Asgi app serving the read endpoints of records with async handlers.
+
+GET requests for the records of a medic, the records of a patient and single records are
+handled by coroutines querying an async engine, asyncpg for postgres and aiosqlite for
+sqlite. A worker thereby keeps serving other requests while it waits for the database. The
+handlers build their statements and serialize rows with the same functions as the flask
+views, so they answer with the same bodies, entity tags and errors, see errors/handlers.py.
+
+All other requests, and requests the async handlers do not match, are passed on to the flask
+app, which asgiref's WsgiToAsgi runs in a thread pool. The async handlers always read from
+the primary, read replicas are only used by the flask app.
+"""
+
+import asyncio
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+from urllib.parse import parse_qsl
+
+from asgiref.wsgi import WsgiToAsgi
+from authlib.oauth2.base import OAuth2Error
+from authlib.oauth2.rfc6749 import HttpRequest
+from flask import Flask
+from sqlalchemy import URL, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from werkzeug.datastructures import Headers, MultiDict
+from werkzeug.exceptions import HTTPException, NotFound, UnprocessableEntity
+from werkzeug.http import parse_etags, quote_etag
+from werkzeug.routing import Map, Rule
+
+from config import ProdConfig
+from medical_app.backend import create_app, require_auth
+from medical_app.backend.api_helper_functions import (
+    encode_cursor,
+    keyset_page,
+    make_etag,
+)
+from medical_app.backend.errors.handlers import error_body
+from medical_app.backend.filters import parse_record_filters, parse_record_sort
+from medical_app.backend.main.routes import (
+    parse_record_page_args,
+    select_record_page_of_medic,
+)
+from medical_app.backend.models import Medic, Patient, Record
+from medical_app.backend.serializers import (
+    parse_fieldsets,
+    select_resources,
+    serialize_record_rows,
+)
+
+# async driver of each database backend
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+# engine options of the flask app which do not apply to the async engine
+SYNC_ONLY_ENGINE_OPTIONS = ("poolclass", "connect_args")
+
+
+class AsyncRequest(NamedTuple):
+    """Parts of an asgi http request used by the async handlers."""
+
+    path: str
+    args: MultiDict
+    headers: Headers
+
+
+# etag of the representation, function building its data and additional top level keys
+HandlerResult = Tuple[str, Callable[[], Any], Dict[str, Any]]
+Handler = Callable[..., Awaitable[HandlerResult]]
+
+
+def async_database_url(database_uri: str) -> URL:
+    """Return url of database_uri using the async driver of its backend.
+
+    :param database_uri: sqlalchemy url of the flask app
+    :raise: ValueError if the backend has no supported async driver
+    :return: url for create_async_engine
+    """
+    url = make_url(database_uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver for {backend} databases")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+def create_async_engine_from_config(config: Mapping[str, Any]) -> AsyncEngine:
+    """Create async engine of the database of the flask app, with the same pool options.
+
+    :param config: flask app config
+    :return: async engine
+    """
+    url = async_database_url(config["SQLALCHEMY_DATABASE_URI"])
+    options = {
+        key: value
+        for key, value in config.get("SQLALCHEMY_ENGINE_OPTIONS", {}).items()
+        if key not in SYNC_ONLY_ENGINE_OPTIONS
+    }
+    # aiosqlite defaults to NullPool, which takes no pool options
+    if "pool_size" in options:
+        options["poolclass"] = AsyncAdaptedQueuePool
+    # asyncpg takes server settings instead of libpq options
+    if config.get("DB_STATEMENT_TIMEOUT_MS") and url.get_backend_name() == "postgresql":
+        options["connect_args"] = {
+            "server_settings": {
+                "statement_timeout": str(config["DB_STATEMENT_TIMEOUT_MS"])
+            }
+        }
+    return create_async_engine(url, **options)
+
+
+async def get_records_of_medic(
+    connection: AsyncConnection, request: AsyncRequest, medic_id: int
+) -> HandlerResult:
+    """Get records across all patients of a medic, see main.routes.get_records_of_medic.
+
+    :param connection: connection of the async engine
+    :param request: request
+    :param medic_id: id of medic
+    :return: result of the handler
+    """
+    try:
+        page_args = parse_record_page_args(request.args)
+    except ValueError:
+        raise UnprocessableEntity()
+    if not await connection.scalar(select(Medic.id).where(Medic.id == medic_id)):
+        raise NotFound()
+
+    result = await connection.execute(select_record_page_of_medic(medic_id, page_args))
+    rows, next_position = keyset_page(
+        result.all(), page_args.sort_columns, page_args.limit
+    )
+    next_cursor = encode_cursor(next_position) if next_position else None
+    records, etags = serialize_record_rows(rows, page_args.fieldsets)
+    return make_etag(*etags, next_cursor), lambda: records, {"next": next_cursor}
+
+
+async def get_records_of_one_patient(
+    connection: AsyncConnection, request: AsyncRequest, patient_id: int
+) -> HandlerResult:
+    """Get records of a patient, see main.routes.get_records_of_one_patient.
+
+    :param connection: connection of the async engine
+    :param request: request
+    :param patient_id: id of patient
+    :return: result of the handler
+    """
+    offset = request.args.get("offset", 0, type=int)
+    limit = request.args.get("limit", 10, type=int)
+    if offset < 0 or limit < 1:
+        raise UnprocessableEntity()
+    try:
+        fieldsets = parse_fieldsets(request.args, "records")
+        filters = parse_record_filters(request.args)
+        order_by = parse_record_sort(request.args)
+    except ValueError:
+        raise UnprocessableEntity()
+    if not await connection.scalar(select(Patient.id).where(Patient.id == patient_id)):
+        raise NotFound()
+
+    result = await connection.execute(
+        select_resources("records", fieldsets)
+        .where(Record.patient_id == patient_id, *filters)
+        .order_by(*order_by)
+        .offset(offset)
+        .limit(limit)
+    )
+    records, etags = serialize_record_rows(result.all(), fieldsets)
+    return make_etag(*etags), lambda: records, {}
+
+
+async def get_record(
+    connection: AsyncConnection, request: AsyncRequest, patient_id: int, record_id: int
+) -> HandlerResult:
+    """Get record of specific patient, see main.routes.get_record.
+
+    :param connection: connection of the async engine
+    :param request: request
+    :param patient_id: id of patient
+    :param record_id: id of record
+    :return: result of the handler
+    """
+    try:
+        fieldsets = parse_fieldsets(request.args, "records")
+    except ValueError:
+        raise UnprocessableEntity()
+    result = await connection.execute(
+        select_resources("records", fieldsets).where(
+            Record.patient_id == patient_id, Record.id == record_id
+        )
+    )
+    row = result.one_or_none()
+    if not row:
+        raise NotFound()
+    records, etags = serialize_record_rows([row], fieldsets)
+    return etags[0], lambda: records[0], {}
+
+
+# url rules of the async handlers with the scopes they require, like require_auth
+ROUTES: List[Tuple[str, Handler, Optional[List[str]]]] = [
+    ("/medics/<int:medic_id>/records", get_records_of_medic, ["get:records"]),
+    ("/patients/<int:patient_id>/records", get_records_of_one_patient, ["get:records"]),
+    (
+        "/patients/<int:patient_id>/records/<int:record_id>",
+        get_record,
+        ["get:records"],
+    ),
+]
+
+
+class AsyncAPI:
+    """Asgi app answering GET requests of ROUTES itself, everything else with the flask app."""
+
+    def __init__(self, flask_app: Flask, engine: Optional[AsyncEngine] = None) -> None:
+        """Wrap flask app.
+
+        :param flask_app: flask app, see create_app
+        :param engine: async engine, by default created from the config of flask_app
+        """
+        self.flask_app = flask_app
+        self.wsgi_app = WsgiToAsgi(flask_app)
+        self.engine = engine or create_async_engine_from_config(flask_app.config)
+        self.url_adapter = Map(
+            [Rule(rule, endpoint=handler) for rule, handler, _ in ROUTES]
+        ).bind("localhost")
+        self.scopes = {handler: scopes for _, handler, scopes in ROUTES}
+
+    async def __call__(
+        self, scope: Dict[str, Any], receive: Callable, send: Callable
+    ) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] == "http" and scope["method"] == "GET":
+            try:
+                handler, view_args = self.url_adapter.match(scope["path"], "GET")
+            except HTTPException:
+                # e.g. redirects to add a trailing slash are left to flask
+                pass
+            else:
+                await self._handle(scope, send, handler, view_args)
+                return
+        await self.wsgi_app(scope, receive, send)
+
+    async def _handle(
+        self,
+        scope: Dict[str, Any],
+        send: Callable,
+        handler: Handler,
+        view_args: Dict[str, Any],
+    ) -> None:
+        request = AsyncRequest(
+            scope["path"],
+            MultiDict(
+                parse_qsl(
+                    scope["query_string"].decode("latin-1"), keep_blank_values=True
+                )
+            ),
+            Headers(
+                [
+                    (key.decode("latin-1"), value.decode("latin-1"))
+                    for key, value in scope["headers"]
+                ]
+            ),
+        )
+        try:
+            await asyncio.to_thread(self._authenticate, request, self.scopes[handler])
+            async with self.engine.connect() as connection:
+                etag, build_data, extra = await handler(
+                    connection, request, **view_args
+                )
+        except OAuth2Error as error:
+            await self._send_json(
+                send,
+                error.status_code,
+                error_body(error.status_code, error.description),
+            )
+        except HTTPException as error:
+            await self._send_json(send, error.code, error_body(error.code))
+        except Exception:
+            self.flask_app.logger.exception("Exception on %s [GET]", request.path)
+            await self._send_json(send, 500, error_body(500))
+        else:
+            if parse_etags(request.headers.get("If-None-Match")).contains(etag):
+                await self._send(send, 304, b"", [(b"etag", quote_etag(etag).encode())])
+            else:
+                await self._send_json(
+                    send,
+                    200,
+                    {"status": "success", "data": build_data(), **extra},
+                    [(b"etag", quote_etag(etag).encode())],
+                )
+
+    def _authenticate(self, request: AsyncRequest, scopes: Optional[List[str]]) -> None:
+        # tokens are verified like by require_auth, in a thread as keys may be fetched
+        with self.flask_app.app_context():
+            require_auth.validate_request(
+                scopes, HttpRequest("GET", request.path, None, request.headers)
+            )
+
+    async def _send_json(
+        self,
+        send: Callable,
+        status: int,
+        body: Dict[str, Any],
+        headers: Optional[List[Tuple[bytes, bytes]]] = None,
+    ) -> None:
+        await self._send(
+            send,
+            status,
+            self.flask_app.json.dumps(body).encode(),
+            [(b"content-type", b"application/json"), *(headers or [])],
+        )
+
+    @staticmethod
+    async def _send(
+        send: Callable, status: int, body: bytes, headers: List[Tuple[bytes, bytes]]
+    ) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [*headers, (b"content-length", str(len(body)).encode())],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    async def _lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def create_asgi_app(config_class=ProdConfig) -> AsyncAPI:
+    """Create asgi app serving the flask app of config_class.
+
+    :param config_class: config of the flask app
+    :return: asgi app
+    """
+    return AsyncAPI(create_app(config_class))
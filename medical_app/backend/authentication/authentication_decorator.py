@@ -1,25 +1,135 @@
-import json
-from urllib.request import urlopen
+import logging
+from typing import Any, Mapping, Optional
 
 from authlib.integrations.flask_oauth2 import ResourceProtector
-from authlib.jose.rfc7517.jwk import JsonWebKey
+from authlib.jose.errors import DecodeError
+from authlib.oauth2.rfc6749.errors import UnsupportedTokenTypeError
 from authlib.oauth2.rfc7523 import JWTBearerTokenValidator
+from flask import Flask, current_app
+
+from medical_app.backend.authentication.jwks_cache import JWKSCache
+from medical_app.backend.authentication.key_sources import (
+    URLKeySource,
+    key_source_from_uri,
+)
+from medical_app.backend.authentication.token_cache import VerifiedTokenCache
+
+logger = logging.getLogger(__name__)
 
 
 class Auth0JWTBearerTokenValidator(JWTBearerTokenValidator):
-    def __init__(self, domain, audience):
+    def __init__(
+        self,
+        domain,
+        audience,
+        jwks_cache: Optional[JWKSCache] = None,
+        token_cache: Optional[VerifiedTokenCache] = None,
+    ):
         issuer = f"https://{domain}/"
-        jsonurl = urlopen(f"{issuer}.well-known/jwks.json")
-        public_key = JsonWebKey.import_key_set(json.loads(jsonurl.read()))
-        super(Auth0JWTBearerTokenValidator, self).__init__(public_key)
+        if jwks_cache is None:
+            jwks_cache = JWKSCache(URLKeySource(f"{issuer}.well-known/jwks.json"))
+        self.jwks_cache = jwks_cache
+        self.token_cache = token_cache
+        # keys are resolved per token, so no key set is fetched on construction
+        super(Auth0JWTBearerTokenValidator, self).__init__(self.resolve_key)
         self.claims_options = {
             "exp": {"essential": True},
             "aud": {"essential": True, "value": audience},
             "iss": {"essential": True, "value": issuer},
         }
 
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "Auth0JWTBearerTokenValidator":
+        """Create validator from flask app config, without any network io.
+
+        :param config: app config
+        :return: validator
+        """
+        jwks_source = (
+            config.get("JWKS_SOURCE")
+            or f"https://{config['AUTH0_DOMAIN']}/.well-known/jwks.json"
+        )
+        token_cache_size = config.get("TOKEN_CACHE_SIZE", 0)
+        return cls(
+            domain=config["AUTH0_DOMAIN"],
+            audience=config["API_AUDIENCE"],
+            jwks_cache=JWKSCache(
+                key_source_from_uri(jwks_source),
+                ttl=config.get("JWKS_CACHE_TTL", 3600),
+                snapshot_path=config.get("JWKS_SNAPSHOT_PATH"),
+            ),
+            token_cache=(
+                VerifiedTokenCache(maxsize=token_cache_size)
+                if token_cache_size
+                else None
+            ),
+        )
+
+    def resolve_key(self, header: dict, payload: bytes):
+        """Return public key matching the kid in the token header.
+
+        :param header: jws header of the token
+        :param payload: jws payload of the token
+        :raise: DecodeError if the key set has no matching key or can not be fetched,
+            which rejects the token
+        :return: key to verify the token signature with
+        """
+        try:
+            return self.jwks_cache.get_key(header.get("kid"))
+        except ValueError:
+            raise DecodeError(description="No json web key matches the token kid")
+        except OSError:
+            # e.g. the provider is unreachable while a made up kid forces a refresh
+            logger.exception("Fetching json web key set failed, rejecting token.")
+            raise DecodeError(description="Json web key set is not available")
+
+    def authenticate_token(self, token_string: str):
+        """Return claims of token, verify its signature only if not cached yet.
+
+        :param token_string: raw bearer token
+        :return: claims or None if the token is invalid
+        """
+        if self.token_cache is None:
+            return super().authenticate_token(token_string)
+
+        claims = self.token_cache.get(token_string)
+        if claims is None:
+            claims = super().authenticate_token(token_string)
+            if claims is not None:
+                self.token_cache.put(token_string, claims)
+        return claims
+
 
 class ResourceProtectorReraiseError(ResourceProtector):
+    """Resource protector whose token validator is registered per flask app.
+
+    The decorator is created at import time, the validator is created in create_app
+    via init_app, so importing the routes does no network io.
+    """
+
+    def init_app(
+        self, app: Flask, validator: Optional[JWTBearerTokenValidator] = None
+    ) -> None:
+        """Register token validator of the app.
+
+        :param app: flask app
+        :param validator: token validator, by default built from the app config
+        """
+        if validator is None:
+            validator = Auth0JWTBearerTokenValidator.from_config(app.config)
+        app.extensions["token_validator"] = validator
+        self._default_realm = validator.realm
+        self._default_auth_type = validator.TOKEN_TYPE
+
+    def get_token_validator(self, token_type):
+        """Return token validator of the current app for the given token type."""
+        validator = current_app.extensions["token_validator"]
+        if validator.TOKEN_TYPE != token_type.lower():
+            raise UnsupportedTokenTypeError(
+                self._default_auth_type, self._default_realm
+            )
+        return validator
+
     def raise_error_response(self, error):
         """Raise HTTPException for OAuth2Error. Developers can re-implement
         this method to customize the error response.
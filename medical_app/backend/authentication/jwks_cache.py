@@ -0,0 +1,137 @@
+import json
+import logging
+import os
+import pathlib
+import threading
+import time
+from typing import Optional, Union
+
+from authlib.jose.rfc7517.jwk import JsonWebKey
+from authlib.jose.rfc7517.key_set import KeySet
+
+from medical_app.backend.authentication.key_sources import KeySource
+
+logger = logging.getLogger(__name__)
+
+
+class JWKSCache:
+    """Cache of the json web key set published by the identity provider.
+
+    Nothing is fetched on construction. The key set is loaded on first use, either from
+    the on-disk snapshot or from the key source. Afterwards, keys are served from memory:
+
+    * once the key set is older than ttl, it is refreshed in a background thread,
+      while the stale keys keep being served
+    * an unknown kid triggers an immediate refresh, as the provider may have rotated its keys,
+      at most once per min_refresh_interval
+    * concurrent refreshes are collapsed into one fetch (single flight)
+    """
+
+    def __init__(
+        self,
+        key_source: KeySource,
+        ttl: float = 3600,
+        min_refresh_interval: float = 60,
+        snapshot_path: Optional[Union[str, pathlib.Path]] = None,
+    ) -> None:
+        """Initialize cache without fetching anything.
+
+        :param key_source: source of the json web key set, e.g. the jwks url of the provider
+        :param ttl: seconds after which the key set is refreshed in the background
+        :param min_refresh_interval: minimal seconds between two refreshes triggered by unknown kids
+        :param snapshot_path: optional file to persist the key set to and boot from
+        """
+        self.key_source = key_source
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.snapshot_path = pathlib.Path(snapshot_path) if snapshot_path else None
+
+        self._key_set: Optional[KeySet] = None
+        self._fetched_at: float = 0.0
+        self._refresh_lock = threading.Lock()
+        self._background_refresh: Optional[threading.Thread] = None
+
+    def get_key(self, kid: str):
+        """Return key matching the kid, refresh the key set if the kid is unknown.
+
+        :param kid: key id from the header of the jwt
+        :raise: ValueError if no key matches the kid even after refreshing
+        :return: key to verify the signature with
+        """
+        try:
+            return self.get_key_set().find_by_kid(kid)
+        except ValueError:
+            if time.time() - self._fetched_at < self.min_refresh_interval:
+                raise
+            logger.info("Unknown kid %s, refreshing json web key set.", kid)
+            return self.refresh().find_by_kid(kid)
+
+    def get_key_set(self) -> KeySet:
+        """Return cached key set, load it if not yet done and refresh it in the background if stale.
+
+        :return: key set of the identity provider
+        """
+        if self._key_set is None:
+            with self._refresh_lock:
+                if self._key_set is None and not self._load_snapshot():
+                    self._fetch()
+        elif time.time() - self._fetched_at > self.ttl:
+            self._refresh_in_background()
+        return self._key_set
+
+    def refresh(self) -> KeySet:
+        """Fetch the key set from the key source.
+
+        If another thread is already fetching, wait for its result instead of fetching again.
+
+        :return: refreshed key set
+        """
+        requested_at = time.time()
+        with self._refresh_lock:
+            if self._key_set is None or self._fetched_at < requested_at:
+                self._fetch()
+        return self._key_set
+
+    def _refresh_in_background(self) -> None:
+        if self._background_refresh and self._background_refresh.is_alive():
+            return
+        self._background_refresh = threading.Thread(
+            target=self._refresh_keeping_stale_keys, daemon=True
+        )
+        self._background_refresh.start()
+
+    def _refresh_keeping_stale_keys(self) -> None:
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Refreshing json web key set failed, keeping stale keys.")
+
+    def _fetch(self) -> None:
+        jwks = self.key_source.load()
+        self._key_set = JsonWebKey.import_key_set(jwks)
+        self._fetched_at = time.time()
+        self._write_snapshot(jwks)
+
+    def _load_snapshot(self) -> bool:
+        if not (self.snapshot_path and self.snapshot_path.is_file()):
+            return False
+        try:
+            jwks = json.loads(self.snapshot_path.read_text())
+            self._key_set = JsonWebKey.import_key_set(jwks)
+        except ValueError:
+            logger.warning("Ignoring invalid jwks snapshot %s.", self.snapshot_path)
+            return False
+        # a snapshot is as old as the last fetch that wrote it
+        self._fetched_at = self.snapshot_path.stat().st_mtime
+        return True
+
+    def _write_snapshot(self, jwks: dict) -> None:
+        if not self.snapshot_path:
+            return
+        try:
+            tmp_path = self.snapshot_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(jwks))
+            # atomic, so that concurrently booting workers never read a partial file
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError:
+            logger.warning("Could not write jwks snapshot %s.", self.snapshot_path)
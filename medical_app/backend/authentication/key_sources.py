@@ -0,0 +1,71 @@
+"""Sources a json web key set can be loaded from.
+
+A source is selected with a single uri-like setting (see :func:`key_source_from_uri`):
+
+* ``https://medical-app.eu.auth0.com/.well-known/jwks.json`` -- fetch from the identity provider
+* ``file:///etc/medical-app/jwks.json`` -- read from a file, e.g. a mounted secret
+* ``env:AUTH0_JWKS`` -- read from an environment variable
+"""
+
+import json
+import os
+import pathlib
+from abc import ABC, abstractmethod
+from typing import Any, Dict
+from urllib.parse import unquote, urlparse
+from urllib.request import urlopen
+
+
+class KeySource(ABC):
+    @abstractmethod
+    def load(self) -> Dict[str, Any]:
+        """Return json web key set as dict.
+
+        :raise: OSError if the source is not reachable, ValueError if it holds invalid json
+        """
+
+
+class URLKeySource(KeySource):
+    def __init__(self, url: str, timeout: float = 5) -> None:
+        self.url = url
+        self.timeout = timeout
+
+    def load(self) -> Dict[str, Any]:
+        with urlopen(self.url, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+
+class FileKeySource(KeySource):
+    def __init__(self, path: str) -> None:
+        self.path = pathlib.Path(path)
+
+    def load(self) -> Dict[str, Any]:
+        return json.loads(self.path.read_text())
+
+
+class EnvKeySource(KeySource):
+    def __init__(self, variable_name: str) -> None:
+        self.variable_name = variable_name
+
+    def load(self) -> Dict[str, Any]:
+        try:
+            return json.loads(os.environ[self.variable_name])
+        except KeyError:
+            raise OSError(f"Environment variable {self.variable_name} is not set")
+
+
+def key_source_from_uri(uri: str) -> KeySource:
+    """Return key source for a uri of scheme http(s), file or env.
+
+    :param uri: location of the json web key set
+    :raise: ValueError for unsupported schemes
+    :return: key source
+    """
+    parsed_uri = urlparse(uri)
+    if parsed_uri.scheme in ("http", "https"):
+        return URLKeySource(uri)
+    elif parsed_uri.scheme == "file":
+        return FileKeySource(unquote(parsed_uri.path))
+    elif parsed_uri.scheme == "env":
+        return EnvKeySource(parsed_uri.path)
+    raise ValueError(f"Unsupported json web key set source {uri}")
@@ -0,0 +1,72 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from authlib.oauth2.rfc7523 import JWTBearerToken
+
+
+class VerifiedTokenCache:
+    """Bounded LRU cache of claims of tokens whose signature was already verified.
+
+    Entries are keyed by the sha256 hash of the token, so no bearer token is kept in memory,
+    and they are dropped once the token expires. A cached token stays valid until its exp,
+    even if the signing key is rotated in the meantime.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        """Initialize empty cache.
+
+        :param maxsize: maximal number of cached tokens, least recently used ones are evicted first
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, Tuple[float, JWTBearerToken]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _hash(token_string: str) -> str:
+        return hashlib.sha256(token_string.encode()).hexdigest()
+
+    def get(self, token_string: str) -> Optional[JWTBearerToken]:
+        """Return verified claims of token, if cached and not yet expired.
+
+        :param token_string: raw bearer token
+        :return: claims or None on cache miss
+        """
+        token_hash = self._hash(token_string)
+        with self._lock:
+            entry = self._entries.get(token_hash)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[token_hash]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token_hash)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, token_string: str, claims: JWTBearerToken) -> None:
+        """Cache verified claims of token until it expires.
+
+        :param token_string: raw bearer token
+        :param claims: claims of the token, must contain exp
+        """
+        token_hash = self._hash(token_string)
+        with self._lock:
+            self._entries[token_hash] = (claims["exp"], claims)
+            self._entries.move_to_end(token_hash)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    @property
+    def hit_ratio(self) -> float:
+        """Share of lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,61 +1,63 @@
 # from oauthlib.oauthlib.oauth2.rfc6749.errors import OAuth2Error
+from typing import Any, Dict, Optional
+
 from authlib.oauth2.base import OAuth2Error
 from flask import jsonify
 
+from medical_app.backend.api_helper_functions import UnknownIdsError
 from medical_app.backend.errors import bp
 
+ERROR_MESSAGES = {
+    404: "Resource not found",
+    412: "Precondition Failed",
+    422: "Unprocessable Entity",
+    500: "Internal Server Error",
+}
+
+
+def error_body(code: int, message: Optional[str] = None) -> Dict[str, Any]:
+    """Return json body of error responses, shared by the wsgi and asgi app.
+
+    :param code: http status code
+    :param message: human readable message, by default the one of the status code
+    :return: error body
+    """
+    return {"status": "error", "code": code, "message": message or ERROR_MESSAGES[code]}
+
 
 @bp.app_errorhandler(OAuth2Error)
 def not_allowed_app(error: OAuth2Error):
     return (
-        jsonify(
-            {
-                "status": "error",
-                "code": error.status_code,
-                "message": error.description,
-            }
-        ),
+        jsonify(error_body(error.status_code, error.description)),
         error.status_code,
     )
 
 
 @bp.app_errorhandler(404)
 def resource_not_found(error):
-    return (
-        jsonify(
-            {
-                "status": "error",
-                "code": 404,
-                "message": "Resource not found",
-            }
-        ),
-        404,
-    )
+    return jsonify(error_body(404)), 404
 
 
 @bp.errorhandler(404)
 def route_invalid(error):
-    return (
-        jsonify(
-            {
-                "status": "error",
-                "code": 404,
-                "message": "Resource not found",
-            }
-        ),
-        404,
-    )
+    return jsonify(error_body(404)), 404
+
+
+@bp.app_errorhandler(412)
+def precondition_failed(error):
+    return jsonify(error_body(412)), 412
 
 
 @bp.app_errorhandler(422)
 def unprocessable_entity(error):
+    return jsonify(error_body(422)), 422
+
+
+@bp.app_errorhandler(UnknownIdsError)
+def unknown_ids(error: UnknownIdsError):
     return (
         jsonify(
-            {
-                "status": "error",
-                "code": 422,
-                "message": "Unprocessable Entity",
-            }
+            {**error_body(422, error.description), "missingIds": error.missing_ids}
         ),
         422,
     )
@@ -63,13 +65,4 @@ def unprocessable_entity(error):
 
 @bp.app_errorhandler(500)
 def internal_server_error(error):
-    return (
-        jsonify(
-            {
-                "status": "error",
-                "code": 500,
-                "message": "Internal Server Error",
-            }
-        ),
-        500,
-    )
+    return jsonify(error_body(500)), 500
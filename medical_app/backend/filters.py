@@ -0,0 +1,147 @@
+"""Filter and sort query args of record lists, compiled to sql predicates and orderings.
+
+Only whitelisted columns can be filtered and sorted by. The date filters and sort keys are
+backed by indexes on (patient_id, <date column>, id), so a page of a long record history is
+read from the index instead of sorting all records of the patient:
+
+* ``filter[date_diagnosis][gte]=2023-01-01`` -- range of a date column, with the operators
+  gt, gte, lt and lte. ``filter[date_diagnosis]=2023-01-01`` matches the whole day.
+* ``filter[ongoing]=true`` -- records without symptom offset, false for the others
+* ``filter[title]=flu`` -- case insensitive substring of the title
+* ``sort=-date_diagnosis,title`` -- comma separated sort keys, descending if prefixed by ``-``.
+  Ties are broken by id, ongoing records sort as if their symptom offset was the latest.
+
+Keyset paginated lists accept a single sort key only, see parse_record_keyset_sort.
+"""
+
+import operator
+import re
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Mapping, Tuple
+
+from sqlalchemy import ColumnElement
+
+from medical_app.backend.api_helper_functions import parse_date
+from medical_app.backend.models import Record
+
+RECORD_DATE_COLUMNS: Dict[str, Any] = {
+    "date_diagnosis": Record.date_diagnosis,
+    "date_symptom_onset": Record.date_symptom_onset,
+    "date_symptom_offset": Record.date_symptom_offset,
+}
+RECORD_SORT_COLUMNS: Dict[str, Any] = {
+    "id": Record.id,
+    "title": Record.title,
+    **RECORD_DATE_COLUMNS,
+}
+RECORD_KEYSET_SORT_KEYS = ("id", "date_diagnosis", "date_symptom_onset")
+RANGE_OPERATORS: Dict[str, Callable[[Any, Any], ColumnElement]] = {
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+BOOLEAN_VALUES = {"true": True, "false": False}
+
+FILTER_ARG_PATTERN = re.compile(r"filter\[(\w+)\](?:\[(\w+)\])?")
+
+
+def _parse_boolean(value: str) -> bool:
+    try:
+        return BOOLEAN_VALUES[value.lower()]
+    except KeyError:
+        raise ValueError(f"Invalid boolean {value!r}, expected true or false")
+
+
+def parse_record_filters(args: Mapping[str, str]) -> List[ColumnElement]:
+    """Parse filter query args of a record list into where clauses.
+
+    :param args: query args of the request
+    :raise: ValueError for unknown filters, operators or invalid values
+    :return: where clauses, all of which have to hold
+    """
+    clauses: List[ColumnElement] = []
+    for key, value in args.items():
+        if not key.startswith("filter"):
+            continue
+        match = FILTER_ARG_PATTERN.fullmatch(key)
+        if not match:
+            raise ValueError(f"Invalid filter {key}")
+        name, operator_name = match.groups()
+
+        if name in RECORD_DATE_COLUMNS:
+            column = RECORD_DATE_COLUMNS[name]
+            date = parse_date(value)
+            if operator_name is None:
+                clauses += [column >= date, column < date + timedelta(days=1)]
+            elif operator_name in RANGE_OPERATORS:
+                clauses.append(RANGE_OPERATORS[operator_name](column, date))
+            else:
+                raise ValueError(f"Unknown operator {operator_name} of {name}")
+        elif operator_name is not None:
+            raise ValueError(f"Filter {name} does not support operators")
+        elif name == "ongoing":
+            clauses.append(
+                Record.date_symptom_offset.is_(None)
+                if _parse_boolean(value)
+                else Record.date_symptom_offset.is_not(None)
+            )
+        elif name == "title":
+            clauses.append(Record.title.icontains(value, autoescape=True))
+        else:
+            raise ValueError(f"Unknown filter {name}")
+    return clauses
+
+
+def parse_record_sort(args: Mapping[str, str]) -> List[ColumnElement]:
+    """Parse sort query arg of a record list into an ordering, by id if it is missing.
+
+    :param args: query args of the request
+    :raise: ValueError for unknown or repeated sort keys
+    :return: order by clauses ending with id, so pages are stable
+    """
+    keys = [key for key in args.get("sort", "").split(",") if key]
+    names = [key[1:] if key.startswith("-") else key for key in keys]
+    if unknown := set(names) - RECORD_SORT_COLUMNS.keys():
+        raise ValueError(f"Unknown sort keys {sorted(unknown)}")
+    if len(set(names)) < len(names):
+        raise ValueError("Repeated sort keys")
+
+    order_by = []
+    for key, name in zip(keys, names):
+        column = RECORD_SORT_COLUMNS[name]
+        if key.startswith("-"):
+            clause = column.desc()
+            # ongoing records sort as the latest offsets, on postgres and sqlite alike
+            clause = clause.nulls_first() if column.expression.nullable else clause
+        else:
+            clause = column.asc()
+            clause = clause.nulls_last() if column.expression.nullable else clause
+        order_by.append(clause)
+    if "id" not in names:
+        order_by.append(Record.id.asc())
+    return order_by
+
+
+def parse_record_keyset_sort(
+    args: Mapping[str, str], default: str = "-date_diagnosis"
+) -> Tuple[List[Any], bool]:
+    """Parse sort query arg of a keyset paginated record list, see keyset_page.
+
+    Keyset pagination needs non-nullable sort columns, so only one of RECORD_KEYSET_SORT_KEYS
+    is accepted, with ties broken by id in the same direction.
+
+    :param args: query args of the request
+    :param default: sort key if the query arg is missing
+    :raise: ValueError for other sort keys
+    :return: sort columns and whether they are sorted descending
+    """
+    key = args.get("sort", default)
+    name = key[1:] if key.startswith("-") else key
+    if name not in RECORD_KEYSET_SORT_KEYS:
+        raise ValueError(
+            f"Unknown sort key {key}, expected one of {RECORD_KEYSET_SORT_KEYS}"
+        )
+    column = RECORD_SORT_COLUMNS[name]
+    sort_columns = [column] if name == "id" else [column, Record.id]
+    return sort_columns, key.startswith("-")
@@ -0,0 +1,106 @@
+"""Json provider of the app, serializing with orjson if it is installed.
+
+Responses decode to the same data as those of flask's default provider, only produced faster:
+keys are sorted, output is compact outside debug mode, and dates are formatted as
+http dates, e.g. ``Thu, 01 Dec 2022 00:00:00 GMT``. Non-ascii characters are sent as utf-8
+instead of escape sequences. Without orjson, the stdlib json module is used and only
+the date formatting is sped up.
+"""
+
+import functools
+from datetime import date, datetime, timezone
+from typing import Any, Union
+
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+MONTHS = (
+    "Jan",
+    "Feb",
+    "Mar",
+    "Apr",
+    "May",
+    "Jun",
+    "Jul",
+    "Aug",
+    "Sep",
+    "Oct",
+    "Nov",
+    "Dec",
+)
+
+
+# records share few distinct dates (16384 days are ~45 years), so most are formatted only once
+@functools.lru_cache(maxsize=16384)
+def format_http_date(value: date) -> str:
+    """Format date or datetime as http date, like werkzeug.http.http_date but much faster.
+
+    Naive datetimes are taken as utc, like werkzeug does.
+
+    :param value: date or datetime
+    :return: http date, e.g. Thu, 01 Dec 2022 00:00:00 GMT
+    """
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        hour, minute, second = value.hour, value.minute, value.second
+    else:
+        hour = minute = second = 0
+    return (
+        f"{WEEKDAYS[value.weekday()]}, {value.day:02d} {MONTHS[value.month - 1]} "
+        f"{value.year:04d} {hour:02d}:{minute:02d}:{second:02d} GMT"
+    )
+
+
+def _default(o: Any) -> Any:
+    if isinstance(o, date):
+        return format_http_date(o)
+    return DefaultJSONProvider.default(o)
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's default provider with faster date formatting, used if orjson is not installed."""
+
+    default = staticmethod(_default)
+
+
+class OrjsonJSONProvider(StdlibJSONProvider):
+    # dates are passed to default to keep the http date format of flask instead of iso 8601
+    options = (
+        orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS
+        if orjson is not None
+        else 0
+    )
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        # stdlib specific arguments like indent are only supported by the fallback
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self.options).decode()
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        if self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        # serialize straight to bytes, skipping the round trip through str
+        return self._app.response_class(
+            orjson.dumps(
+                self._prepare_response_obj(args, kwargs),
+                default=self.default,
+                option=self.options | orjson.OPT_APPEND_NEWLINE,
+            ),
+            mimetype=self.mimetype,
+        )
+
+
+JSONProvider = OrjsonJSONProvider if orjson is not None else StdlibJSONProvider
@@ -1,91 +1,324 @@
+import csv
+import io
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+)
 
-from flask import Response, abort, current_app, jsonify, request
+from flask import (
+    Response,
+    abort,
+    current_app,
+    jsonify,
+    request,
+    stream_with_context,
+)
+from sqlalchemy import ColumnElement, Select, select
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm.exc import StaleDataError
+from werkzeug.datastructures import MultiDict
 
-from config import Config
-from medical_app.backend import db
+from medical_app.backend import db, require_auth, response_cache
 from medical_app.backend.api_helper_functions import (
+    UnknownIdsError,
+    chunked,
     convert_camel_case_to_underscore,
-    paginate,
+    decode_cursor,
+    encode_cursor,
+    keyset_page,
+    keyset_page_query,
+    load_by_ids,
+    make_etag,
+    paginate_query,
+    parse_date,
+    parse_ids,
+    resolve_existing_ids,
+    resolve_ids,
 )
-from medical_app.backend.authentication.authentication_decorator import (
-    Auth0JWTBearerTokenValidator,
-    ResourceProtectorReraiseError,
+from medical_app.backend.filters import (
+    parse_record_filters,
+    parse_record_keyset_sort,
+    parse_record_sort,
 )
 from medical_app.backend.main import bp
-from medical_app.backend.models import Medic, Patient, Record
-
-# instantiate require auth decorator
-require_auth = ResourceProtectorReraiseError()
-validator = Auth0JWTBearerTokenValidator(
-    domain=Config.AUTH0_DOMAIN, audience=Config.API_AUDIENCE
+from medical_app.backend.models import (
+    Medic,
+    Patient,
+    Record,
+    User,
+    association_table,
+)
+from medical_app.backend.pool_metrics import pool_metrics
+from medical_app.backend.search import match_records, parse_search_terms
+from medical_app.backend.serializers import (
+    Fieldsets,
+    parse_fieldsets,
+    select_resources,
+    serialize_medic_rows,
+    serialize_patient_rows,
+    serialize_record_rows,
 )
-require_auth.register_token_validator(validator)
+
+# maximal number of invalid lines reported in detail by the streaming ingestion endpoint
+MAX_REPORTED_ERRORS = 100
+# response cache tag of all pages of the medics collection
+MEDICS_TAG = "medics"
+EXPORT_MIMETYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_CSV_COLUMNS = [
+    "id",
+    "title",
+    "description",
+    "date_diagnosis",
+    "date_symptom_onset",
+    "date_symptom_offset",
+    "patient_id",
+]
+
+
+def medic_tag(medic_id: int) -> str:
+    """Return response cache tag of all responses containing the medic.
+
+    :param medic_id: id of medic
+    :return: cache tag
+    """
+    return f"medic:{medic_id}"
+
+
+def conditional_json(
+    etag: str, build_data: Callable[[], Any], **extra: Any
+) -> Response:
+    """Return success response tagged with etag, or 304 if the client has this representation.
+
+    The data is only built, i.e. serialized, if it has to be sent.
+
+    :param etag: entity tag of the representation
+    :param build_data: function returning the data of the response
+    :param extra: additional top level keys of the response, e.g. next
+    :return: flask response
+    """
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify({"status": "success", "data": build_data(), **extra})
+    response.set_etag(etag)
+    return response
+
+
+def request_fieldsets(resource_type: str) -> Fieldsets:
+    """Return sparse fieldsets requested by the fields and include query args.
+
+    :param resource_type: type of the requested resources, medics, patients or records
+    :return: requested fieldsets, aborts with 422 if they are invalid
+    """
+    try:
+        return parse_fieldsets(request.args, resource_type)
+    except ValueError:
+        abort(422)
+
+
+def check_if_match(get_etag: Callable[[], str]) -> None:
+    """Abort with 412 if the request is conditional on a different representation.
+
+    :param get_etag: function returning the current entity tag, only called if If-Match is set
+    """
+    if request.if_match and not request.if_match.contains(get_etag()):
+        abort(412)
 
 
 @bp.route("/medics", methods=["GET"])
+@response_cache.cached(
+    tags=lambda body: [MEDICS_TAG, *(medic_tag(medic["id"]) for medic in body["data"])]
+)
 def get_medics() -> Response:
     offset = request.args.get("offset", 0, type=int)
     limit = request.args.get("limit", 10, type=int)
-
-    medics: List[Medic] = Medic.query.all()
-    return jsonify(
-        {
-            "status": "success",
-            "data": paginate(
-                [medic.format_for_json() for medic in medics],
-                offset=offset,
-                limit=limit,
-            ),
-        }
+    after = request.args.get("after", None, type=int)
+    if offset < 0 or limit < 1:
+        abort(422)
+    fieldsets = request_fieldsets("medics")
+
+    rows, next_cursor = paginate_query(
+        select_resources("medics", fieldsets),
+        Medic.id,
+        offset=offset,
+        limit=limit,
+        after=after,
+    )
+    medics, etags = serialize_medic_rows(rows, fieldsets)
+    return conditional_json(
+        make_etag(*etags, next_cursor), lambda: medics, next=next_cursor
     )
 
 
 @bp.route("/medics", methods=["POST"])
 @require_auth("write:medics")
 def create_new_medic() -> Tuple[Response, int]:
-    patient_ids: List[int] = request.json.get("patientIds", [])
-    patients = []
-    with current_app.app_context():
-        for patient_id in patient_ids:
-            patient = db.session.get(Patient, patient_id)
-            if not patient:
-                abort(422)
-            else:
-                patients.append(patient)
-
+    try:
+        patients = resolve_ids(
+            Patient,
+            request.json.get("patientIds", []),
+            "patientIds",
+            current_app.config["BATCH_CHUNK_SIZE"],
+        )
+        medic = Medic(
+            first_name=request.json["firstName"],
+            last_name=request.json["lastName"],
+            email=request.json["email"],
+            patients=patients,
+        )
+    except (KeyError, ValueError):
+        abort(422)
+    else:
         try:
-            medic = Medic(
-                first_name=request.json["firstName"],
-                last_name=request.json["lastName"],
-                email=request.json["email"],
-                patients=patients,
-            )
-        except (KeyError, ValueError):
-            abort(422)
+            medic_dict = medic.insert()
+        except SQLAlchemyError:
+            abort(500)
+        else:
+            response_cache.invalidate(MEDICS_TAG)
+            return jsonify({"status": "success", "data": medic_dict}), 201
+
+
+def check_user_attributes(item: Dict[str, Any]) -> Optional[str]:
+    """Check the name and email of a user item of a batch.
+
+    :param item: json object of the user
+    :return: error message, None if the attributes are valid
+    """
+    for key in ("firstName", "lastName", "email"):
+        if key not in item:
+            return f"Missing attribute '{key}'"
+        if not isinstance(item[key], str) or not item[key]:
+            return f"{key} must be a non-empty string"
+    return None
+
+
+def create_users_batch(
+    user_model: Type[User],
+    linked_model: Type[User],
+    ids_key: str,
+    link_attribute: str,
+    **model_kwargs: Any,
+) -> Tuple[Response, int]:
+    """Create users from a json array in one transaction, report result per item.
+
+    Invalid items are skipped and reported with an error, all valid items are inserted.
+    Linked ids and emails of all items are checked with one IN query per chunk.
+
+    :param user_model: model of the users to create
+    :param linked_model: model of the users referenced by ids_key
+    :param ids_key: request key of the linked ids, e.g. patientIds
+    :param link_attribute: relationship of user_model the linked users are assigned to
+    :param model_kwargs: additional kwargs passed to the user model
+    :return: flask response, 201 if all items were created, 207 otherwise
+    """
+    items = request.json
+    if not isinstance(items, list):
+        abort(422)
+    chunk_size: int = current_app.config["BATCH_CHUNK_SIZE"]
+    valid_items = [item for item in items if isinstance(item, dict)]
+
+    linked_ids = {
+        linked_id
+        for item in valid_items
+        if isinstance(item.get(ids_key, []), list)
+        for linked_id in item.get(ids_key, [])
+        if isinstance(linked_id, int)
+    }
+    linked_users = load_by_ids(linked_model, linked_ids, chunk_size)
+    emails = {
+        item["email"] for item in valid_items if isinstance(item.get("email"), str)
+    }
+    taken_emails: Set[str] = set()
+    for emails_chunk in chunked(emails, chunk_size):
+        taken_emails.update(
+            db.session.scalars(select(User.email).where(User.email.in_(emails_chunk)))
+        )
+
+    results: List[Optional[Dict[str, Any]]] = []
+    users: List[User] = []
+    for item in items:
+        error: Optional[Dict[str, Any]] = None
+        if not isinstance(item, dict):
+            error = {"message": "Item must be an object"}
+        elif message := check_user_attributes(item):
+            error = {"message": message}
         else:
             try:
-                medic_dict = medic.insert()
-            except SQLAlchemyError:
-                abort(500)
+                item_ids = parse_ids(item.get(ids_key, []), ids_key)
+            except ValueError as e:
+                error = {"message": str(e)}
+            else:
+                if missing_ids := [i for i in item_ids if i not in linked_users]:
+                    unknown_ids = UnknownIdsError(ids_key, missing_ids)
+                    error = {
+                        "message": unknown_ids.description,
+                        "missingIds": missing_ids,
+                    }
+                elif item["email"] in taken_emails:
+                    error = {"message": "Email already exists"}
+        if not error:
+            try:
+                user = user_model(
+                    first_name=item["firstName"],
+                    last_name=item["lastName"],
+                    email=item["email"],
+                    **{link_attribute: [linked_users[i] for i in item_ids]},
+                    **model_kwargs,
+                )
+            except ValueError as e:
+                error = {"message": str(e)}
             else:
-                return jsonify({"status": "success", "data": medic_dict}), 201
+                taken_emails.add(item["email"])
+                users.append(user)
+        results.append({"status": "error", "code": 422, **error} if error else None)
+
+    try:
+        user_dicts = iter(User.insert_many(users, chunk_size=chunk_size))
+    except SQLAlchemyError:
+        abort(500)
+    else:
+        results = [
+            result or {"status": "success", "data": next(user_dicts)}
+            for result in results
+        ]
+        all_created = len(users) == len(items)
+        return jsonify({"status": "success", "data": results}), (
+            201 if all_created else 207
+        )
+
+
+@bp.route("/medics:batch", methods=["POST"])
+@require_auth("write:medics")
+def create_new_medics_batch() -> Tuple[Response, int]:
+    response = create_users_batch(
+        Medic, linked_model=Patient, ids_key="patientIds", link_attribute="patients"
+    )
+    response_cache.invalidate(MEDICS_TAG)
+    return response
 
 
 @bp.route("/medics/<int:medic_id>", methods=["GET"])
+@response_cache.cached(tags=lambda body: [medic_tag(body["data"]["id"])])
 def get_medic(medic_id) -> Response:
-    medic: Medic = db.session.get(Medic, medic_id)
-    if not medic:
+    fieldsets = request_fieldsets("medics")
+    row = db.session.execute(
+        select_resources("medics", fieldsets).where(Medic.id == medic_id)
+    ).one_or_none()
+    if not row:
         abort(404)
     else:
-        return jsonify(
-            {
-                "status": "success",
-                "data": medic.format_for_json(),
-            }
-        )
+        medics, etags = serialize_medic_rows([row], fieldsets)
+        return conditional_json(etags[0], lambda: medics[0])
 
 
 @bp.route("/medics/<int:medic_id>", methods=["DELETE"])
@@ -95,8 +328,10 @@ def delete_medic(medic_id) -> Response:
     if not medic:
         abort(404)
     else:
+        check_if_match(medic.entity_tag)
         medic_id = medic.id
         medic.delete()
+        response_cache.invalidate(MEDICS_TAG, medic_tag(medic_id))
         return jsonify(
             {
                 "status": "success",
@@ -112,25 +347,32 @@ def update_medic(medic_id: int) -> Response:
     if not medic:
         abort(404)
     else:
+        check_if_match(medic.entity_tag)
         patch_kwargs = {
             convert_camel_case_to_underscore(k): v for k, v in request.json.items()
         }
-        patient_ids: List[int] = patch_kwargs.pop("patient_ids", [])
-        patients = []
-        for patient_id in patient_ids:
-            patient = db.session.get(Patient, patient_id)
-            if not patient:
+        patient_ids: Optional[List[int]] = None
+        if "patient_ids" in patch_kwargs:
+            try:
+                patient_ids = resolve_existing_ids(
+                    Patient,
+                    patch_kwargs.pop("patient_ids"),
+                    "patientIds",
+                    current_app.config["BATCH_CHUNK_SIZE"],
+                )
+            except ValueError:
                 abort(422)
-            else:
-                patients.append(patient)
-        patch_kwargs["patients"] = patients
         try:
-            medic_dict = medic.update(**patch_kwargs)
+            medic_dict = medic.update(patient_ids=patient_ids, **patch_kwargs)
         except AttributeError:
             abort(422)
+        except StaleDataError:
+            # medic was updated concurrently after If-Match was checked
+            abort(412)
         except SQLAlchemyError:
             abort(500)
         else:
+            response_cache.invalidate(medic_tag(medic_id))
             return jsonify({"status": "success", "data": medic_dict})
 
 
@@ -139,24 +381,154 @@ def update_medic(medic_id: int) -> Response:
 def get_patients_of_specific_medic(medic_id: int) -> Response:
     offset = request.args.get("offset", 0, type=int)
     limit = request.args.get("limit", 10, type=int)
+    if offset < 0 or limit < 1:
+        abort(422)
+    fieldsets = request_fieldsets("patients")
 
-    medic: Medic = db.session.get(Medic, medic_id)
-    if not medic:
+    if not db.session.scalar(select(Medic.id).where(Medic.id == medic_id)):
+        abort(404)
+    else:
+        rows = db.session.execute(
+            select_resources("patients", fieldsets)
+            .join(association_table, association_table.c.patient_id == Patient.id)
+            .where(association_table.c.medic_id == medic_id)
+            .order_by(Patient.id)
+            .offset(offset)
+            .limit(limit)
+        ).all()
+        patients, etags = serialize_patient_rows(rows, fieldsets)
+        return conditional_json(make_etag(*etags), lambda: patients)
+
+
+def select_records_of_medic(medic_id: int, *columns: Any) -> Select:
+    """Return select of the records of all patients of a medic, in one join.
+
+    :param medic_id: id of medic
+    :param columns: selected columns of record
+    :return: select statement
+    """
+    return (
+        select(*columns)
+        .join(association_table, association_table.c.patient_id == Record.patient_id)
+        .where(association_table.c.medic_id == medic_id)
+    )
+
+
+class RecordPageArgs(NamedTuple):
+    """Query args of a keyset paginated page of records."""
+
+    limit: int
+    fieldsets: Fieldsets
+    filters: List[ColumnElement]
+    sort_columns: Sequence[Any]
+    descending: bool
+    after: Optional[Tuple[Any, ...]]
+
+
+def parse_record_page_args(args: MultiDict) -> RecordPageArgs:
+    """Parse limit, fields, include, filter, sort and after query args of a page of records.
+
+    :param args: query args of the request
+    :raise: ValueError if any of them is invalid
+    :return: parsed args
+    """
+    limit = args.get("limit", 10, type=int)
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    sort_columns, descending = parse_record_keyset_sort(args)
+    after = args.get("after", None)
+    return RecordPageArgs(
+        limit,
+        parse_fieldsets(args, "records"),
+        parse_record_filters(args),
+        sort_columns,
+        descending,
+        decode_cursor(after, sort_columns) if after is not None else None,
+    )
+
+
+def select_record_page_of_medic(medic_id: int, page_args: RecordPageArgs) -> Select:
+    """Return select of a page of records across all patients of a medic, see keyset_page.
+
+    :param medic_id: id of medic
+    :param page_args: parsed query args
+    :return: select statement
+    """
+    # the sort columns are needed for the cursor, even if they are not requested
+    columns = {
+        column.key: column
+        for column in (
+            *select_resources("records", page_args.fieldsets).selected_columns,
+            *page_args.sort_columns,
+        )
+    }
+    return keyset_page_query(
+        select_records_of_medic(medic_id, *columns.values()).where(*page_args.filters),
+        page_args.sort_columns,
+        descending=page_args.descending,
+        limit=page_args.limit,
+        after=page_args.after,
+    )
+
+
+@bp.route("/medics/<int:medic_id>/records", methods=["GET"])
+@require_auth("get:records")
+def get_records_of_medic(medic_id: int) -> Response:
+    """Get records across all patients of a medic, latest diagnosis first by default.
+
+    Pages are located by keyset cursors instead of offsets: next is the cursor to pass as
+    after to get the following page, so deep pages are as cheap as the first one.
+
+    :param medic_id: id of medic
+    :return: flask response
+    """
+    try:
+        page_args = parse_record_page_args(request.args)
+    except ValueError:
+        abort(422)
+
+    if not db.session.scalar(select(Medic.id).where(Medic.id == medic_id)):
         abort(404)
     else:
-        response_data = paginate(
-            [patient.format_for_json() for patient in medic.patients],
-            offset=offset,
-            limit=limit,
+        rows, next_position = keyset_page(
+            db.session.execute(select_record_page_of_medic(medic_id, page_args)).all(),
+            page_args.sort_columns,
+            page_args.limit,
         )
-        return jsonify(
-            {
-                "status": "success",
-                "data": response_data,
-            }
+        next_cursor = encode_cursor(next_position) if next_position else None
+        records, etags = serialize_record_rows(rows, page_args.fieldsets)
+        return conditional_json(
+            make_etag(*etags, next_cursor), lambda: records, next=next_cursor
         )
 
 
+@bp.route("/medics/<int:medic_id>/records:export", methods=["GET"])
+@require_auth("get:records")
+def export_records_of_medic(medic_id: int) -> Response:
+    """Stream records across all patients of a medic as ndjson or csv, ordered by id.
+
+    :param medic_id: id of medic
+    :return: streamed flask response
+    """
+    export_format = request.args.get("format", "ndjson")
+    if export_format not in EXPORT_MIMETYPES:
+        abort(422)
+    try:
+        filters = parse_record_filters(request.args)
+    except ValueError:
+        abort(422)
+    if not db.session.scalar(select(Medic.id).where(Medic.id == medic_id)):
+        abort(404)
+
+    return stream_records(
+        select_records_of_medic(medic_id, *Record.__table__.columns)
+        .where(*filters)
+        .order_by(Record.id),
+        export_format,
+        f"medic-{medic_id}-records",
+    )
+
+
 @bp.route("/medics/<int:medic_id>/patients/<int:patient_id>", methods=["PUT"])
 @require_auth("write:medics")
 def link_patient_to_medic(medic_id: int, patient_id: int) -> Response:
@@ -166,47 +538,74 @@ def link_patient_to_medic(medic_id: int, patient_id: int) -> Response:
         abort(404)
     else:
         medic_dict = medic.add_patient(patient)
+        response_cache.invalidate(medic_tag(medic_id))
         return jsonify({"status": "success", "data": medic_dict})
 
 
 @bp.route("/patients", methods=["POST"])
 @require_auth("write:patients")
 def create_new_patient() -> Tuple[Response, int]:
-    medic_ids: List[int] = request.json.get("medicIds", [])
-    medics = []
-    with current_app.app_context():
-        for medic_id in medic_ids:
-            medic = db.session.get(Medic, medic_id)
-            if not medic:
-                abort(422)
-            else:
-                medics.append(medic)
+    try:
+        medics = resolve_ids(
+            Medic,
+            request.json.get("medicIds", []),
+            "medicIds",
+            current_app.config["BATCH_CHUNK_SIZE"],
+        )
+        patient = Patient(
+            first_name=request.json["firstName"],
+            last_name=request.json["lastName"],
+            email=request.json["email"],
+            medics=medics,
+        )
+    except (KeyError, ValueError):
+        abort(422)
+    else:
+        medic_ids = [medic.id for medic in medics]
         try:
-            patient = Patient(
-                first_name=request.json["firstName"],
-                last_name=request.json["lastName"],
-                email=request.json["email"],
-                medics=medics,
-            )
-        except (KeyError, ValueError):
-            abort(422)
+            patient_dict = patient.insert()
+        except SQLAlchemyError:
+            abort(500)
         else:
-            try:
-                patient_dict = patient.insert()
-            except SQLAlchemyError:
-                abort(500)
-            else:
-                return jsonify({"status": "success", "data": patient_dict}), 201
+            # cached medics list the ids of their patients
+            response_cache.invalidate(*(medic_tag(medic_id) for medic_id in medic_ids))
+            return jsonify({"status": "success", "data": patient_dict}), 201
+
+
+@bp.route("/patients:batch", methods=["POST"])
+@require_auth("write:patients")
+def create_new_patients_batch() -> Tuple[Response, int]:
+    # new patients have no records, set them to avoid a lazy load per patient
+    response, status_code = create_users_batch(
+        Patient,
+        linked_model=Medic,
+        ids_key="medicIds",
+        link_attribute="medics",
+        records=[],
+    )
+    response_cache.invalidate(
+        *(
+            medic_tag(medic_id)
+            for result in response.json["data"]
+            if result["status"] == "success"
+            for medic_id in result["data"].get("medics", [])
+        )
+    )
+    return response, status_code
 
 
 @bp.route("/patients/<int:patient_id>", methods=["GET"])
 @require_auth()
 def get_patient(patient_id: int) -> Response:
-    patient: Patient = db.session.get(Patient, patient_id)
-    if not patient:
+    fieldsets = request_fieldsets("patients")
+    row = db.session.execute(
+        select_resources("patients", fieldsets).where(Patient.id == patient_id)
+    ).one_or_none()
+    if not row:
         abort(404)
     else:
-        return jsonify({"status": "success", "data": patient.format_for_json()})
+        patients, etags = serialize_patient_rows([row], fieldsets)
+        return conditional_json(etags[0], lambda: patients[0])
 
 
 @bp.route("/patients/<int:patient_id>", methods=["DELETE"])
@@ -216,7 +615,10 @@ def delete_patient(patient_id) -> Response:
     if not patient:
         abort(404)
     else:
+        check_if_match(patient.entity_tag)
+        medic_ids = [medic.id for medic in patient.medics]
         patient_id = patient.delete()
+        response_cache.invalidate(*(medic_tag(medic_id) for medic_id in medic_ids))
         return jsonify(
             {
                 "status": "success",
@@ -230,54 +632,140 @@ def delete_patient(patient_id) -> Response:
 def get_records_of_one_patient(patient_id: int) -> Response:
     offset = request.args.get("offset", 0, type=int)
     limit = request.args.get("limit", 10, type=int)
-
-    patient: Patient = db.session.get(Patient, patient_id)
-    if not patient:
+    if offset < 0 or limit < 1:
+        abort(422)
+    fieldsets = request_fieldsets("records")
+    try:
+        filters = parse_record_filters(request.args)
+        order_by = parse_record_sort(request.args)
+    except ValueError:
+        abort(422)
+
+    if not db.session.scalar(select(Patient.id).where(Patient.id == patient_id)):
         abort(404)
     else:
-        return jsonify(
-            {
-                "status": "success",
-                "data": paginate(
-                    [record.format_for_json() for record in patient.records],
-                    limit=limit,
-                    offset=offset,
-                ),
-            }
-        )
+        rows = db.session.execute(
+            select_resources("records", fieldsets)
+            .where(Record.patient_id == patient_id, *filters)
+            .order_by(*order_by)
+            .offset(offset)
+            .limit(limit)
+        ).all()
+        records, etags = serialize_record_rows(rows, fieldsets)
+        return conditional_json(make_etag(*etags), lambda: records)
+
+
+def stream_records(query: Select, export_format: str, filename: str) -> Response:
+    """Stream records selected by query as ndjson or csv.
+
+    Records are fetched through a server-side cursor and written chunk by chunk,
+    so memory does not grow with the number of records.
+
+    :param query: select of all columns of record
+    :param export_format: ndjson or csv
+    :param filename: name of the downloaded file, without extension
+    :return: streamed flask response
+    """
+    query = query.execution_options(yield_per=current_app.config["BATCH_CHUNK_SIZE"])
+
+    def generate_ndjson() -> Iterator[str]:
+        for rows in db.session.execute(query).partitions():
+            yield "".join(
+                current_app.json.dumps(Record.format_row_for_json(row)) + "\n"
+                for row in rows
+            )
+
+    def generate_csv() -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_CSV_COLUMNS)
+        for rows in db.session.execute(query).partitions():
+            writer.writerows(
+                [
+                    (
+                        column.date().isoformat()
+                        if isinstance(column, datetime)
+                        else column
+                    )
+                    for column in (getattr(row, name) for name in EXPORT_CSV_COLUMNS)
+                ]
+                for row in rows
+            )
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    generate = generate_csv if export_format == "csv" else generate_ndjson
+    return Response(
+        stream_with_context(generate()),
+        mimetype=EXPORT_MIMETYPES[export_format],
+        headers={
+            "Content-Disposition": (f"attachment; filename={filename}.{export_format}")
+        },
+    )
+
+
+@bp.route("/patients/<int:patient_id>/records:export", methods=["GET"])
+@require_auth("get:records")
+def export_records_of_one_patient(patient_id: int) -> Response:
+    """Stream full record history of patient as ndjson or csv.
+
+    :param patient_id: id of patient
+    :return: streamed flask response
+    """
+    export_format = request.args.get("format", "ndjson")
+    if export_format not in EXPORT_MIMETYPES:
+        abort(422)
+    if not db.session.get(Patient, patient_id):
+        abort(404)
+
+    return stream_records(
+        select(*Record.__table__.columns)
+        .where(Record.patient_id == patient_id)
+        .order_by(Record.id),
+        export_format,
+        f"patient-{patient_id}-records",
+    )
+
+
+def parse_record_attributes(
+    record_json: Dict[str, Any], patient_id: int
+) -> Dict[str, Any]:
+    """Return record attributes from record in request format.
+
+    :param record_json: record as sent by the client
+    :param patient_id: id of patient the record belongs to
+    :raise: KeyError if a required attribute is missing
+    :raise: ValueError if an attribute is invalid
+    :return: kwargs of Record
+    """
+    for attribute_name in ("title", "description"):
+        if not isinstance(record_json[attribute_name], str):
+            raise ValueError(f"{attribute_name} must be a string")
+    if len(record_json["title"]) > Record.title.type.length:
+        raise ValueError("title is too long")
+    date_symptom_offset_str: Optional[str] = record_json.get("dateSymptomOffset")
+    return {
+        "title": record_json["title"],
+        "description": record_json["description"],
+        "date_diagnosis": parse_date(record_json["dateDiagnosis"]),
+        "date_symptom_onset": parse_date(record_json["dateSymptomOnset"]),
+        "date_symptom_offset": (
+            parse_date(date_symptom_offset_str) if date_symptom_offset_str else None
+        ),
+        "patient_id": patient_id,
+    }
 
 
 @bp.route("/patients/<int:patient_id>/records", methods=["POST"])
 @require_auth("write:records")
 def add_record_to_patient(patient_id: int) -> Tuple[Response, int]:
-    date_format = "%Y-%m-%d"
-
     patient: Optional[Patient] = db.session.get(Patient, patient_id)
     if not patient:
         abort(404)
     else:
         try:
-            # process request body
-            date_symptom_offset_str: str = request.json.get("dateSymptomOffset")
-            date_symptom_offset: Optional[datetime] = (
-                datetime.strptime(date_symptom_offset_str, date_format)
-                if date_symptom_offset_str
-                else None
-            )
-            date_symptom_onset: datetime = datetime.strptime(
-                request.json["dateSymptomOnset"], date_format
-            )
-            date_diagnosis: datetime = datetime.strptime(
-                request.json["dateDiagnosis"], date_format
-            )
-            record = Record(
-                title=request.json["title"],
-                description=request.json["description"],
-                date_diagnosis=date_diagnosis,
-                date_symptom_onset=date_symptom_onset,
-                date_symptom_offset=date_symptom_offset,
-                patient_id=patient_id,
-            )
+            record = Record(**parse_record_attributes(request.json, patient_id))
         except (KeyError, ValueError):
             abort(422)
         else:
@@ -289,6 +777,118 @@ def add_record_to_patient(patient_id: int) -> Tuple[Response, int]:
                 return jsonify({"status": "success", "data": record_dict}), 201
 
 
+@bp.route("/records:batch", methods=["POST"])
+@require_auth("write:records")
+def ingest_records() -> Tuple[Response, int]:
+    """Bulk insert records streamed as newline delimited json, one record per line.
+
+    The body is parsed line by line and valid records are inserted in chunks within one
+    transaction, so memory does not grow with the size of the upload.
+    Invalid lines are skipped and reported, the first MAX_REPORTED_ERRORS of them in detail.
+
+    :return: flask response, 201 if all records were inserted, 207 otherwise
+    """
+    chunk_size: int = current_app.config["BATCH_CHUNK_SIZE"]
+    errors: List[Dict[str, Any]] = []
+    n_failed = 0
+    known_patient_ids: Set[int] = set()
+
+    def report_error(line_number: int, message: str) -> None:
+        nonlocal n_failed
+        n_failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"line": line_number, "code": 422, "message": message})
+
+    def parsed_lines() -> Iterator[Tuple[int, Dict[str, Any]]]:
+        for line_number, line in enumerate(request.stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record_json = current_app.json.loads(line)
+                if not isinstance(record_json, dict):
+                    raise ValueError("Record must be an object")
+                patient_id = record_json.get("patientId")
+                if not isinstance(patient_id, int) or isinstance(patient_id, bool):
+                    raise ValueError("patientId must be an id")
+                yield line_number, parse_record_attributes(record_json, patient_id)
+            except KeyError as e:
+                report_error(line_number, f"Missing attribute {e}")
+            except ValueError as e:
+                report_error(line_number, str(e))
+
+    def valid_row_chunks() -> Iterator[List[Dict[str, Any]]]:
+        for chunk in chunked(parsed_lines(), chunk_size):
+            # look up patients not seen in previous chunks with one query
+            if (
+                unknown_ids := {row["patient_id"] for _, row in chunk}
+                - known_patient_ids
+            ):
+                known_patient_ids.update(
+                    db.session.scalars(
+                        select(Patient.id).where(Patient.id.in_(unknown_ids))
+                    )
+                )
+            rows = []
+            for line_number, row in chunk:
+                if row["patient_id"] in known_patient_ids:
+                    rows.append(row)
+                else:
+                    report_error(line_number, f"Unknown patientId {row['patient_id']}")
+            yield rows
+
+    try:
+        n_inserted = Record.insert_many(valid_row_chunks())
+    except SQLAlchemyError:
+        abort(500)
+    else:
+        return jsonify(
+            {
+                "status": "success",
+                "data": {
+                    "inserted": n_inserted,
+                    "failed": n_failed,
+                    "errors": sorted(errors, key=lambda error: error["line"]),
+                },
+            }
+        ), (201 if n_failed == 0 else 207)
+
+
+@bp.route("/records:search", methods=["GET"])
+@require_auth("get:records")
+def search_records() -> Response:
+    """Full text search over title and description of records, the best matches first.
+
+    The search can be narrowed to the records of a patient or of the patients of a medic,
+    and by the filters of get_records_of_one_patient.
+
+    :return: flask response
+    """
+    offset = request.args.get("offset", 0, type=int)
+    limit = request.args.get("limit", 10, type=int)
+    patient_id = request.args.get("patient_id", None, type=int)
+    medic_id = request.args.get("medic_id", None, type=int)
+    if offset < 0 or limit < 1:
+        abort(422)
+    fieldsets = request_fieldsets("records")
+    try:
+        terms = parse_search_terms(request.args.get("q", ""))
+        filters = parse_record_filters(request.args)
+    except ValueError:
+        abort(422)
+
+    statement = select_resources("records", fieldsets).where(*filters)
+    if patient_id is not None:
+        statement = statement.where(Record.patient_id == patient_id)
+    if medic_id is not None:
+        statement = statement.join(
+            association_table, association_table.c.patient_id == Record.patient_id
+        ).where(association_table.c.medic_id == medic_id)
+    statement = match_records(statement, terms, db.session.get_bind().dialect.name)
+    rows = db.session.execute(statement.offset(offset).limit(limit)).all()
+    records, etags = serialize_record_rows(rows, fieldsets)
+    return conditional_json(make_etag(*etags), lambda: records)
+
+
 @bp.route("/patients/<int:patient_id>/records/<int:record_id>", methods=["GET"])
 @require_auth("get:records")
 def get_record(patient_id: int, record_id: int):
@@ -297,21 +897,17 @@ def get_record(patient_id: int, record_id: int):
     :param patient_id: id of patient
     :param record_id: id of record
     """
-    patient: Optional[Patient] = db.session.get(Patient, patient_id)
-    if not patient:
+    fieldsets = request_fieldsets("records")
+    row = db.session.execute(
+        select_resources("records", fieldsets).where(
+            Record.patient_id == patient_id, Record.id == record_id
+        )
+    ).one_or_none()
+    if not row:
         abort(404)
     else:
-        matching_records: list[Record] = [
-            record for record in patient.records if record.id == record_id
-        ]
-        if len(matching_records) == 0:
-            abort(404)
-        elif len(matching_records) > 1:
-            abort(500)
-        else:
-            record = matching_records[0]
-            record_dict = record.format_for_json()
-            return jsonify({"status": "success", "data": record_dict})
+        records, etags = serialize_record_rows([row], fieldsets)
+        return conditional_json(etags[0], lambda: records[0])
 
 
 @bp.route("/patients/<int:patient_id>/records/<int:record_id>", methods=["DELETE"])
@@ -323,18 +919,32 @@ def delete_record(patient_id: int, record_id: int) -> Response:
     :param record_id: id of record
     :return: flask response
     """
-    patient: Optional[Patient] = db.session.get(Patient, patient_id)
-    if not patient:
+    record: Optional[Record] = db.session.scalars(
+        select(Record).where(Record.patient_id == patient_id, Record.id == record_id)
+    ).one_or_none()
+    if not record:
         abort(404)
     else:
-        matching_records: list[Record] = [
-            record for record in patient.records if record.id == record_id
-        ]
-        if len(matching_records) == 0:
-            abort(404)
-        elif len(matching_records) > 1:
-            abort(500)
-        else:
-            record: Record = matching_records[0]
-            record_id = record.delete()
-            return jsonify({"status": "success", "data": record_id})
+        check_if_match(record.entity_tag)
+        record_id = record.delete()
+        return jsonify({"status": "success", "data": record_id})
+
+
+@bp.route("/metrics/pool", methods=["GET"])
+@require_auth()
+def get_pool_metrics() -> Response:
+    """Get metrics of the database connection pool of the worker serving the request.
+
+    :return: flask response
+    """
+    return jsonify({"status": "success", "data": pool_metrics(db.engine.pool)})
+
+
+@bp.route("/metrics/response-cache", methods=["GET"])
+@require_auth()
+def get_response_cache_metrics() -> Response:
+    """Get hits, misses and hit ratio of the response cache of the worker serving the request.
+
+    :return: flask response
+    """
+    return jsonify({"status": "success", "data": response_cache.metrics()})
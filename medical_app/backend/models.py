@@ -1,12 +1,29 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Set
-
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from typing import Any, Collection, Dict, Iterable, List, Optional, Sequence, Set
+
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    delete,
+    event,
+    func,
+    insert,
+    literal_column,
+    select,
+    text,
+)
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from medical_app.backend import db
+from medical_app.backend.api_helper_functions import chunked, make_etag
 
 
 def prune_keys_with_none_value(input_dict: dict) -> dict:
@@ -20,10 +37,16 @@ def prune_keys_with_none_value(input_dict: dict) -> dict:
 
 class User(db.Model):
     empty_string_forbidden_cols: Set = {"first_name", "last_name", "email"}
+    # columns clients may change, the id and version are managed by the database and orm
+    updatable_cols: Set = {"first_name", "last_name", "email"}
     id = Column(Integer, primary_key=True)
     first_name = Column(String(64), nullable=False)
     last_name = Column(String(64), nullable=False)
     email = Column(String(64), unique=True, nullable=False)
+    # incremented by every update of the row, see entity_tag
+    version_id = Column(Integer, nullable=False, default=1)
+
+    __mapper_args__ = {"version_id_col": version_id}
 
     def __init__(self, **kwargs) -> None:
         empty_string_params = {
@@ -68,6 +91,31 @@ class User(db.Model):
         finally:
             db.session.close()
 
+    @classmethod
+    def insert_many(
+        cls, users: Sequence[User], chunk_size: int = 1000
+    ) -> List[Dict[str, Any]]:
+        """Insert users into db in chunks, all within one transaction.
+
+        :param users: users to insert
+        :param chunk_size: number of users flushed to the db at once
+        :return: dict representations of inserted users.
+        """
+        try:
+            for chunk in chunked(users, chunk_size):
+                db.session.add_all(chunk)
+                db.session.flush()
+            # serialize before commit, as committing expires every instance
+            instance_dicts_to_be_jsonified = [user.format_for_json() for user in users]
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            raise e
+        else:
+            return instance_dicts_to_be_jsonified
+        finally:
+            db.session.close()
+
     def delete(self) -> int:
         """Delete self from db.
 
@@ -90,6 +138,8 @@ association_table = db.Table(
     "association_table",
     Column("patient_id", ForeignKey("patient.id"), primary_key=True),
     Column("medic_id", ForeignKey("medic.id"), primary_key=True),
+    # the primary key (patient_id, medic_id) cannot serve lookups by medic alone
+    Index("ix_association_table_medic_id", "medic_id"),
 )
 
 
@@ -123,6 +173,45 @@ class Patient(User):
             format_dict["medics"] = [medic.id for medic in self.medics]
         return prune_keys_with_none_value(format_dict)
 
+    def entity_tag(self) -> str:
+        """Return entity tag of the representation of patient, changed by every update of it.
+
+        :return: entity tag derived from versions of patient and its records and ids of its medics
+        """
+        return self.make_entity_tag(
+            self.id,
+            self.version_id,
+            sorted(self.records, key=lambda record: record.id),
+            sorted(medic.id for medic in self.medics),
+        )
+
+    @staticmethod
+    def make_entity_tag(
+        patient_id: int,
+        version_id: int,
+        records: Optional[Sequence[Any]],
+        medic_ids: Optional[Sequence[int]],
+    ) -> str:
+        """Return entity tag of a representation of patient, see entity_tag.
+
+        :param patient_id: id of patient
+        :param version_id: version of patient
+        :param records: records or rows with id and version_id ordered by id, None if not represented
+        :param medic_ids: sorted ids of medics of patient, None if not represented
+        :return: entity tag
+        """
+        return make_etag(
+            "patient",
+            patient_id,
+            version_id,
+            (
+                None
+                if records is None
+                else [(record.id, record.version_id) for record in records]
+            ),
+            medic_ids,
+        )
+
 
 class Medic(User):
     __tablename__ = "medic"
@@ -151,6 +240,28 @@ class Medic(User):
             format_dict["patients"] = [patient.id for patient in self.patients]
         return prune_keys_with_none_value(format_dict)
 
+    def entity_tag(self) -> str:
+        """Return entity tag of the representation of medic, changed by every update of it.
+
+        :return: entity tag derived from version of medic and ids of its patients
+        """
+        return self.make_entity_tag(
+            self.id, self.version_id, sorted(patient.id for patient in self.patients)
+        )
+
+    @staticmethod
+    def make_entity_tag(
+        medic_id: int, version_id: int, patient_ids: Optional[Sequence[int]]
+    ) -> str:
+        """Return entity tag of a representation of medic, see entity_tag.
+
+        :param medic_id: id of medic
+        :param version_id: version of medic
+        :param patient_ids: sorted ids of patients of medic, None if not represented
+        :return: entity tag
+        """
+        return make_etag("medic", medic_id, version_id, patient_ids)
+
     def add_patient(self, patient: Patient) -> Dict[str, Any]:
         """Add patient to medic.
 
@@ -169,17 +280,24 @@ class Medic(User):
         finally:
             db.session.close()
 
-    def update(self, **kwargs) -> Dict[str, Any]:
-        """Update medic with given kwargs.
+    def update(
+        self, patient_ids: Optional[Collection[int]] = None, **kwargs
+    ) -> Dict[str, Any]:
+        """Update medic with given kwargs and its patients, all within one commit.
 
+        :param patient_ids: ids of existing patients the medic has after the update,
+            patients are left unchanged if None
+        :raise: AttributeError if a kwarg is not in updatable_cols
         :return: dict representation of updated medic.
         """
         try:
             for attribute_name, v in kwargs.items():
-                getattr(self, attribute_name)
+                if attribute_name not in self.updatable_cols:
+                    raise AttributeError(f"{attribute_name} can not be updated")
                 setattr(self, attribute_name, v)
-                db.session.commit()
-
+            if patient_ids is not None:
+                self.set_patient_ids(patient_ids)
+            db.session.commit()
         except (SQLAlchemyError, AttributeError) as e:
             db.session.rollback()
             raise (e)
@@ -189,32 +307,147 @@ class Medic(User):
         finally:
             db.session.close()
 
+    def set_patient_ids(self, patient_ids: Collection[int]) -> None:
+        """Link medic with exactly the given patients, without committing.
+
+        Only the links that differ from the current ones are deleted and inserted,
+        instead of rewriting the whole collection.
+
+        :param patient_ids: ids of existing patients
+        """
+        current_ids = set(
+            db.session.scalars(
+                select(association_table.c.patient_id).where(
+                    association_table.c.medic_id == self.id
+                )
+            )
+        )
+        removed_ids = current_ids - set(patient_ids)
+        added_ids = set(patient_ids) - current_ids
+        if removed_ids or added_ids:
+            # the links are part of the representation, so changing them is an update of
+            # the medic: the version check of its row guards against concurrent updates
+            self.version_id += 1
+        if removed_ids:
+            db.session.execute(
+                delete(association_table).where(
+                    association_table.c.medic_id == self.id,
+                    association_table.c.patient_id.in_(removed_ids),
+                )
+            )
+        if added_ids:
+            db.session.execute(
+                insert(association_table),
+                [
+                    {"medic_id": self.id, "patient_id": patient_id}
+                    for patient_id in sorted(added_ids)
+                ],
+            )
+        # links were written past the orm, reload them on next access
+        db.session.expire(self, ["patients"])
+
 
 class Record(db.Model):
+    # single record lookups always filter by patient and record id, record lists of a patient
+    # are filtered and sorted by its dates with ties broken by id, see filters.py
+    __table_args__ = (
+        Index("ix_record_patient_id_id", "patient_id", "id"),
+        Index(
+            "ix_record_patient_id_date_diagnosis", "patient_id", "date_diagnosis", "id"
+        ),
+        Index(
+            "ix_record_patient_id_date_symptom_onset",
+            "patient_id",
+            "date_symptom_onset",
+            "id",
+        ),
+        Index(
+            "ix_record_patient_id_date_symptom_offset",
+            "patient_id",
+            "date_symptom_offset",
+            "id",
+        ),
+    )
+
     id = Column(Integer, primary_key=True)
     title = Column(String(64), nullable=False)
     description = Column(String, nullable=False)
-    date_diagnosis = Column(DateTime, nullable=False)
+    date_diagnosis = Column(DateTime, nullable=False, index=True)
     date_symptom_onset = Column(DateTime, nullable=False)
     date_symptom_offset = Column(DateTime, nullable=True)
     patient_id: Mapped[int] = mapped_column(ForeignKey("patient.id"))
+    # incremented by every update of the row, see entity_tag
+    version_id = Column(Integer, nullable=False, default=1)
+
+    __mapper_args__ = {"version_id_col": version_id}
+
+    def entity_tag(self) -> str:
+        """Return entity tag of the representation of record, changed by every update of it.
+
+        :return: entity tag derived from id and version of record
+        """
+        return self.make_entity_tag(self.id, self.version_id)
+
+    @staticmethod
+    def make_entity_tag(record_id: int, version_id: int) -> str:
+        """Return entity tag of a representation of record, see entity_tag.
+
+        :param record_id: id of record
+        :param version_id: version of record
+        :return: entity tag
+        """
+        return make_etag("record", record_id, version_id)
 
     def format_for_json(self) -> Dict[str, Any]:
         """Return dict that can easily be jsonified.
 
+        :return: dict representation of record to be jsonified
+        """
+        return self.format_row_for_json(self)
+
+    @staticmethod
+    def format_row_for_json(row: Any) -> Dict[str, Any]:
+        """Return dict that can easily be jsonified from any object with record attributes.
+
+        This allows serializing rows of a column select without hydrating Record instances.
+
+        :param row: record or row with the columns of record
         :return: dict representation of record to be jsonified
         """
         format_dict = {
-            "id": self.id,
-            "title": self.title,
-            "description": self.description,
-            "date_diagnosis": self.date_diagnosis,
-            "date_symptom_onset": self.date_symptom_onset,
-            "date_symptom_offest": self.date_symptom_offset,
-            "patient_id": self.patient_id,
+            "id": row.id,
+            "title": row.title,
+            "description": row.description,
+            "date_diagnosis": row.date_diagnosis,
+            "date_symptom_onset": row.date_symptom_onset,
+            "date_symptom_offest": row.date_symptom_offset,
+            "patient_id": row.patient_id,
         }
         return prune_keys_with_none_value(format_dict)
 
+    @classmethod
+    def insert_many(cls, row_chunks: Iterable[List[Dict[str, Any]]]) -> int:
+        """Bulk insert records chunk by chunk, all within one transaction.
+
+        :param row_chunks: lists of record attributes, consumed lazily,
+            so chunks can be produced while the request body is streamed
+        :return: number of inserted records
+        """
+        n_inserted = 0
+        try:
+            for rows in row_chunks:
+                if rows:
+                    db.session.execute(insert(cls), rows)
+                    n_inserted += len(rows)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            raise e
+        else:
+            return n_inserted
+        finally:
+            db.session.close()
+
     def insert(self) -> Dict[str, Any]:
         """Insert record into db.
 
@@ -248,3 +481,67 @@ class Record(db.Model):
             return id
         finally:
             db.session.close()
+
+
+# full text search document of records, see search.py. On postgres, a gin index over the
+# document is maintained by the database itself on every insert, update and delete.
+RECORD_SEARCH_DOCUMENT = func.to_tsvector(
+    text("'english'::regconfig"),
+    Record.__table__.c.title
+    + literal_column("' '", String)
+    + Record.__table__.c.description,
+)
+Index("ix_record_search", RECORD_SEARCH_DOCUMENT, postgresql_using="gin").ddl_if(
+    dialect="postgresql"
+)
+
+# on sqlite, an fts5 table indexes the title and description of record instead,
+# kept in sync by triggers so that bulk inserts are indexed as well
+RECORD_SEARCH_SQLITE_DDL = (
+    """CREATE VIRTUAL TABLE record_search USING fts5(
+        title, description, content='record', content_rowid='id',
+        tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER record_search_insert AFTER INSERT ON record BEGIN
+        INSERT INTO record_search(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER record_search_delete AFTER DELETE ON record BEGIN
+        INSERT INTO record_search(record_search, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER record_search_update AFTER UPDATE OF title, description ON record
+    BEGIN
+        INSERT INTO record_search(record_search, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO record_search(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+)
+for statement in RECORD_SEARCH_SQLITE_DDL:
+    event.listen(
+        Record.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite")
+    )
+event.listen(
+    Record.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS record_search").execute_if(dialect="sqlite"),
+)
+
+
+class PatientRecordStats(db.Model):
+    """Aggregates of the records of each patient, maintained incrementally by stats/summary.py.
+
+    Rows are derived data: there is no foreign key, and the row of a patient is removed
+    together with its last record.
+    """
+
+    __tablename__ = "patient_record_stats"
+
+    patient_id = Column(Integer, primary_key=True, autoincrement=False)
+    n_records = Column(Integer, nullable=False, default=0)
+    # records without symptom offset
+    n_ongoing = Column(Integer, nullable=False, default=0)
+    # records with symptom offset and the sum of their symptom durations
+    n_finished = Column(Integer, nullable=False, default=0)
+    symptom_seconds = Column(BigInteger, nullable=False, default=0)
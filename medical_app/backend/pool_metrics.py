@@ -0,0 +1,127 @@
+"""Metrics of the database connection pool of each worker process.
+
+Occupancy (checked out connections, overflow) is read from the pool itself, while
+:class:`TimedQueuePool` counts checkouts and how long they waited for a connection, including
+opening new connections and pre pings. It only relies on public pool api: checkouts are timed
+around Pool.connect, which engines call for every connection they acquire, and connects are
+counted with the connect pool event, which also fires when a connection is reopened.
+Long waits and timeouts mean bursts exceed DB_POOL_SIZE + DB_MAX_OVERFLOW, a growing number
+of connects means connections are dropped and reopened, e.g. because DB_POOL_RECYCLE exceeds
+an idle timeout of the server.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from flask import Flask
+from sqlalchemy import event, exc
+from sqlalchemy.pool import Pool, PoolProxiedConnection, QueuePool
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool measuring the time checkouts take to get a connection."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self.n_checkouts = 0
+        self.n_timeouts = 0
+        self.n_connects = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        event.listen(self, "connect", self._count_connect)
+
+    def _count_connect(self, dbapi_connection: Any, connection_record: Any) -> None:
+        with self._metrics_lock:
+            self.n_connects += 1
+
+    def recreate(self) -> "TimedQueuePool":
+        """Return new pool with the same options and event listeners, e.g. on engine.dispose.
+
+        The counting listener of this pool is left out, the new pool registers its own, so that
+        connects of the new pool are not counted on this one as well.
+
+        :return: new pool
+        """
+        event.remove(self, "connect", self._count_connect)
+        try:
+            return super().recreate()
+        finally:
+            # connections still checked out from this pool may be reopened
+            event.listen(self, "connect", self._count_connect)
+
+    def connect(self) -> PoolProxiedConnection:
+        """Check out a connection, counting the checkout and the time it took.
+
+        :raise: TimeoutError if no connection became available within the pool timeout
+        :return: proxied dbapi connection
+        """
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            with self._metrics_lock:
+                self.n_timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._metrics_lock:
+                self.n_checkouts += 1
+                self.wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+
+def pool_metrics(pool: Pool) -> Dict[str, Optional[float]]:
+    """Return occupancy and counters of a connection pool since the worker started.
+
+    :param pool: pool of an engine
+    :return: metrics, None where the pool class does not provide them
+    """
+    metrics: Dict[str, Optional[float]] = dict.fromkeys(
+        (
+            "size",
+            "checkedOut",
+            "overflow",
+            "checkouts",
+            "timeouts",
+            "connects",
+            "waitMsTotal",
+            "waitMsMax",
+        )
+    )
+    if isinstance(pool, QueuePool):
+        metrics.update(
+            size=pool.size(), checkedOut=pool.checkedout(), overflow=pool.overflow()
+        )
+    if isinstance(pool, TimedQueuePool):
+        with pool._metrics_lock:
+            metrics.update(
+                checkouts=pool.n_checkouts,
+                timeouts=pool.n_timeouts,
+                connects=pool.n_connects,
+                waitMsTotal=pool.wait_seconds * 1000,
+                waitMsMax=pool.max_wait_seconds * 1000,
+            )
+    return metrics
+
+
+def with_timed_pool(options: Dict[str, Any]) -> Dict[str, Any]:
+    """Return engine options using TimedQueuePool if they configure a queue pool.
+
+    :param options: keyword arguments of create_engine
+    :return: options, copied if changed as they may be shared with the config class
+    """
+    if "pool_size" in options and "poolclass" not in options:
+        return {**options, "poolclass": TimedQueuePool}
+    return options
+
+
+def use_timed_pool(app: Flask) -> None:
+    """Measure the pool of app if it is configured as a queue pool, call before db.init_app.
+
+    :param app: flask app
+    """
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = with_timed_pool(
+        app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+    )
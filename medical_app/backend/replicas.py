@@ -0,0 +1,104 @@
+"""Route reads of safe requests to read replicas, everything else to the primary database.
+
+Replicas are configured in SQLALCHEMY_REPLICAS, see Config.replica_binds. Their engines are
+not binds of db, no model is bound to them. Instead db.session picks them per statement:
+selects issued while handling a GET or HEAD request go to a replica chosen at random per
+request, flushes and statements of all other requests go to the primary.
+
+Replicas lag behind the primary, so a client would not see its own changes right after
+making them. A successful mutation therefore sets a cookie that makes the reads of that
+client go to the primary for REPLICA_STICKY_SECONDS.
+"""
+
+import random
+import time
+from typing import Any, Optional, Union
+
+from flask import Flask, Response, current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Connection, Engine, Select, create_engine
+
+from medical_app.backend.pool_metrics import with_timed_pool
+
+STICKY_COOKIE = "read_primary_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def read_from_primary() -> None:
+    """Send the remaining reads of the current request to the primary."""
+    if has_request_context():
+        g.pop("replica_key", None)
+
+
+class RoutingSession(Session):
+    """Session sending selects to a replica if the current request may read from one."""
+
+    def get_bind(
+        self,
+        mapper: Optional[Any] = None,
+        clause: Optional[Any] = None,
+        bind: Optional[Union[Engine, Connection]] = None,
+        **kwargs: Any,
+    ) -> Union[Engine, Connection]:
+        if (
+            bind is None
+            and not self._flushing
+            and isinstance(clause, Select)
+            and clause._for_update_arg is None
+            and has_request_context()
+            and g.get("replica_key") is not None
+        ):
+            return current_app.extensions["read_replicas"][g.replica_key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReadReplicas:
+    """Decide per request whether its reads may go to a replica, see module docstring."""
+
+    def init_app(self, app: Flask) -> None:
+        """Create the replica engines of app and register its request hooks.
+
+        :param app: flask app
+        """
+        # options hold the url and the keyword arguments of create_engine
+        app.extensions["read_replicas"] = {
+            key: create_engine(**with_timed_pool(options))
+            for key, options in app.config.get("SQLALCHEMY_REPLICAS", {}).items()
+        }
+        app.before_request(self._route_reads)
+        app.after_request(self._stick_to_primary)
+        app.teardown_request(self._reset)
+
+    @staticmethod
+    def _route_reads() -> None:
+        read_primary_until = request.cookies.get(STICKY_COOKIE, "")
+        keys = list(current_app.extensions["read_replicas"])
+        if (
+            keys
+            and request.method in SAFE_METHODS
+            and not (
+                read_primary_until.isdigit() and int(read_primary_until) > time.time()
+            )
+        ):
+            g.replica_key = random.choice(keys)
+
+    @staticmethod
+    def _stick_to_primary(response: Response) -> Response:
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and current_app.extensions["read_replicas"]
+        ):
+            sticky_seconds = current_app.config["REPLICA_STICKY_SECONDS"]
+            response.set_cookie(
+                STICKY_COOKIE,
+                str(int(time.time()) + sticky_seconds),
+                max_age=sticky_seconds,
+                httponly=True,
+            )
+        return response
+
+    @staticmethod
+    def _reset(error: Optional[BaseException]) -> None:
+        # tests share one app context, and thereby g, across requests
+        g.pop("replica_key", None)
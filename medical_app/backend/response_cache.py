@@ -0,0 +1,429 @@
+"""Cache of json responses of public read endpoints, invalidated by writes.
+
+Entries are keyed on path and query args and carry tags, e.g. ``medic:1`` for every response
+that contains medic 1. Writes invalidate tags instead of keys, so a patched medic drops both
+its own entry and every cached page listing it.
+
+A backend is selected with a single uri-like setting (see :func:`cache_backend_from_uri`):
+
+* ``memory://`` -- in-process LRU, each worker keeps and invalidates its own entries. A write
+  handled by one worker does not reach the entries of the others, which serve stale responses
+  until their entries expire, so this is only consistent with a single worker process.
+* ``sqlite:////var/cache/medical-app/responses.db`` -- file shared by all workers of a host
+
+Entries expire ttl seconds after they were cached, which bounds how long stale responses are
+served by workers or hosts that missed an invalidation.
+"""
+
+import functools
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+from urllib.parse import unquote, urlencode, urlparse
+
+from flask import Flask, Response, current_app, request
+
+from medical_app.backend.replicas import read_from_primary
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: Optional[str] = None
+
+
+class CacheBackend(ABC):
+    """Store of response bodies, counting hits and misses of lookups.
+
+    Entries expire ttl seconds after they were set, never if ttl is None.
+    """
+
+    def __init__(self, ttl: Optional[float] = None) -> None:
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # guards the counters, and the entries of backends held in memory
+        self._lock = threading.Lock()
+
+    def _expires_at(self) -> float:
+        # wall clock time, as expiry times are shared between processes by the sqlite backend
+        return time.time() + self.ttl if self.ttl is not None else float("inf")
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Return cached response of key, counted as hit or miss.
+
+        :param key: cache key
+        :return: response or None on cache miss
+        """
+
+    def _count_lookup(
+        self, response: Optional[CachedResponse]
+    ) -> Optional[CachedResponse]:
+        # callers hold self._lock, so that concurrent lookups do not lose counts
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return response
+
+    @property
+    def hit_ratio(self) -> float:
+        """Share of lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @abstractmethod
+    def generation(self) -> int:
+        """Return counter that is incremented by every invalidation."""
+
+    @abstractmethod
+    def set(
+        self,
+        key: str,
+        response: CachedResponse,
+        tags: Iterable[str],
+        generation: int,
+    ) -> None:
+        """Cache response under key, unless an invalidation happened since generation was read.
+
+        Reading the generation before querying the database and passing it here keeps a slow
+        request from caching data that a concurrent write already invalidated.
+
+        :param key: cache key
+        :param response: body and entity tag of the response
+        :param tags: tags whose invalidation drops the entry
+        :param generation: value of :meth:`generation` before the response was computed
+        """
+
+    @abstractmethod
+    def invalidate(self, *tags: str) -> None:
+        """Drop all entries carrying any of the tags.
+
+        :param tags: tags to invalidate
+        """
+
+
+class LRUCacheBackend(CacheBackend):
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None) -> None:
+        super().__init__(ttl)
+        self.maxsize = maxsize
+        # response, tags and expiry time by key
+        self._entries: OrderedDict[str, Tuple[CachedResponse, Set[str], float]] = (
+            OrderedDict()
+        )
+        self._keys_by_tag: Dict[str, Set[str]] = {}
+        self._generation = 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return self._count_lookup(None)
+            if entry[2] <= time.time():
+                self._remove(key)
+                return self._count_lookup(None)
+            self._entries.move_to_end(key)
+            return self._count_lookup(entry[0])
+
+    def generation(self) -> int:
+        return self._generation
+
+    def set(
+        self,
+        key: str,
+        response: CachedResponse,
+        tags: Iterable[str],
+        generation: int,
+    ) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._remove(key)
+            tags = set(tags)
+            self._entries[key] = (response, tags, self._expires_at())
+            for tag in tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, *tags: str) -> None:
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                for key in self._keys_by_tag.pop(tag, set()):
+                    self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[1]:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """Backend in a sqlite file, shared by all processes opening the same path.
+
+    Once more than maxsize entries are stored, the oldest ones are evicted first.
+    """
+
+    def __init__(
+        self, path: str, maxsize: int = 1024, ttl: Optional[float] = None
+    ) -> None:
+        super().__init__(ttl)
+        self.path = path
+        self.maxsize = maxsize
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    key TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, expires_at REAL
+                );
+                CREATE TABLE IF NOT EXISTS response_cache_tag (
+                    tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key)
+                );
+                CREATE INDEX IF NOT EXISTS ix_response_cache_tag_key
+                    ON response_cache_tag (key);
+                CREATE TABLE IF NOT EXISTS response_cache_generation (
+                    id INTEGER PRIMARY KEY CHECK (id = 0), generation INTEGER NOT NULL
+                );
+                INSERT OR IGNORE INTO response_cache_generation VALUES (0, 0);
+                """)
+            # files created before entries expired get the column, their entries are dropped
+            columns = {
+                row[1]
+                for row in connection.execute("PRAGMA table_info(response_cache)")
+            }
+            if "expires_at" not in columns:
+                connection.execute(
+                    "ALTER TABLE response_cache ADD COLUMN expires_at REAL"
+                )
+
+    @contextmanager
+    def _connect(self, write: bool = False) -> Iterator[sqlite3.Connection]:
+        # a connection per operation, as workers may run requests in several threads
+        connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        try:
+            if write:
+                # lock the file before reading the generation, so that set cannot race invalidate
+                connection.execute("BEGIN IMMEDIATE")
+            yield connection
+            if write:
+                connection.execute("COMMIT")
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT body, etag FROM response_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        with self._lock:
+            return self._count_lookup(CachedResponse(*row) if row else None)
+
+    def generation(self) -> int:
+        with self._connect() as connection:
+            return connection.execute(
+                "SELECT generation FROM response_cache_generation"
+            ).fetchone()[0]
+
+    def set(
+        self,
+        key: str,
+        response: CachedResponse,
+        tags: Iterable[str],
+        generation: int,
+    ) -> None:
+        with self._connect(write=True) as connection:
+            if (
+                generation
+                != connection.execute(
+                    "SELECT generation FROM response_cache_generation"
+                ).fetchone()[0]
+            ):
+                return
+            self._remove(connection, [key])
+            connection.execute(
+                "INSERT INTO response_cache (key, body, etag, expires_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, *response, self._expires_at()),
+            )
+            connection.executemany(
+                "INSERT INTO response_cache_tag (tag, key) VALUES (?, ?)",
+                [(tag, key) for tag in set(tags)],
+            )
+            evicted_keys = [
+                row[0]
+                for row in connection.execute(
+                    "SELECT key FROM response_cache ORDER BY rowid LIMIT max(0, "
+                    "(SELECT count(*) FROM response_cache) - ?)",
+                    (self.maxsize,),
+                )
+            ]
+            self._remove(connection, evicted_keys)
+
+    def invalidate(self, *tags: str) -> None:
+        with self._connect(write=True) as connection:
+            connection.execute(
+                "UPDATE response_cache_generation SET generation = generation + 1"
+            )
+            keys = [
+                row[0]
+                for row in connection.execute(
+                    "SELECT key FROM response_cache_tag WHERE tag IN "
+                    f"({', '.join('?' * len(tags))})",
+                    tags,
+                )
+            ]
+            self._remove(connection, keys)
+
+    @staticmethod
+    def _remove(connection: sqlite3.Connection, keys: Iterable[str]) -> None:
+        parameters = [(key,) for key in keys]
+        connection.executemany("DELETE FROM response_cache WHERE key = ?", parameters)
+        connection.executemany(
+            "DELETE FROM response_cache_tag WHERE key = ?", parameters
+        )
+
+
+def cache_backend_from_uri(
+    uri: str, maxsize: int = 1024, ttl: Optional[float] = None
+) -> CacheBackend:
+    """Return cache backend for a uri of scheme memory or sqlite.
+
+    :param uri: backend to use, memory:// or sqlite:///<path>
+    :param maxsize: maximal number of cached responses
+    :param ttl: seconds until cached responses expire, None to keep them until invalidated
+    :raise: ValueError for unsupported schemes
+    :return: cache backend
+    """
+    parsed_uri = urlparse(uri)
+    if parsed_uri.scheme == "memory":
+        return LRUCacheBackend(maxsize, ttl)
+    elif parsed_uri.scheme == "sqlite":
+        return SQLiteCacheBackend(unquote(parsed_uri.path), maxsize, ttl)
+    raise ValueError(f"Unsupported response cache backend {uri}")
+
+
+class ResponseCache:
+    """Flask extension caching successful json responses of decorated views.
+
+    The backend is built per app from RESPONSE_CACHE_URI, RESPONSE_CACHE_SIZE and
+    RESPONSE_CACHE_TTL, a size of 0 disables caching, a ttl of 0 disables expiry.
+    Responses carry an X-Cache header of HIT or MISS. Cached responses keep their ETag
+    and are answered with 304 if If-None-Match matches.
+    """
+
+    def init_app(self, app: Flask, backend: Optional[CacheBackend] = None) -> None:
+        """Register cache backend of app.
+
+        :param app: flask app
+        :param backend: backend to use instead of the one configured
+        """
+        if backend is None and app.config["RESPONSE_CACHE_SIZE"] > 0:
+            backend = cache_backend_from_uri(
+                app.config["RESPONSE_CACHE_URI"],
+                app.config["RESPONSE_CACHE_SIZE"],
+                app.config["RESPONSE_CACHE_TTL"] or None,
+            )
+        app.extensions["response_cache"] = backend
+
+    @property
+    def backend(self) -> Optional[CacheBackend]:
+        """Cache backend of the current app, None if caching is disabled."""
+        return current_app.extensions["response_cache"]
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return lookup counts of the backend of the current app, None if caching is disabled.
+
+        Counts are kept per process, like the entries of the memory backend.
+
+        :return: metrics by camel case name
+        """
+        backend = self.backend
+        if backend is None:
+            return {"enabled": False, "hits": None, "misses": None, "hitRatio": None}
+        return {
+            "enabled": True,
+            "hits": backend.hits,
+            "misses": backend.misses,
+            "hitRatio": backend.hit_ratio,
+        }
+
+    def cached(
+        self, tags: Callable[[Dict[str, Any]], Iterable[str]]
+    ) -> Callable[[Callable], Callable]:
+        """Decorate view to serve its successful responses from the cache.
+
+        :param tags: function returning the tags of an entry from the json body of the response
+        :return: decorator
+        """
+
+        def decorator(view: Callable) -> Callable:
+            @functools.wraps(view)
+            def wrapper(*args: Any, **kwargs: Any) -> Response:
+                backend = self.backend
+                if backend is None:
+                    return view(*args, **kwargs)
+                key = f"{request.path}?{urlencode(sorted(request.args.items(True)))}"
+                cached_response = backend.get(key)
+                if cached_response is not None:
+                    response = Response(
+                        cached_response.body,
+                        mimetype="application/json",
+                        headers={"X-Cache": "HIT"},
+                    )
+                    if cached_response.etag:
+                        response.set_etag(cached_response.etag)
+                    return response.make_conditional(request)
+                generation = backend.generation()
+                # a lagging replica would cache stale responses until the next invalidation
+                read_from_primary()
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code == 200:
+                    backend.set(
+                        key,
+                        CachedResponse(response.get_data(), response.get_etag()[0]),
+                        tags(response.json),
+                        generation,
+                    )
+                response.headers["X-Cache"] = "MISS"
+                return response
+
+            return wrapper
+
+        return decorator
+
+    def invalidate(self, *tags: str) -> None:
+        """Drop all cached responses carrying any of the tags.
+
+        :param tags: tags to invalidate
+        """
+        if self.backend is not None:
+            self.backend.invalidate(*tags)
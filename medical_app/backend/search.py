@@ -0,0 +1,63 @@
+"""Ranked full text search over the title and description of records.
+
+Postgres matches the search terms against the gin indexed tsvector of each record, sqlite
+against its fts5 table, see models.py. Both stem english words, so ``asthmatic`` also finds
+``asthma``, and require all terms to match. Terms are passed as data on both databases,
+user input can never change the syntax of the query.
+"""
+
+from typing import List
+
+from sqlalchemy import Select, column, func, table
+
+from medical_app.backend.models import RECORD_SEARCH_DOCUMENT, Record
+
+# upper bound of the length of search queries, in characters
+MAX_QUERY_LENGTH = 256
+
+record_search = table("record_search", column("rowid"), column("rank"))
+
+
+def parse_search_terms(query: str) -> List[str]:
+    """Split search query into terms.
+
+    :param query: search query, e.g. asthma inhaler
+    :raise: ValueError if the query is empty or too long
+    :return: terms, all of which have to match
+    """
+    if len(query) > MAX_QUERY_LENGTH:
+        raise ValueError(f"Search query longer than {MAX_QUERY_LENGTH} characters")
+    terms = query.split()
+    if not terms:
+        raise ValueError("Empty search query")
+    return terms
+
+
+def _fts5_query(terms: List[str]) -> str:
+    # each term as fts5 string, so operators and special characters are matched literally
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def match_records(statement: Select, terms: List[str], dialect_name: str) -> Select:
+    """Restrict select of records to those matching all terms, the best matches first.
+
+    :param statement: select of record columns
+    :param terms: search terms, see parse_search_terms
+    :param dialect_name: name of the database dialect, postgresql or sqlite
+    :raise: NotImplementedError for other databases
+    :return: select of matching records ordered by rank, ties broken by id
+    """
+    if dialect_name == "postgresql":
+        # plainto_tsquery ignores operators in its input and combines the terms with and
+        query = func.plainto_tsquery("english", " ".join(terms))
+        return statement.where(RECORD_SEARCH_DOCUMENT.bool_op("@@")(query)).order_by(
+            func.ts_rank_cd(RECORD_SEARCH_DOCUMENT, query).desc(), Record.id
+        )
+    if dialect_name == "sqlite":
+        # rank is bm25 of the match, lower is better
+        return (
+            statement.join(record_search, record_search.c.rowid == Record.id)
+            .where(column("record_search").bool_op("MATCH")(_fts5_query(terms)))
+            .order_by(record_search.c.rank, Record.id)
+        )
+    raise NotImplementedError(f"Full text search is not supported on {dialect_name}")
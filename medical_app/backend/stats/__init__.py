@@ -0,0 +1,10 @@
+from flask import Blueprint
+
+bp = Blueprint("stats", __name__, url_prefix="/stats")
+
+# ignore flake8 issues:
+# routes appears unused, but is used in flask blueprint (F401)
+# import not at top of module, because bp has to be initialized first (E402)
+# trunk-ignore(flake8/F401)
+# trunk-ignore(flake8/E402)
+from medical_app.backend.stats import routes
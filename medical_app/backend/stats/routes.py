@@ -0,0 +1,187 @@
+from typing import Any, Dict, Optional
+
+import click
+from flask import Response, abort, jsonify, request
+from sqlalchemy import Row, func, select
+
+from medical_app.backend import db, require_auth
+from medical_app.backend.api_helper_functions import paginate_query
+from medical_app.backend.models import Medic, Patient, association_table
+from medical_app.backend.stats import bp
+from medical_app.backend.stats.summary import rebuild_summary, stats_source
+
+SECONDS_PER_DAY = 86400
+
+
+def average_days(symptom_seconds: Optional[int], n_finished: Optional[int]) -> Any:
+    """Return average symptom duration in days.
+
+    :param symptom_seconds: sum of the symptom durations of finished records
+    :param n_finished: number of finished records
+    :return: average duration, None without finished records
+    """
+    if not n_finished:
+        return None
+    return symptom_seconds / n_finished / SECONDS_PER_DAY
+
+
+def format_patient_stats(row: Row) -> Dict[str, Any]:
+    """Return dict representation of the aggregates of the records of a patient.
+
+    :param row: row of the stats source
+    :return: dict representation to be jsonified
+    """
+    return {
+        "patientId": row.patient_id,
+        "records": row.n_records,
+        "ongoingRecords": row.n_ongoing,
+        "averageSymptomDurationDays": average_days(row.symptom_seconds, row.n_finished),
+    }
+
+
+def get_page_args() -> Dict[str, Any]:
+    """Return offset, limit and after query args of a paginated request.
+
+    :return: keyword arguments of paginate_query
+    """
+    offset = request.args.get("offset", 0, type=int)
+    limit = request.args.get("limit", 10, type=int)
+    after = request.args.get("after", None, type=int)
+    if offset < 0 or limit < 1:
+        abort(422)
+    return {"offset": offset, "limit": limit, "after": after}
+
+
+@bp.route("/records", methods=["GET"])
+@require_auth("get:records")
+def get_record_stats() -> Response:
+    """Get number of records, ongoing records and average symptom duration of all records.
+
+    :return: flask response
+    """
+    source = stats_source()
+    row = db.session.execute(
+        select(
+            func.count(source.c.patient_id).label("n_patients"),
+            func.coalesce(func.sum(source.c.n_records), 0).label("n_records"),
+            func.coalesce(func.sum(source.c.n_ongoing), 0).label("n_ongoing"),
+            func.sum(source.c.n_finished).label("n_finished"),
+            func.sum(source.c.symptom_seconds).label("symptom_seconds"),
+        )
+    ).one()
+    return jsonify(
+        {
+            "status": "success",
+            "data": {
+                "patients": row.n_patients,
+                "records": row.n_records,
+                "ongoingRecords": row.n_ongoing,
+                "averageSymptomDurationDays": average_days(
+                    row.symptom_seconds, row.n_finished
+                ),
+            },
+        }
+    )
+
+
+@bp.route("/patients", methods=["GET"])
+@require_auth("get:records")
+def get_patients_stats() -> Response:
+    """Get aggregates of the records of each patient with records, ordered by patient id.
+
+    :return: flask response
+    """
+    source = stats_source()
+    rows, next_cursor = paginate_query(
+        select(source), source.c.patient_id, **get_page_args()
+    )
+    return jsonify(
+        {
+            "status": "success",
+            "data": [format_patient_stats(row) for row in rows],
+            "next": next_cursor,
+        }
+    )
+
+
+@bp.route("/patients/<int:patient_id>", methods=["GET"])
+@require_auth("get:records")
+def get_patient_stats(patient_id: int) -> Response:
+    """Get aggregates of the records of a patient, zeros if the patient has no records.
+
+    :param patient_id: id of patient
+    :return: flask response
+    """
+    source = stats_source()
+    row = db.session.execute(
+        select(source).where(source.c.patient_id == patient_id)
+    ).one_or_none()
+    if row:
+        return jsonify({"status": "success", "data": format_patient_stats(row)})
+    if not db.session.scalar(select(Patient.id).where(Patient.id == patient_id)):
+        abort(404)
+    else:
+        return jsonify(
+            {
+                "status": "success",
+                "data": {
+                    "patientId": patient_id,
+                    "records": 0,
+                    "ongoingRecords": 0,
+                    "averageSymptomDurationDays": None,
+                },
+            }
+        )
+
+
+@bp.route("/medics", methods=["GET"])
+@require_auth("get:records")
+def get_medics_stats() -> Response:
+    """Get number of patients and of their records and ongoing records of each medic.
+
+    Only the aggregates of the medics of the requested page are computed.
+
+    :return: flask response
+    """
+    medic_rows, next_cursor = paginate_query(
+        select(Medic.id), Medic.id, **get_page_args()
+    )
+    medic_ids = [row.id for row in medic_rows]
+    source = stats_source()
+    rows = db.session.execute(
+        select(
+            association_table.c.medic_id,
+            func.count(association_table.c.patient_id).label("n_patients"),
+            func.coalesce(func.sum(source.c.n_records), 0).label("n_records"),
+            func.coalesce(func.sum(source.c.n_ongoing), 0).label("n_ongoing"),
+        )
+        .outerjoin(source, source.c.patient_id == association_table.c.patient_id)
+        .where(association_table.c.medic_id.in_(medic_ids))
+        .group_by(association_table.c.medic_id)
+    )
+    rows_by_medic = {row.medic_id: row for row in rows}
+    return jsonify(
+        {
+            "status": "success",
+            "data": [
+                {
+                    "medicId": medic_id,
+                    "patients": row.n_patients if row else 0,
+                    "records": row.n_records if row else 0,
+                    "ongoingRecords": row.n_ongoing if row else 0,
+                }
+                for medic_id, row in (
+                    (medic_id, rows_by_medic.get(medic_id)) for medic_id in medic_ids
+                )
+            ],
+            "next": next_cursor,
+        }
+    )
+
+
+@bp.cli.command("rebuild")
+def rebuild_summary_command() -> None:
+    """Recompute the record stats summary table from all records."""
+    n_patients = rebuild_summary()
+    db.session.commit()
+    click.echo(f"Summarized the records of {n_patients} patients")
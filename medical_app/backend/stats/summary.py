@@ -0,0 +1,237 @@
+"""Aggregates of records, computed with GROUP BY or read from the materialized summary table.
+
+PatientRecordStats holds per patient counts and symptom duration sums. It is kept up to date
+within the transaction of every change of records: flushed inserts, updates and deletes of
+Record instances, including those cascaded from deleted patients, and ORM bulk inserts like
+Record.insert_many. Writes bypassing the session, e.g. benchmarks/seed.py, have to be followed
+by rebuild_summary.
+
+Both sources provide the same columns, so the stats endpoints query either of them with the
+same statements and reads stay flat as the number of records grows.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from flask import current_app
+from sqlalchemy import (
+    BigInteger,
+    Connection,
+    Insert,
+    Subquery,
+    Table,
+    case,
+    cast,
+    delete,
+    event,
+    extract,
+    func,
+    insert,
+    inspect,
+    select,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import ORMExecuteState, Session, UOWTransaction
+
+from medical_app.backend import db
+from medical_app.backend.models import PatientRecordStats, Record
+
+SUMMARY_COLUMNS = ("n_records", "n_ongoing", "n_finished", "symptom_seconds")
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+summary_table: Table = PatientRecordStats.__table__
+
+
+def symptom_seconds(dialect_name: str) -> Any:
+    """Return sql expression of the symptom duration of records in whole seconds.
+
+    :param dialect_name: name of the database dialect, postgresql or sqlite
+    :return: expression, null for ongoing records
+    """
+    onset, offset = Record.date_symptom_onset, Record.date_symptom_offset
+    if dialect_name == "postgresql":
+        return cast(extract("epoch", offset - onset), BigInteger)
+    return cast(
+        func.round((func.julianday(offset) - func.julianday(onset)) * 86400),
+        BigInteger,
+    )
+
+
+def aggregate_records(dialect_name: str) -> Subquery:
+    """Return GROUP BY over records with the columns of the summary table.
+
+    :param dialect_name: name of the database dialect, postgresql or sqlite
+    :return: subquery with one row per patient with records
+    """
+    return (
+        select(
+            Record.patient_id.label("patient_id"),
+            func.count(Record.id).label("n_records"),
+            func.count(case((Record.date_symptom_offset.is_(None), 1))).label(
+                "n_ongoing"
+            ),
+            func.count(Record.date_symptom_offset).label("n_finished"),
+            func.coalesce(func.sum(symptom_seconds(dialect_name)), 0).label(
+                "symptom_seconds"
+            ),
+        )
+        .group_by(Record.patient_id)
+        .subquery("record_stats")
+    )
+
+
+def stats_source() -> Any:
+    """Return the summary table, or the GROUP BY over records if it is disabled.
+
+    :return: selectable with the columns of PatientRecordStats
+    """
+    if current_app.config["STATS_FROM_SUMMARY"]:
+        return summary_table
+    return aggregate_records(db.session.get_bind().dialect.name)
+
+
+def rebuild_summary() -> int:
+    """Recompute the summary table from all records, in the current transaction.
+
+    :return: number of patients with records
+    """
+    aggregates = aggregate_records(db.session.get_bind().dialect.name)
+    db.session.execute(delete(summary_table))
+    result = db.session.execute(
+        insert(summary_table).from_select(
+            ["patient_id", *SUMMARY_COLUMNS], select(aggregates)
+        )
+    )
+    return result.rowcount
+
+
+def _record_delta(
+    patient_id: Optional[int],
+    onset: Optional[datetime],
+    offset: Optional[datetime],
+    sign: int,
+    deltas: Dict[int, List[int]],
+) -> None:
+    if patient_id is None:
+        return
+    delta = deltas[patient_id]
+    delta[0] += sign
+    if offset is None:
+        delta[1] += sign
+    else:
+        delta[2] += sign
+        delta[3] += sign * round((offset - onset).total_seconds())
+
+
+def _apply_deltas(connection: Connection, deltas: Dict[int, List[int]]) -> None:
+    deltas = {patient_id: delta for patient_id, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+    upsert: Insert = UPSERT_INSERTS[connection.dialect.name](summary_table)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[summary_table.c.patient_id],
+        set_={
+            name: summary_table.c[name] + upsert.excluded[name]
+            for name in SUMMARY_COLUMNS
+        },
+    )
+    connection.execute(
+        upsert,
+        [
+            {"patient_id": patient_id, **dict(zip(SUMMARY_COLUMNS, delta))}
+            for patient_id, delta in deltas.items()
+        ],
+    )
+    connection.execute(
+        delete(summary_table).where(
+            summary_table.c.patient_id.in_(deltas), summary_table.c.n_records <= 0
+        )
+    )
+
+
+def _history_value(record: Record, attribute_name: str) -> Any:
+    history = inspect(record).attrs[attribute_name].history
+    if history.deleted:
+        return history.deleted[0]
+    return history.unchanged[0] if history.unchanged else None
+
+
+def _load_replaced_value(
+    record: Record, value: Any, old_value: Any, initiator: Any
+) -> None:
+    # registering with active_history loads the replaced value of expired attributes, so
+    # the history of changed records tells which aggregates they have to be removed from
+    pass
+
+
+for _attribute in (
+    Record.patient_id,
+    Record.date_symptom_onset,
+    Record.date_symptom_offset,
+):
+    event.listen(_attribute, "set", _load_replaced_value, active_history=True)
+
+
+@event.listens_for(Session, "after_flush")
+def _update_summary_after_flush(session: Session, context: UOWTransaction) -> None:
+    deltas: Dict[int, List[int]] = defaultdict(lambda: [0, 0, 0, 0])
+    for record in session.new:
+        if isinstance(record, Record):
+            _record_delta(
+                record.patient_id,
+                record.date_symptom_onset,
+                record.date_symptom_offset,
+                1,
+                deltas,
+            )
+    for record in session.dirty:
+        if isinstance(record, Record) and session.is_modified(record):
+            _record_delta(
+                _history_value(record, "patient_id"),
+                _history_value(record, "date_symptom_onset"),
+                _history_value(record, "date_symptom_offset"),
+                -1,
+                deltas,
+            )
+            _record_delta(
+                record.patient_id,
+                record.date_symptom_onset,
+                record.date_symptom_offset,
+                1,
+                deltas,
+            )
+    for record in session.deleted:
+        if isinstance(record, Record):
+            _record_delta(
+                _history_value(record, "patient_id"),
+                _history_value(record, "date_symptom_onset"),
+                _history_value(record, "date_symptom_offset"),
+                -1,
+                deltas,
+            )
+    _apply_deltas(session.connection(), deltas)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _update_summary_on_bulk_insert(orm_execute_state: ORMExecuteState) -> None:
+    # ORM bulk inserts, e.g. Record.insert_many, bypass the flush
+    if not (
+        orm_execute_state.is_insert
+        and orm_execute_state.bind_mapper is not None
+        and orm_execute_state.bind_mapper.class_ is Record
+    ):
+        return
+    parameters: Iterable[Dict[str, Any]] = orm_execute_state.parameters or []
+    if isinstance(parameters, dict):
+        parameters = [parameters]
+    deltas: Dict[int, List[int]] = defaultdict(lambda: [0, 0, 0, 0])
+    for row in parameters:
+        _record_delta(
+            row.get("patient_id"),
+            row.get("date_symptom_onset"),
+            row.get("date_symptom_offset"),
+            1,
+            deltas,
+        )
+    _apply_deltas(orm_execute_state.session.connection(), deltas)
@@ -51,6 +51,20 @@ def get_metadata():
     return target_db.metadata
 
 
+def include_name(name, type_, parent_names):
+    # fts5 table of the sqlite search fallback and its shadow tables, see models.py
+    if type_ == 'table':
+        return not name.startswith('record_search')
+    return True
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    # the full text search index is only created on postgres, see models.py
+    if type_ == 'index' and name == 'ix_record_search':
+        return context.get_bind().dialect.name == 'postgresql'
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -65,7 +79,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_name=include_name, include_object=include_object
     )
 
     with context.begin_transaction():
@@ -97,6 +112,8 @@ def run_migrations_online():
             connection=connection,
             target_metadata=get_metadata(),
             process_revision_directives=process_revision_directives,
+            include_name=include_name,
+            include_object=include_object,
             **current_app.extensions['migrate'].configure_args
         )
 
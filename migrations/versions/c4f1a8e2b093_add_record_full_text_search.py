@@ -0,0 +1,68 @@
+"""add record full text search
+
+Revision ID: c4f1a8e2b093
+Revises: 7d3a9c1e5f82
+Create Date: 2026-10-18 22:40:13.508316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f1a8e2b093'
+down_revision = '7d3a9c1e5f82'
+branch_labels = None
+depends_on = None
+
+RECORD_SEARCH_SQLITE_DDL = (
+    """CREATE VIRTUAL TABLE record_search USING fts5(
+        title, description, content='record', content_rowid='id',
+        tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER record_search_insert AFTER INSERT ON record BEGIN
+        INSERT INTO record_search(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER record_search_delete AFTER DELETE ON record BEGIN
+        INSERT INTO record_search(record_search, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER record_search_update AFTER UPDATE OF title, description ON record
+    BEGIN
+        INSERT INTO record_search(record_search, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO record_search(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+)
+
+
+def upgrade():
+    # postgres searches a gin index over the tsvector of title and description, sqlite an
+    # fts5 table synced by triggers. Batch migrations recreating record on sqlite have to
+    # recreate the triggers as well.
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == 'postgresql':
+        op.create_index(
+            'ix_record_search',
+            'record',
+            [sa.text("to_tsvector('english'::regconfig, title || ' ' || description)")],
+            unique=False,
+            postgresql_using='gin',
+        )
+    elif dialect_name == 'sqlite':
+        for statement in RECORD_SEARCH_SQLITE_DDL:
+            op.execute(statement)
+        # index the existing records
+        op.execute("INSERT INTO record_search(record_search) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == 'postgresql':
+        op.drop_index('ix_record_search', table_name='record', postgresql_using='gin')
+    elif dialect_name == 'sqlite':
+        for trigger in ('record_search_insert', 'record_search_delete', 'record_search_update'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS record_search')
@@ -1,7 +1,14 @@
 import datetime
+import json
 import os
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, List
 
 import pytest
+from authlib.jose import JsonWebKey
+from sqlalchemy import event
 
 from config import TestConfigMedicRole, TestConfigPatientRole
 from medical_app.backend import create_app, db
@@ -81,3 +88,90 @@ def populate_test_db():
     db.session.add(record_1)
     patient_3.records.append(record_1)
     db.session.commit()
+
+
+class StatementCounter:
+    """Collect sql statements sent to the database while active."""
+
+    def __init__(self) -> None:
+        self.statements: List[str] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@pytest.fixture()
+def count_statements(app):
+    """Return context manager counting the sql statements executed within it.
+
+    The session is cleared upfront, so no entity is served from the identity map.
+    """
+
+    @contextmanager
+    def _count_statements() -> Iterator[StatementCounter]:
+        db.session.expunge_all()
+        counter = StatementCounter()
+        event.listen(db.engine, "before_cursor_execute", counter)
+        try:
+            yield counter
+        finally:
+            event.remove(db.engine, "before_cursor_execute", counter)
+
+    return _count_statements
+
+
+class StubJWKSServer(ThreadingHTTPServer):
+    """Local http server publishing a json web key set, counting the requests."""
+
+    def __init__(self) -> None:
+        self.keys: List[dict] = []
+        self.n_requests = 0
+        # status of the responses, e.g. 503 to let fetches of the key set fail
+        self.status = 200
+        super().__init__(("127.0.0.1", 0), StubJWKSRequestHandler)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/.well-known/jwks.json"
+
+    def add_key(self, kid: str):
+        """Generate a private key and publish its public part.
+
+        :param kid: key id
+        :return: private key to sign tokens with
+        """
+        key = JsonWebKey.generate_key(
+            "RSA", 2048, is_private=True, options={"kid": kid}
+        )
+        self.keys.append(key.as_dict(is_private=False))
+        return key
+
+
+class StubJWKSRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        self.server.n_requests += 1
+        if self.server.status != 200:
+            self.send_error(self.server.status)
+            return
+        body = json.dumps({"keys": self.server.keys}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+@pytest.fixture()
+def jwks_server() -> Iterator[StubJWKSServer]:
+    server = StubJWKSServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
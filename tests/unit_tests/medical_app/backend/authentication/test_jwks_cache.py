@@ -0,0 +1,181 @@
+import os
+import threading
+import time
+
+import pytest
+from authlib.jose import JsonWebKey, jwt
+
+from medical_app.backend.authentication.authentication_decorator import (
+    Auth0JWTBearerTokenValidator,
+)
+from medical_app.backend.authentication.jwks_cache import JWKSCache
+from medical_app.backend.authentication.key_sources import URLKeySource
+
+
+def test_construction_does_not_fetch(jwks_server) -> None:
+    """Test creating cache and validator does no network io.
+
+    :param jwks_server: stub jwks server
+    """
+    Auth0JWTBearerTokenValidator(
+        "example.com", "api", jwks_cache=JWKSCache(URLKeySource(jwks_server.url))
+    )
+
+    assert jwks_server.n_requests == 0
+
+
+def test_get_key_fetches_once(jwks_server) -> None:
+    """Test keys are served from memory after the first fetch.
+
+    :param jwks_server: stub jwks server
+    """
+    jwks_server.add_key("key-1")
+    cache = JWKSCache(URLKeySource(jwks_server.url))
+
+    for _ in range(5):
+        assert cache.get_key("key-1").kid == "key-1"
+
+    assert jwks_server.n_requests == 1
+
+
+def test_unknown_kid_triggers_refresh(jwks_server) -> None:
+    """Test a kid missing from the cached key set refreshes the key set once.
+
+    :param jwks_server: stub jwks server
+    """
+    jwks_server.add_key("key-1")
+    cache = JWKSCache(URLKeySource(jwks_server.url), min_refresh_interval=0)
+    cache.get_key("key-1")
+
+    # provider rotates keys
+    jwks_server.add_key("key-2")
+
+    assert cache.get_key("key-2").kid == "key-2"
+    assert jwks_server.n_requests == 2
+
+
+def test_unknown_kid_refresh_is_rate_limited(jwks_server) -> None:
+    """Test tokens with bogus kids can not force a fetch per request.
+
+    :param jwks_server: stub jwks server
+    """
+    jwks_server.add_key("key-1")
+    cache = JWKSCache(URLKeySource(jwks_server.url), min_refresh_interval=60)
+    cache.get_key("key-1")
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            cache.get_key("bogus")
+
+    assert jwks_server.n_requests == 1
+
+
+def test_concurrent_first_use_fetches_once(jwks_server) -> None:
+    """Test concurrent requests on a cold cache share one fetch.
+
+    :param jwks_server: stub jwks server
+    """
+    jwks_server.add_key("key-1")
+    cache = JWKSCache(URLKeySource(jwks_server.url))
+
+    threads = [
+        threading.Thread(target=cache.get_key, args=("key-1",)) for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert jwks_server.n_requests == 1
+
+
+def test_stale_key_set_is_refreshed_in_background(jwks_server) -> None:
+    """Test an expired key set is still served while being refreshed.
+
+    :param jwks_server: stub jwks server
+    """
+    jwks_server.add_key("key-1")
+    cache = JWKSCache(URLKeySource(jwks_server.url), ttl=0)
+    cache.get_key("key-1")
+    time.sleep(0.01)
+
+    assert cache.get_key("key-1").kid == "key-1"
+    cache._background_refresh.join(timeout=5)
+
+    assert jwks_server.n_requests == 2
+
+
+def test_snapshot_boots_without_network(jwks_server, tmp_path) -> None:
+    """Test a cache pointing to an existing snapshot serves keys without fetching.
+
+    :param jwks_server: stub jwks server
+    :param tmp_path: pytest temporary directory
+    """
+    jwks_server.add_key("key-1")
+    snapshot_path = tmp_path / "jwks.json"
+    JWKSCache(URLKeySource(jwks_server.url), snapshot_path=snapshot_path).get_key(
+        "key-1"
+    )
+    assert snapshot_path.is_file()
+
+    unreachable_cache = JWKSCache(
+        URLKeySource("http://127.0.0.1:1/.well-known/jwks.json"),
+        snapshot_path=snapshot_path,
+    )
+
+    assert unreachable_cache.get_key("key-1").kid == "key-1"
+    assert jwks_server.n_requests == 1
+    # no temporary files are left behind
+    assert os.listdir(tmp_path) == ["jwks.json"]
+
+
+def test_validator_authenticates_token_signed_by_published_key(jwks_server) -> None:
+    """Test validator verifies tokens against keys of the cache and rejects unknown kids.
+
+    :param jwks_server: stub jwks server
+    """
+    key = jwks_server.add_key("key-1")
+    validator = Auth0JWTBearerTokenValidator(
+        "example.com", "api", jwks_cache=JWKSCache(URLKeySource(jwks_server.url))
+    )
+    claims = {"iss": "https://example.com/", "aud": "api", "exp": time.time() + 60}
+
+    token = jwt.encode({"alg": "RS256", "kid": "key-1"}, claims, key)
+    assert validator.authenticate_token(token)["aud"] == "api"
+
+    unpublished_key = JsonWebKey.generate_key(
+        "RSA", 2048, is_private=True, options={"kid": "unpublished"}
+    )
+    token = jwt.encode({"alg": "RS256"}, claims, unpublished_key)
+    assert validator.authenticate_token(token) is None
+
+
+def test_validator_rejects_token_if_key_set_can_not_be_fetched(
+    jwks_server, caplog
+) -> None:
+    """Test a failing key source rejects the token instead of raising.
+
+    :param jwks_server: stub jwks server
+    :param caplog: pytest log capture
+    """
+    key = jwks_server.add_key("key-1")
+    validator = Auth0JWTBearerTokenValidator(
+        "example.com",
+        "api",
+        jwks_cache=JWKSCache(URLKeySource(jwks_server.url), min_refresh_interval=0),
+    )
+    claims = {"iss": "https://example.com/", "aud": "api", "exp": time.time() + 60}
+    assert validator.authenticate_token(
+        jwt.encode({"alg": "RS256", "kid": "key-1"}, claims, key)
+    )
+
+    # a made up kid forces a refresh while the provider answers with errors
+    jwks_server.status = 503
+    unpublished_key = JsonWebKey.generate_key(
+        "RSA", 2048, is_private=True, options={"kid": "made-up"}
+    )
+    token = jwt.encode({"alg": "RS256"}, claims, unpublished_key)
+
+    assert validator.authenticate_token(token) is None
+    assert jwks_server.n_requests == 2
+    assert "Fetching json web key set failed" in caplog.text
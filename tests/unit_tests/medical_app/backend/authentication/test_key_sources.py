@@ -0,0 +1,70 @@
+import json
+import time
+
+import pytest
+from authlib.jose import jwt
+
+from config import TestConfigMedicRole
+from medical_app.backend import create_app, db
+from medical_app.backend.authentication.key_sources import (
+    EnvKeySource,
+    FileKeySource,
+    URLKeySource,
+    key_source_from_uri,
+)
+
+
+def test_key_source_from_uri_selects_source(tmp_path) -> None:
+    """Test the scheme of the jwks source setting selects the key source."""
+    assert isinstance(key_source_from_uri("https://a.com/jwks.json"), URLKeySource)
+    assert key_source_from_uri("env:AUTH0_JWKS").variable_name == "AUTH0_JWKS"
+    file_source = key_source_from_uri(f"file://{tmp_path}/jwks.json")
+    assert isinstance(file_source, FileKeySource)
+    assert file_source.path == tmp_path / "jwks.json"
+
+    with pytest.raises(ValueError):
+        key_source_from_uri("ftp://a.com/jwks.json")
+
+
+def test_file_and_env_key_sources_load_jwks(tmp_path, monkeypatch) -> None:
+    """Test file and env key sources return the stored key set."""
+    jwks = {"keys": []}
+    (tmp_path / "jwks.json").write_text(json.dumps(jwks))
+    monkeypatch.setenv("AUTH0_JWKS", json.dumps(jwks))
+
+    assert FileKeySource(tmp_path / "jwks.json").load() == jwks
+    assert EnvKeySource("AUTH0_JWKS").load() == jwks
+
+    monkeypatch.delenv("AUTH0_JWKS")
+    with pytest.raises(OSError):
+        EnvKeySource("AUTH0_JWKS").load()
+
+
+def test_create_app_fetches_jwks_on_first_authenticated_request(jwks_server) -> None:
+    """Test neither create_app nor public requests fetch the key set.
+
+    :param jwks_server: stub jwks server
+    """
+    key = jwks_server.add_key("key-1")
+
+    class StubJWKSConfig(TestConfigMedicRole):
+        JWKS_SOURCE = jwks_server.url
+
+    app = create_app(StubJWKSConfig)
+    with app.app_context():
+        db.create_all()
+        assert app.test_client().get("/medics").status_code == 200
+        assert jwks_server.n_requests == 0
+
+        claims = {
+            "iss": f"https://{StubJWKSConfig.AUTH0_DOMAIN}/",
+            "aud": StubJWKSConfig.API_AUDIENCE,
+            "exp": time.time() + 60,
+        }
+        token = jwt.encode({"alg": "RS256"}, claims, key).decode()
+        res = app.test_client().get(
+            "/patients/1", headers={"Authorization": f"Bearer {token}"}
+        )
+        assert res.status_code == 404
+        assert jwks_server.n_requests == 1
+        db.drop_all()
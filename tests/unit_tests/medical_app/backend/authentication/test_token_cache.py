@@ -0,0 +1,82 @@
+import time
+
+from authlib.jose import jwt
+
+from medical_app.backend.authentication.authentication_decorator import (
+    Auth0JWTBearerTokenValidator,
+)
+from medical_app.backend.authentication.jwks_cache import JWKSCache
+from medical_app.backend.authentication.key_sources import URLKeySource
+from medical_app.backend.authentication.token_cache import VerifiedTokenCache
+
+
+def test_cache_counts_hits_and_misses() -> None:
+    """Test cached claims are returned and lookups are counted."""
+    cache = VerifiedTokenCache()
+    claims = {"exp": time.time() + 60}
+
+    assert cache.get("token") is None
+    cache.put("token", claims)
+
+    assert cache.get("token") == claims
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.hit_ratio == 0.5
+
+
+def test_cache_drops_expired_tokens() -> None:
+    """Test claims of expired tokens are never returned."""
+    cache = VerifiedTokenCache()
+    cache.put("token", {"exp": time.time() - 1})
+
+    assert cache.get("token") is None
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used_token() -> None:
+    """Test the cache never holds more than maxsize tokens."""
+    cache = VerifiedTokenCache(maxsize=2)
+    exp = time.time() + 60
+    cache.put("token-1", {"exp": exp})
+    cache.put("token-2", {"exp": exp})
+    # mark token 1 as recently used
+    cache.get("token-1")
+    cache.put("token-3", {"exp": exp})
+
+    assert len(cache) == 2
+    assert cache.get("token-2") is None
+    assert cache.get("token-1") and cache.get("token-3")
+
+
+def test_validator_verifies_signature_only_once(jwks_server, monkeypatch) -> None:
+    """Test repeated tokens skip signature verification and invalid ones are not cached.
+
+    :param jwks_server: stub jwks server
+    """
+    key = jwks_server.add_key("key-1")
+    token_cache = VerifiedTokenCache()
+    validator = Auth0JWTBearerTokenValidator(
+        "example.com",
+        "api",
+        jwks_cache=JWKSCache(URLKeySource(jwks_server.url)),
+        token_cache=token_cache,
+    )
+    claims = {"iss": "https://example.com/", "aud": "api", "exp": time.time() + 60}
+    token = jwt.encode({"alg": "RS256"}, claims, key).decode()
+
+    n_decodes = 0
+    decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        nonlocal n_decodes
+        n_decodes += 1
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(jwt, "decode", counting_decode)
+
+    for _ in range(3):
+        assert validator.authenticate_token(token)["aud"] == "api"
+    assert validator.authenticate_token(token + "invalid") is None
+
+    assert n_decodes == 2
+    assert token_cache.hits == 2
+    assert len(token_cache) == 1
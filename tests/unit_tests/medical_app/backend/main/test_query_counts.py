@@ -0,0 +1,161 @@
+import flask
+import pytest
+
+from medical_app.backend.models import Medic, Patient, db
+
+
+def populate_additional_medics_and_patients(n: int = 5) -> None:
+    """Add medics with one patient each, so that N+1 queries become visible.
+
+    :param n: number of medic patient pairs to add
+    """
+    for i in range(n):
+        medic = Medic(
+            first_name="Query", last_name="Counter", email=f"medic.{i}@count.com"
+        )
+        patient = Patient(
+            first_name="Query", last_name="Counter", email=f"patient.{i}@count.com"
+        )
+        medic.patients.append(patient)
+        db.session.add(medic)
+    db.session.commit()
+
+
+@pytest.mark.parametrize(
+    "url, expected_n_statements",
+    [
+        # medics + their patients
+        ("/medics?limit=50", 2),
+        ("/medics/1", 2),
+        # unrequested relationships are not loaded
+        ("/medics?limit=50&include=", 1),
+        ("/medics/1?include=&fields=email", 1),
+    ],
+)
+def test_public_endpoints_statement_count(
+    app, count_statements, url: str, expected_n_statements: int
+) -> None:
+    """Test public endpoints load relationships eagerly instead of per entity.
+
+    :param app: flask app instance
+    """
+    populate_additional_medics_and_patients()
+
+    with count_statements() as counter:
+        res: flask.Response = app.test_client().get(url)
+
+    assert res.status_code == 200
+    assert counter.count == expected_n_statements, counter.statements
+
+
+@pytest.mark.parametrize(
+    "url, expected_n_statements",
+    [
+        # medic + patients + records of patients + medics of patients
+        ("/medics/2/patients?limit=50", 4),
+        # patient + records + medics
+        ("/patients/5", 3),
+        ("/patients/5?include=medics", 2),
+        ("/patients/5?include=", 1),
+        ("/medics/2/patients?limit=50&include=records", 3),
+        # patient + records
+        ("/patients/5/records", 2),
+        # medic + records of all its patients in one join
+        ("/medics/2/records?limit=50", 2),
+        # record filtered by patient id and record id
+        ("/patients/5/records/1", 1),
+    ],
+)
+def test_protected_endpoints_statement_count(
+    app, count_statements, access_token_medic_role, url: str, expected_n_statements
+) -> None:
+    """Test protected endpoints load relationships eagerly instead of per entity.
+
+    :param app: flask app instance
+    """
+    populate_additional_medics_and_patients()
+    # link the additional patients to medic two, so it has many patients
+    medic = db.session.get(Medic, 2)
+    medic.patients += Patient.query.filter(Patient.email.like("%@count.com")).all()
+    db.session.commit()
+
+    with count_statements() as counter:
+        res: flask.Response = app.test_client().get(
+            url,
+            headers={"Authorization": f"Bearer {access_token_medic_role}"},
+        )
+
+    assert res.status_code == 200
+    assert counter.count == expected_n_statements, counter.statements
+
+
+@pytest.mark.parametrize("n_patients", [5, 50])
+def test_patch_medic_statement_count(
+    app, count_statements, access_token_medic_role, n_patients: int
+) -> None:
+    """Test patching the patients of a medic does not query per patient.
+
+    :param app: flask app instance
+    """
+    populate_additional_medics_and_patients(n_patients)
+    patient_ids = [
+        patient.id
+        for patient in Patient.query.filter(Patient.email.like("%@count.com"))
+    ]
+
+    with count_statements() as counter:
+        res: flask.Response = app.test_client().patch(
+            "/medics/1",
+            json={"firstName": "Jane", "patientIds": [3, *patient_ids]},
+            headers={"Authorization": f"Bearer {access_token_medic_role}"},
+        )
+
+    assert res.status_code == 200
+    assert set(res.json["data"]["patients"]) == {3, *patient_ids}
+    # medic + patient ids + current links + delete and insert of the changed links +
+    # update of medic + medic and its patients reloaded after commit
+    assert counter.count == 8, counter.statements
+
+
+@pytest.mark.parametrize(
+    "url, ids_key, model, expected_n_statements",
+    [
+        # linked ids + inserts of user, medic and links + medic and patients reloaded
+        ("/medics", "patientIds", Patient, 6),
+        # same, patients are reloaded with records and medics
+        ("/patients", "medicIds", Medic, 7),
+    ],
+)
+def test_post_user_statement_count(
+    app,
+    count_statements,
+    access_token_medic_role,
+    access_token_patient_role,
+    url: str,
+    ids_key: str,
+    model,
+    expected_n_statements: int,
+) -> None:
+    """Test linked ids of a new user are resolved with one query, not one per id.
+
+    :param app: flask app instance
+    """
+    # only the patient role may create patients
+    token = access_token_medic_role if url == "/medics" else access_token_patient_role
+    populate_additional_medics_and_patients(50)
+    linked_ids = [user.id for user in model.query.all()]
+
+    with count_statements() as counter:
+        res: flask.Response = app.test_client().post(
+            url,
+            json={
+                "firstName": "Anna",
+                "lastName": "Doc",
+                "email": "anna.doc@mail.com",
+                ids_key: linked_ids,
+            },
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+    assert res.status_code == 201
+    assert counter.count == expected_n_statements, counter.statements
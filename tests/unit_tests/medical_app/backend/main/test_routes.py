@@ -1,8 +1,15 @@
+import csv
+import datetime
+import io
+import json
 from typing import Optional
 
 import flask
+import pytest
+from sqlalchemy import update
+from sqlalchemy.orm.exc import StaleDataError
 
-from medical_app.backend.models import Medic, Patient, Record, db
+from medical_app.backend.models import Medic, Patient, Record, User, db
 
 
 def assert_success_response_structure(res, expected_status_code: int = 200) -> None:
@@ -42,6 +49,37 @@ def test_get_medics_should_return_medics_array(app):
     assert len(res.json["data"]) > 0
 
 
+def test_get_medics_after_cursor_should_return_next_page(app):
+    """Test get medics with keyset cursor continues after the previous page.
+
+    :param app: flask app instance
+    """
+    res: flask.Response = app.test_client().get("/medics?limit=1")
+
+    assert_success_response_structure(res)
+    assert len(res.json["data"]) == 1
+    next_cursor = res.json["next"]
+    assert next_cursor == res.json["data"][0]["id"]
+
+    res = app.test_client().get(f"/medics?limit=1&after={next_cursor}")
+
+    assert_success_response_structure(res)
+    assert res.json["data"][0]["id"] > next_cursor
+    # medic two is the last medic in the test db
+    assert res.json["next"] is None
+
+
+def test_get_medics_invalid_limit_should_return_422(app):
+    """Test get medics with a non-positive limit raises 422 error.
+
+    :param app: flask app instance
+    """
+    res: flask.Response = app.test_client().get("/medics?limit=0")
+
+    assert_error_response_structure(res)
+    assert res.status_code == 422
+
+
 def test_post_medic_should_create_new_medic(app, access_token_medic_role):
     """Test post medic creates new medic.
 
@@ -120,6 +158,88 @@ def test_post_medic_invalid_attribute_should_raise_422(app, access_token_medic_r
     assert res.json["code"] == 422
 
 
+def test_post_medics_batch_should_create_all_medics(app, access_token_medic_role):
+    """Test posting an array of medics creates all of them.
+
+    :param app: flask app instance
+    """
+    n_medics_before = len(Medic.query.all())
+
+    res = app.test_client().post(
+        "/medics:batch",
+        json=[
+            {
+                "firstName": "Franz",
+                "lastName": "Hungertobel",
+                "email": "franz.hungertobel@mail.com",
+                "patientIds": [3, 4],
+            },
+            {"firstName": "Anna", "lastName": "Doc", "email": "anna.doc@mail.com"},
+        ],
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+
+    assert_success_response_structure(res, expected_status_code=201)
+    assert [item["status"] for item in res.json["data"]] == ["success", "success"]
+    assert set(res.json["data"][0]["data"]["patients"]) == {3, 4}
+
+    assert len(Medic.query.all()) == n_medics_before + 2
+
+
+def test_post_medics_batch_should_report_invalid_items(app, access_token_medic_role):
+    """Test invalid items of a batch are reported, while valid ones are created.
+
+    :param app: flask app instance
+    """
+    res = app.test_client().post(
+        "/medics:batch",
+        json=[
+            {"firstName": "Anna", "lastName": "Doc", "email": "anna.doc@mail.com"},
+            # unknown patient
+            {
+                "firstName": "Marc",
+                "lastName": "Doc",
+                "email": "marc.doc@mail.com",
+                "patientIds": [1000],
+            },
+            # email of existing medic
+            {"firstName": "John", "lastName": "Doc", "email": "john.doc@mail.com"},
+            # missing last name
+            {"firstName": "Lisa", "email": "lisa.doc@mail.com"},
+            # email of wrong type
+            {"firstName": "Paul", "lastName": "Doc", "email": ["paul.doc@mail.com"]},
+        ],
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+
+    assert_success_response_structure(res, expected_status_code=207)
+    statuses = [item["status"] for item in res.json["data"]]
+    assert statuses == ["success", "error", "error", "error", "error"]
+    for item in res.json["data"][1:]:
+        assert item["code"] == 422
+        assert item["message"]
+    assert res.json["data"][1]["missingIds"] == [1000]
+    assert res.json["data"][3]["message"] == "Missing attribute 'lastName'"
+    assert res.json["data"][4]["message"] == "email must be a non-empty string"
+
+    assert db.session.get(Medic, res.json["data"][0]["data"]["id"])
+
+
+def test_post_medics_batch_not_an_array_should_raise_422(app, access_token_medic_role):
+    """Test posting a single object to the batch endpoint raises 422.
+
+    :param app: flask app instance
+    """
+    res = app.test_client().post(
+        "/medics:batch",
+        json={"firstName": "Anna", "lastName": "Doc", "email": "anna.doc@mail.com"},
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+
+    assert_error_response_structure(res)
+    assert res.json["code"] == 422
+
+
 def test_get_medic_should_return_medic(app) -> None:
     """Test get medic returns medic.
 
@@ -283,6 +403,24 @@ def test_get_patients_of_medic_non_existing_should_return_404(
     assert res.status_code == 404
 
 
+@pytest.mark.parametrize("query", ["limit=0", "limit=-1", "offset=-1"])
+def test_get_patients_of_medic_invalid_page_should_return_422(
+    app, access_token_medic_role, query
+) -> None:
+    """Test get patients of medic with a negative offset or non-positive limit raises 422.
+
+    :param app: flask app instance
+    :param query: query string with invalid page args
+    """
+    res: flask.Response = app.test_client().get(
+        f"/medics/2/patients?{query}",
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+
+    assert_error_response_structure(res)
+    assert res.status_code == 422
+
+
 def test_add_patient_to_medic(app, access_token_medic_role) -> None:
     """Test adding patient to medic updates medic patient mapping.
 
@@ -389,6 +527,35 @@ def test_post_patient_should_create_new_patient(app, access_token_patient_role):
     assert n_patients_before + 1 == n_patients_after
 
 
+def test_post_patients_batch_should_create_all_patients(app, access_token_patient_role):
+    """Test posting an array of patients creates all of them.
+
+    :param app: flask app instance
+    """
+    n_patients_before = len(Patient.query.all())
+
+    res = app.test_client().post(
+        "/patients:batch",
+        json=[
+            {
+                "firstName": f"Patient{i}",
+                "lastName": "Batch",
+                "email": f"patient{i}@batch.com",
+                "medicIds": [1, 2],
+            }
+            for i in range(25)
+        ],
+        headers={"Authorization": f"Bearer {access_token_patient_role}"},
+    )
+
+    assert_success_response_structure(res, expected_status_code=201)
+    assert len(res.json["data"]) == 25
+    new_patient = db.session.get(Patient, res.json["data"][0]["data"]["id"])
+    assert {medic.id for medic in new_patient.medics} == {1, 2}
+
+    assert len(Patient.query.all()) == n_patients_before + 25
+
+
 def test_post_patient_missing_attribute_should_raise_422(
     app, access_token_patient_role
 ):
@@ -528,6 +695,165 @@ def test_get_records_of_patients_non_existing_should_raise_404(
     assert res.status_code == 404
 
 
+@pytest.mark.parametrize("query", ["limit=0", "limit=-1", "offset=-1"])
+def test_get_records_of_patients_invalid_page_should_raise_422(
+    app, access_token_medic_role, query
+) -> None:
+    """Test getting records of a patient with invalid page args raises 422.
+
+    :param app: flask app instance
+    :param query: query string with invalid page args
+    """
+    res: flask.Response = app.test_client().get(
+        f"/patients/5/records?{query}",
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+
+    assert_error_response_structure(res)
+    assert res.status_code == 422
+
+
+def test_export_records_ndjson_should_stream_all_records(
+    app, access_token_medic_role
+) -> None:
+    """Test exporting records of a patient streams one json record per line.
+
+    :param app: flask app instance
+    """
+    res: flask.Response = app.test_client().get(
+        "/patients/5/records:export",
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+
+    assert res.status_code == 200
+    assert res.mimetype == "application/x-ndjson"
+    lines = res.get_data(as_text=True).splitlines()
+    assert len(lines) > 0
+    assert all(json.loads(line)["patient_id"] == 5 for line in lines)
+
+
+def test_export_records_csv_should_start_with_header(
+    app, access_token_medic_role
+) -> None:
+    """Test exporting records of a patient as csv writes a header and one row per record.
+
+    :param app: flask app instance
+    """
+    res: flask.Response = app.test_client().get(
+        "/patients/5/records:export?format=csv",
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+
+    assert res.status_code == 200
+    assert res.mimetype == "text/csv"
+    rows = list(csv.DictReader(io.StringIO(res.get_data(as_text=True))))
+    assert len(rows) > 0
+    assert all(row["patient_id"] == "5" for row in rows)
+
+
+def test_export_records_unknown_format_should_raise_422(
+    app, access_token_medic_role
+) -> None:
+    """Test exporting records in an unsupported format raises 422.
+
+    :param app: flask app instance
+    """
+    res: flask.Response = app.test_client().get(
+        "/patients/5/records:export?format=xml",
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+
+    assert_error_response_structure(res)
+    assert res.status_code == 422
+
+
+def test_get_records_of_medic_should_page_with_cursors(
+    app, access_token_medic_role
+) -> None:
+    """Test records of all patients of a medic are paged by cursor, latest first.
+
+    :param app: flask app instance
+    """
+    # medic 2 treats patients 3 and 5, patient 6 is not one of its patients
+    for patient_id in (3, 5, 6):
+        for day in (1, 2):
+            db.session.add(
+                Record(
+                    title=f"Record {patient_id}.{day}",
+                    description="caseload",
+                    date_diagnosis=datetime.datetime(2023, 3, day),
+                    date_symptom_onset=datetime.datetime(2023, 2, day),
+                    patient_id=patient_id,
+                )
+            )
+    db.session.commit()
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {access_token_medic_role}"}
+
+    titles = []
+    url = "/medics/2/records?limit=2"
+    while url:
+        res: flask.Response = client.get(url, headers=headers)
+        assert_success_response_structure(res)
+        titles += [record["title"] for record in res.json["data"]]
+        url = res.json["next"] and f"/medics/2/records?limit=2&after={res.json['next']}"
+
+    assert titles == [
+        "Record 5.2",
+        "Record 3.2",
+        "Record 5.1",
+        "Record 3.1",
+        "Flew",
+    ]
+
+    res = client.get("/medics/2/records?sort=id&fields=title", headers=headers)
+    assert [record["title"] for record in res.json["data"]][0] == "Flew"
+    assert set(res.json["data"][0]) == {"id", "title"}
+
+
+@pytest.mark.parametrize(
+    "query", ["after=garbage", "sort=title", "sort=date_symptom_offset", "limit=0"]
+)
+def test_get_records_of_medic_invalid_args_should_raise_422(
+    app, access_token_medic_role, query: str
+) -> None:
+    """Test malformed cursors and sort keys unsuitable for cursors are rejected.
+
+    :param app: flask app instance
+    """
+    res: flask.Response = app.test_client().get(
+        f"/medics/2/records?{query}",
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+
+    assert_error_response_structure(res)
+    assert res.status_code == 422
+
+
+def test_export_records_of_medic_should_stream_records_of_its_patients(
+    app, access_token_medic_role
+) -> None:
+    """Test the caseload export streams the records of all patients of the medic.
+
+    :param app: flask app instance
+    """
+    res: flask.Response = app.test_client().get(
+        "/medics/2/records:export?format=ndjson",
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+
+    assert res.status_code == 200
+    assert res.mimetype == "application/x-ndjson"
+    records = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+    assert [record["patient_id"] for record in records] == [5]
+
+    res = app.test_client().get(
+        "/medics/1/records:export",
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+    assert res.get_data() == b""
+
+
 def test_post_new_record_should_add_record_to_patient(
     app, access_token_medic_role
 ) -> None:
@@ -560,6 +886,73 @@ def test_post_new_record_should_add_record_to_patient(
     assert db.session.get(Record, new_record_id)
 
 
+def test_post_new_record_invalid_date_should_raise_422(
+    app, access_token_medic_role
+) -> None:
+    """Test posting a record with a date not in format YYYY-MM-DD raises 422.
+
+    :param app: flask app instance
+    """
+    res = app.test_client().post(
+        "/patients/5/records",
+        json={
+            "title": "back pain",
+            "description": "Caused by long working hours.",
+            "dateDiagnosis": "14.02.2023",
+            "dateSymptomOnset": "2023-02-07",
+        },
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+
+    assert_error_response_structure(res)
+    assert res.json["code"] == 422
+
+
+def test_post_records_ndjson_should_insert_valid_records(
+    app, access_token_medic_role
+) -> None:
+    """Test streaming records as ndjson inserts valid lines and reports invalid ones.
+
+    :param app: flask app instance
+    """
+    # force several chunks
+    app.config["BATCH_CHUNK_SIZE"] = 2
+    n_records_before = len(Record.query.all())
+    valid_line = (
+        '{"title": "flu", "description": "fever", "dateDiagnosis": "2023-02-14",'
+        ' "dateSymptomOnset": "2023-02-07", "patientId": %d}'
+    )
+    body = "\n".join(
+        [
+            valid_line % 5,
+            valid_line % 6,
+            "",
+            "not json",
+            # unknown patient
+            valid_line % 1000,
+            '{"title": "flu", "patientId": 5}',
+            # booleans are no ids, although bool is a subclass of int
+            valid_line.replace("%d", "true"),
+            valid_line % 5,
+        ]
+    )
+
+    res = app.test_client().post(
+        "/records:batch",
+        data=body,
+        content_type="application/x-ndjson",
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+
+    assert_success_response_structure(res, expected_status_code=207)
+    assert res.json["data"]["inserted"] == 3
+    assert res.json["data"]["failed"] == 4
+    assert [error["line"] for error in res.json["data"]["errors"]] == [4, 5, 6, 7]
+    assert res.json["data"]["errors"][3]["message"] == "patientId must be an id"
+
+    assert len(Record.query.all()) == n_records_before + 3
+
+
 def test_get_record_should_return_record(app, access_token_medic_role) -> None:
     """Test getting a record returns a record.
 
@@ -636,6 +1029,145 @@ def test_delete_non_existing_record_should_return_404(
     assert res.json["code"] == 404
 
 
+def test_conditional_get_should_return_304_if_etag_matches(
+    app, access_token_medic_role
+) -> None:
+    """Test resources and collections are not sent again if the client has their etag.
+
+    :param app: flask app instance
+    """
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {access_token_medic_role}"}
+    for url in (
+        "/medics",
+        "/medics/1",
+        "/medics/1/patients",
+        "/patients/5",
+        "/patients/5/records",
+        "/patients/5/records/1",
+    ):
+        etag = client.get(url, headers=headers).headers["ETag"]
+
+        res: flask.Response = client.get(
+            url, headers={**headers, "If-None-Match": etag}
+        )
+
+        assert res.status_code == 304, url
+        assert res.headers["ETag"] == etag
+        assert not res.data
+
+
+def test_etag_of_patient_should_change_with_new_record(
+    app, access_token_medic_role
+) -> None:
+    """Test adding a record changes the etag of its patient.
+
+    :param app: flask app instance
+    """
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {access_token_medic_role}"}
+    etag = client.get("/patients/5", headers=headers).headers["ETag"]
+    client.post(
+        "/patients/5/records",
+        json={
+            "title": "flu",
+            "description": "fever",
+            "dateDiagnosis": "2023-02-14",
+            "dateSymptomOnset": "2023-02-07",
+        },
+        headers=headers,
+    )
+
+    res: flask.Response = client.get(
+        "/patients/5", headers={**headers, "If-None-Match": etag}
+    )
+
+    assert_success_response_structure(res)
+    assert res.headers["ETag"] != etag
+
+
+def test_patch_medic_with_stale_etag_should_raise_412(
+    app, access_token_medic_role
+) -> None:
+    """Test a patch conditional on an outdated representation is rejected.
+
+    :param app: flask app instance
+    """
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {access_token_medic_role}"}
+    etag = client.get("/medics/1").headers["ETag"]
+
+    res: flask.Response = client.patch(
+        "/medics/1",
+        json={"firstName": "Jane"},
+        headers={**headers, "If-Match": etag},
+    )
+    assert_success_response_structure(res)
+
+    res = client.patch(
+        "/medics/1",
+        json={"firstName": "Janet"},
+        headers={**headers, "If-Match": etag},
+    )
+    assert_error_response_structure(res)
+    assert res.status_code == 412
+
+
+def test_delete_record_with_stale_etag_should_raise_412(
+    app, access_token_medic_role
+) -> None:
+    """Test a delete conditional on a different representation is rejected.
+
+    :param app: flask app instance
+    """
+    res: flask.Response = app.test_client().delete(
+        "/patients/5/records/1",
+        headers={
+            "Authorization": f"Bearer {access_token_medic_role}",
+            "If-Match": '"outdated"',
+        },
+    )
+
+    assert_error_response_structure(res)
+    assert res.status_code == 412
+
+
+def test_sparse_fieldsets_should_shape_response(app, access_token_medic_role) -> None:
+    """Test fields and include select the attributes and relationships in the response.
+
+    :param app: flask app instance
+    """
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {access_token_medic_role}"}
+
+    res: flask.Response = client.get(
+        "/patients/5?fields=firstName&include=records&fields[records]=title",
+        headers=headers,
+    )
+    assert_success_response_structure(res)
+    assert set(res.json["data"]) == {"id", "firstName", "records"}
+    assert all(set(record) == {"id", "title"} for record in res.json["data"]["records"])
+
+    res = client.get("/medics?include=&fields[medics]=email")
+    assert_success_response_structure(res)
+    assert all(set(medic) == {"id", "email"} for medic in res.json["data"])
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["fields=age", "fields[nurses]=email", "include=nurses", "include=records"],
+)
+def test_invalid_sparse_fieldsets_should_raise_422(app, query: str) -> None:
+    """Test unknown fields, resource types and relationships are rejected.
+
+    :param app: flask app instance
+    """
+    res: flask.Response = app.test_client().get(f"/medics?{query}")
+
+    assert_error_response_structure(res)
+    assert res.status_code == 422
+
+
 def test_delete_record_not_logged_in_raises_401(app) -> None:
     """Test calling delete record without being logged in raises 401.
 
@@ -649,3 +1181,159 @@ def test_delete_record_not_logged_in_raises_401(app) -> None:
     assert_error_response_structure(res)
 
     assert res.json["code"] == 401
+
+
+def test_patch_medic_should_only_change_given_fields(
+    app, access_token_medic_role
+) -> None:
+    """Test patching a medic without patientIds keeps its patients, with them replaces them.
+
+    :param app: flask app instance
+    """
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {access_token_medic_role}"}
+
+    res: flask.Response = client.patch(
+        "/medics/1", json={"lastName": "Married"}, headers=headers
+    )
+    assert_success_response_structure(res)
+    assert set(res.json["data"]["patients"]) == {3, 4}
+
+    res = client.patch(
+        "/medics/1", json={"firstName": "Jane", "patientIds": [4, 5]}, headers=headers
+    )
+    assert_success_response_structure(res)
+    assert res.json["data"]["firstName"] == "Jane"
+    assert res.json["data"]["lastName"] == "Married"
+    assert set(res.json["data"]["patients"]) == {4, 5}
+
+
+@pytest.mark.parametrize("patch", [{"versionId": 1}, {"id": 7}])
+def test_patch_medic_managed_attribute_should_return_422(
+    app, access_token_medic_role, patch
+) -> None:
+    """Test patching the id or version of a medic is rejected and changes nothing.
+
+    :param app: flask app instance
+    :param patch: body of the patch request
+    """
+    version_id = db.session.get(Medic, 1).version_id
+    db.session.remove()
+
+    res: flask.Response = app.test_client().patch(
+        "/medics/1",
+        json={"firstName": "Jane", **patch},
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+
+    assert_error_response_structure(res)
+    assert res.json["code"] == 422
+    medic = db.session.get(Medic, 1)
+    assert medic.first_name == "John"
+    assert medic.version_id == version_id
+
+
+def test_patch_medic_patient_ids_should_increment_version(
+    app, access_token_medic_role
+) -> None:
+    """Test a patch only changing the patients of a medic is versioned like other updates.
+
+    :param app: flask app instance
+    """
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {access_token_medic_role}"}
+    etag = client.get("/medics/1").headers["ETag"]
+    version_id = db.session.get(Medic, 1).version_id
+    db.session.remove()
+
+    res: flask.Response = client.patch(
+        "/medics/1", json={"patientIds": [4, 5]}, headers={**headers, "If-Match": etag}
+    )
+    assert_success_response_structure(res)
+    assert db.session.get(Medic, 1).version_id == version_id + 1
+    db.session.remove()
+
+    res = client.patch(
+        "/medics/1", json={"patientIds": [3]}, headers={**headers, "If-Match": etag}
+    )
+    assert_error_response_structure(res)
+    assert res.status_code == 412
+
+
+def test_concurrent_patch_of_patient_ids_should_raise_stale_data(app) -> None:
+    """Test changing the patients of a medic fails if its row was updated after it was loaded.
+
+    :param app: flask app instance
+    """
+    medic = db.session.get(Medic, 1)
+    # a concurrent request updates the medic after this one checked If-Match
+    db.session.execute(
+        update(User)
+        .where(User.id == 1)
+        .values(version_id=User.version_id + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+    with pytest.raises(StaleDataError):
+        medic.update(patient_ids=[5])
+    assert {patient.id for patient in db.session.get(Medic, 1).patients} == {3, 4}
+
+
+@pytest.mark.parametrize("patient_ids", [[3, 100], "3", [3, "4"]])
+def test_patch_medic_with_invalid_patient_ids_should_return_422(
+    app, access_token_medic_role, patient_ids
+) -> None:
+    """Test patching a medic with unknown or malformed patient ids changes nothing.
+
+    :param app: flask app instance
+    """
+    res: flask.Response = app.test_client().patch(
+        "/medics/1",
+        json={"firstName": "Jane", "patientIds": patient_ids},
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+
+    assert_error_response_structure(res)
+    assert res.json["code"] == 422
+    medic = db.session.get(Medic, 1)
+    assert medic.first_name == "John"
+    assert {patient.id for patient in medic.patients} == {3, 4}
+
+
+@pytest.mark.parametrize(
+    "url, ids_key, missing_ids",
+    [
+        # medic 1 is no patient and patient 3 no medic
+        ("/medics", "patientIds", [1, 1000, 1001]),
+        ("/patients", "medicIds", [3, 1000, 1001]),
+    ],
+)
+def test_post_user_with_unknown_ids_should_list_them(
+    app,
+    access_token_medic_role,
+    access_token_patient_role,
+    url: str,
+    ids_key: str,
+    missing_ids,
+) -> None:
+    """Test creating a user linked to non existing users reports exactly those ids.
+
+    :param app: flask app instance
+    """
+    # only the patient role may create patients
+    token = access_token_medic_role if url == "/medics" else access_token_patient_role
+    res: flask.Response = app.test_client().post(
+        url,
+        json={
+            "firstName": "Anna",
+            "lastName": "Doc",
+            "email": "anna.doc@mail.com",
+            ids_key: [1, 3, 1000, 1001, 1000],
+        },
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert_error_response_structure(res)
+    assert res.json["code"] == 422
+    assert res.json["missingIds"] == missing_ids
+    assert ids_key in res.json["message"]
@@ -0,0 +1,194 @@
+import datetime
+from typing import Any, Dict, Optional
+
+import flask
+import pytest
+from sqlalchemy import select
+
+from medical_app.backend.models import Patient, PatientRecordStats, Record, db
+from medical_app.backend.stats.summary import aggregate_records, rebuild_summary
+
+STATS_URLS = ["/stats/records", "/stats/patients", "/stats/patients/5", "/stats/medics"]
+
+
+def add_record(patient_id: int, days: Optional[int], onset_day: int = 1) -> Record:
+    onset = datetime.datetime(2023, 2, onset_day)
+    record = Record(
+        title="Flu",
+        description="fever",
+        date_diagnosis=datetime.datetime(2023, 3, 1),
+        date_symptom_onset=onset,
+        date_symptom_offset=(
+            onset + datetime.timedelta(days=days) if days is not None else None
+        ),
+        patient_id=patient_id,
+    )
+    db.session.add(record)
+    db.session.commit()
+    return record
+
+
+def assert_summary_is_consistent() -> None:
+    aggregates = aggregate_records(db.session.get_bind().dialect.name)
+    expected = db.session.execute(select(aggregates).order_by("patient_id")).all()
+    summary = db.session.execute(
+        select(PatientRecordStats.__table__).order_by("patient_id")
+    ).all()
+    assert summary == expected
+
+
+def get_stats(app, token: str, url: str) -> Dict[str, Any]:
+    res: flask.Response = app.test_client().get(
+        url, headers={"Authorization": f"Bearer {token}"}
+    )
+    assert res.status_code == 200, res.json
+    return res.json
+
+
+def test_summary_should_follow_record_changes(app) -> None:
+    """Test the summary table is updated incrementally on insert, update and delete.
+
+    :param app: flask app instance
+    """
+    assert_summary_is_consistent()
+    record = add_record(3, 2)
+    add_record(3, None)
+    add_record(4, 1)
+    assert_summary_is_consistent()
+
+    record.date_symptom_offset = None
+    record.patient_id = 4
+    db.session.commit()
+    assert_summary_is_consistent()
+
+    db.session.delete(record)
+    db.session.commit()
+    assert_summary_is_consistent()
+
+    # records are deleted together with their patient
+    db.session.delete(db.session.get(Patient, 3))
+    db.session.commit()
+    assert_summary_is_consistent()
+    assert db.session.get(PatientRecordStats, 3) is None
+
+
+def test_summary_should_follow_bulk_inserts(app) -> None:
+    """Test records inserted with Record.insert_many are summarized.
+
+    :param app: flask app instance
+    """
+    Record.insert_many(
+        [
+            [
+                {
+                    "title": "Flu",
+                    "description": "fever",
+                    "date_diagnosis": datetime.datetime(2023, 3, 1),
+                    "date_symptom_onset": datetime.datetime(2023, 2, 1),
+                    "date_symptom_offset": datetime.datetime(2023, 2, day),
+                    "patient_id": patient_id,
+                }
+                for day in range(2, 5)
+                for patient_id in (4, 5)
+            ]
+        ]
+    )
+
+    assert_summary_is_consistent()
+    assert db.session.get(PatientRecordStats, 4).symptom_seconds == 6 * 86400
+
+
+def test_rebuild_summary_should_recompute_stats(app) -> None:
+    """Test the summary table can be rebuilt from the records.
+
+    :param app: flask app instance
+    """
+    add_record(3, 2)
+    db.session.execute(PatientRecordStats.__table__.delete())
+
+    assert rebuild_summary() == 2
+    assert_summary_is_consistent()
+
+
+@pytest.mark.parametrize("url", STATS_URLS)
+def test_stats_should_not_depend_on_source(app, access_token_medic_role, url) -> None:
+    """Test the summary table and the GROUP BY over records give the same stats.
+
+    :param app: flask app instance
+    """
+    add_record(3, 2)
+    add_record(3, 3, onset_day=5)
+    add_record(5, None)
+
+    from_summary = get_stats(app, access_token_medic_role, url)
+    app.config["STATS_FROM_SUMMARY"] = False
+    assert get_stats(app, access_token_medic_role, url) == from_summary
+
+
+def test_record_stats_should_be_aggregated(app, access_token_medic_role) -> None:
+    """Test the totals and per patient stats of records.
+
+    :param app: flask app instance
+    """
+    add_record(3, 2)
+    add_record(3, 3)
+
+    assert get_stats(app, access_token_medic_role, "/stats/records")["data"] == {
+        "patients": 2,
+        "records": 3,
+        "ongoingRecords": 1,
+        "averageSymptomDurationDays": 2.5,
+    }
+    res = get_stats(app, access_token_medic_role, "/stats/patients?limit=1")
+    assert res["data"] == [
+        {
+            "patientId": 3,
+            "records": 2,
+            "ongoingRecords": 0,
+            "averageSymptomDurationDays": 2.5,
+        }
+    ]
+    assert res["next"] == 3
+    assert get_stats(app, access_token_medic_role, "/stats/patients/6")["data"] == {
+        "patientId": 6,
+        "records": 0,
+        "ongoingRecords": 0,
+        "averageSymptomDurationDays": None,
+    }
+
+
+def test_medic_stats_should_count_patients_and_records(
+    app, access_token_medic_role
+) -> None:
+    """Test the load of each medic, including patients without records.
+
+    :param app: flask app instance
+    """
+    add_record(3, 2)
+    add_record(4, None)
+
+    assert get_stats(app, access_token_medic_role, "/stats/medics")["data"] == [
+        {"medicId": 1, "patients": 2, "records": 2, "ongoingRecords": 1},
+        {"medicId": 2, "patients": 2, "records": 2, "ongoingRecords": 1},
+    ]
+    assert get_stats(app, access_token_medic_role, "/stats/medics?limit=1")["next"] == 1
+    res = get_stats(app, access_token_medic_role, "/stats/medics?limit=1&after=1")
+    assert res["data"] == [
+        {"medicId": 2, "patients": 2, "records": 2, "ongoingRecords": 1}
+    ]
+    assert res["next"] is None
+
+
+def test_stats_of_unknown_patient_should_return_404(
+    app, access_token_medic_role
+) -> None:
+    """Test stats of a patient that does not exist are not found.
+
+    :param app: flask app instance
+    """
+    res: flask.Response = app.test_client().get(
+        "/stats/patients/100",
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+
+    assert res.status_code == 404
@@ -0,0 +1,196 @@
+import asyncio
+import datetime
+import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pytest
+
+pytest.importorskip("asgiref")
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+from sqlalchemy.pool import NullPool  # noqa: E402
+
+from config import TestConfigMedicRole  # noqa: E402
+from medical_app.backend import create_app, db  # noqa: E402
+from medical_app.backend.asgi import AsyncAPI, async_database_url  # noqa: E402
+from medical_app.backend.models import Medic, Patient, Record  # noqa: E402
+
+
+@pytest.fixture()
+def asgi_app(tmp_path) -> Iterator[AsyncAPI]:
+    """Asgi app of a flask app with a database file, shared by the sync and async engine.
+
+    :param tmp_path: temporary directory of the database file
+    """
+
+    class FileConfig(TestConfigMedicRole):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'app.db'}"
+        RESPONSE_CACHE_SIZE = 0
+
+    flask_app = create_app(FileConfig)
+    with flask_app.app_context():
+        db.create_all()
+        # medic 1 treats patient 2, which has records 1 and 2
+        medic = Medic(first_name="John", last_name="Doc", email="john.doc@mail.com")
+        patient = Patient(
+            first_name="Mister", last_name="Patient", email="patient@mail.com"
+        )
+        patient.medics.append(medic)
+        for day in (1, 2):
+            patient.records.append(
+                Record(
+                    title=f"Record {day}",
+                    description="caseload",
+                    date_diagnosis=datetime.datetime(2023, 3, day),
+                    date_symptom_onset=datetime.datetime(2023, 2, day),
+                )
+            )
+        db.session.add_all([medic, patient])
+        db.session.commit()
+        db.session.remove()
+
+    # each request runs in its own event loop, so connections are not pooled across loops
+    yield AsyncAPI(
+        flask_app,
+        create_async_engine(
+            async_database_url(FileConfig.SQLALCHEMY_DATABASE_URI), poolclass=NullPool
+        ),
+    )
+
+    with flask_app.app_context():
+        db.engine.dispose()
+
+
+def call(
+    app: AsyncAPI, path: str, headers: Optional[Dict[str, str]] = None
+) -> Tuple[int, Dict[str, str], Any]:
+    """Send GET request to asgi app.
+
+    :param app: asgi app
+    :param path: path with query string
+    :param headers: request headers
+    :return: status, response headers and decoded json body, None if it is empty
+    """
+    path, _, query_string = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query_string.encode(),
+        "headers": [
+            (key.lower().encode(), value.encode())
+            for key, value in (headers or {}).items()
+        ],
+        "server": ("localhost", 80),
+        "client": ("127.0.0.1", 1234),
+    }
+    messages: List[Dict[str, Any]] = []
+
+    async def receive() -> Dict[str, Any]:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Dict[str, Any]) -> None:
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = messages[0]
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return (
+        start["status"],
+        {key.decode(): value.decode() for key, value in start["headers"]},
+        json.loads(body) if body else None,
+    )
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/medics/1/records?limit=1",
+        "/medics/1/records?sort=id&fields=title",
+        "/patients/2/records?sort=-date_diagnosis",
+        "/patients/2/records/1",
+        "/patients/2/records/1?fields=title",
+    ],
+)
+def test_async_handlers_should_answer_like_flask(
+    asgi_app, access_token_medic_role, path
+) -> None:
+    """Test the async handlers return the same bodies and entity tags as the flask views.
+
+    :param asgi_app: asgi app
+    :param path: requested path
+    """
+    headers = {"Authorization": f"Bearer {access_token_medic_role}"}
+    expected = asgi_app.flask_app.test_client().get(path, headers=headers)
+
+    status, response_headers, body = call(asgi_app, path, headers)
+
+    assert status == expected.status_code == 200
+    assert body == expected.json
+    assert response_headers["etag"] == expected.headers["ETag"]
+
+    status, _, body = call(
+        asgi_app, path, {**headers, "If-None-Match": response_headers["etag"]}
+    )
+    assert status == 304
+    assert body is None
+
+
+@pytest.mark.parametrize(
+    "path,status",
+    [
+        ("/medics/2/records", 404),
+        ("/patients/1/records/1", 404),
+        ("/medics/1/records?limit=0", 422),
+        ("/patients/2/records?limit=-1", 422),
+        ("/patients/2/records?fields=unknown", 422),
+    ],
+)
+def test_async_handlers_should_keep_error_contract(
+    asgi_app, access_token_medic_role, path, status
+) -> None:
+    """Test errors of the async handlers have the body of errors/handlers.py.
+
+    :param asgi_app: asgi app
+    :param path: requested path
+    :param status: expected status code
+    """
+    headers = {"Authorization": f"Bearer {access_token_medic_role}"}
+    expected = asgi_app.flask_app.test_client().get(path, headers=headers)
+
+    assert call(asgi_app, path, headers)[::2] == (status, expected.json)
+    assert expected.status_code == status
+
+
+def test_async_handlers_should_require_auth(asgi_app) -> None:
+    """Test requests without token are rejected like by require_auth.
+
+    :param asgi_app: asgi app
+    """
+    expected = asgi_app.flask_app.test_client().get("/medics/1/records")
+
+    status, _, body = call(asgi_app, "/medics/1/records")
+
+    assert status == expected.status_code == 401
+    assert body == expected.json
+
+
+def test_other_requests_should_be_served_by_flask(asgi_app) -> None:
+    """Test routes without async handler are passed on to the flask app.
+
+    :param asgi_app: asgi app
+    """
+    status, _, body = call(asgi_app, "/medics/1")
+
+    assert status == 200
+    assert body["data"]["firstName"] == "John"
+    assert call(asgi_app, "/unknown")[::2] == (
+        404,
+        {"status": "error", "code": 404, "message": "Resource not found"},
+    )
@@ -0,0 +1,114 @@
+import datetime
+from typing import List
+
+import flask
+import pytest
+
+from medical_app.backend.filters import parse_record_filters, parse_record_sort
+from medical_app.backend.models import Record, db
+
+
+def add_records_to_patient(patient_id: int) -> None:
+    """Add records diagnosed in the first days of march, the flus still ongoing.
+
+    :param patient_id: id of patient
+    """
+    for day in range(1, 7):
+        db.session.add(
+            Record(
+                title=f"Cold {day}" if day % 2 else f"Flu {day}",
+                description="season",
+                date_diagnosis=datetime.datetime(2023, 3, day),
+                date_symptom_onset=datetime.datetime(2023, 2, day),
+                date_symptom_offset=(
+                    datetime.datetime(2023, 3, day + 7) if day % 2 else None
+                ),
+                patient_id=patient_id,
+            )
+        )
+    db.session.commit()
+
+
+def get_titles(app, token: str, query: str) -> List[str]:
+    res: flask.Response = app.test_client().get(
+        f"/patients/5/records?limit=50&{query}",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200, res.json
+    return [record["title"] for record in res.json["data"]]
+
+
+@pytest.mark.parametrize(
+    "query, expected_titles",
+    [
+        (
+            "filter[date_diagnosis][gte]=2023-03-02&filter[date_diagnosis][lt]=2023-03-04",
+            ["Flu 2", "Cold 3"],
+        ),
+        ("filter[date_diagnosis]=2023-03-05", ["Cold 5"]),
+        ("filter[ongoing]=true", ["Flew", "Flu 2", "Flu 4", "Flu 6"]),
+        ("filter[ongoing]=false&filter[title]=cold", ["Cold 1", "Cold 3", "Cold 5"]),
+        ("filter[date_symptom_offset][lte]=2023-03-10", ["Cold 1", "Cold 3"]),
+        ("filter[title]=%25", []),
+    ],
+)
+def test_records_should_be_filtered(
+    app, access_token_medic_role, query: str, expected_titles: List[str]
+) -> None:
+    """Test filter query args select the matching records of the patient.
+
+    :param app: flask app instance
+    """
+    add_records_to_patient(5)
+
+    assert get_titles(app, access_token_medic_role, query) == expected_titles
+
+
+def test_records_should_be_sorted(app, access_token_medic_role) -> None:
+    """Test sort keys order records, with ongoing records as the latest offsets.
+
+    :param app: flask app instance
+    """
+    add_records_to_patient(5)
+
+    titles = get_titles(
+        app, access_token_medic_role, "filter[title]=cold&sort=-date_diagnosis"
+    )
+    assert titles == ["Cold 5", "Cold 3", "Cold 1"]
+
+    titles = get_titles(app, access_token_medic_role, "sort=-date_symptom_offset")
+    assert titles[:4] == ["Flew", "Flu 2", "Flu 4", "Flu 6"]
+    assert titles[4:] == ["Cold 5", "Cold 3", "Cold 1"]
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        {"filter[description]": "season"},
+        {"filter[date_diagnosis][ne]": "2023-03-01"},
+        {"filter[date_diagnosis]": "01.03.2023"},
+        {"filter[ongoing]": "maybe"},
+        {"filter[title][gte]": "a"},
+        {"filter": "title"},
+        {"sort": "description"},
+        {"sort": "title,-title"},
+    ],
+)
+def test_invalid_filters_and_sort_keys_should_raise(args: dict) -> None:
+    """Test only whitelisted filters, operators and sort keys are accepted."""
+    with pytest.raises(ValueError):
+        parse_record_filters(args)
+        parse_record_sort(args)
+
+
+def test_invalid_filter_should_return_422(app, access_token_medic_role) -> None:
+    """Test invalid filters are rejected by the records endpoint.
+
+    :param app: flask app instance
+    """
+    res: flask.Response = app.test_client().get(
+        "/patients/5/records?filter[ongoing]=maybe",
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+
+    assert res.status_code == 422
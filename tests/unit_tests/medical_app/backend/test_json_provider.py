@@ -0,0 +1,81 @@
+import datetime
+import decimal
+import json
+import uuid
+
+import pytest
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+from medical_app.backend.json_provider import (
+    OrjsonJSONProvider,
+    StdlibJSONProvider,
+    format_http_date,
+    orjson,
+)
+
+PAYLOAD = {
+    "status": "success",
+    "data": [
+        {
+            "id": 1,
+            "title": "Grippe",
+            "description": "influenza season, fièvre",
+            "date_diagnosis": datetime.datetime(2022, 12, 1),
+            "date_symptom_onset": datetime.datetime(
+                2022,
+                11,
+                21,
+                23,
+                30,
+                tzinfo=datetime.timezone(datetime.timedelta(hours=2)),
+            ),
+            "date": datetime.date(2023, 2, 14),
+            "amount": decimal.Decimal("1.50"),
+            "uuid": uuid.UUID(int=1),
+        }
+    ],
+    "next": None,
+}
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        datetime.datetime(2022, 12, 1),
+        datetime.datetime(1999, 1, 9, 8, 7, 6, 5),
+        datetime.datetime(2023, 2, 14, 1, tzinfo=datetime.timezone.utc),
+        datetime.datetime(
+            2023, 2, 28, 23, tzinfo=datetime.timezone(datetime.timedelta(hours=-3))
+        ),
+        datetime.date(2024, 2, 29),
+    ],
+)
+def test_format_http_date_matches_werkzeug(value) -> None:
+    """Test dates are formatted exactly like werkzeug does."""
+    assert format_http_date(value) == http_date(value)
+
+
+@pytest.mark.parametrize(
+    "provider_class",
+    [
+        StdlibJSONProvider,
+        pytest.param(
+            OrjsonJSONProvider,
+            marks=pytest.mark.skipif(orjson is None, reason="orjson not installed"),
+        ),
+    ],
+)
+def test_provider_encodes_like_flask_default(provider_class) -> None:
+    """Test responses decode to the same data as with flask's default provider."""
+    app = Flask(__name__)
+    expected = DefaultJSONProvider(app).response(PAYLOAD).get_data()
+    provider = provider_class(app)
+
+    with app.app_context():
+        data = provider.response(PAYLOAD).get_data()
+
+    assert json.loads(data) == json.loads(expected)
+    assert data.endswith(b"\n")
+    assert provider.loads(provider.dumps(PAYLOAD)) == json.loads(expected)
@@ -0,0 +1,139 @@
+import threading
+
+import flask
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from config import Config, TestConfigMedicRole
+from medical_app.backend import create_app, db
+from medical_app.backend.pool_metrics import TimedQueuePool, pool_metrics
+
+
+class PoolConfig(Config):
+    DB_POOL_SIZE = 2
+    DB_MAX_OVERFLOW = 1
+    DB_STATEMENT_TIMEOUT_MS = 5000
+
+
+def test_engine_options_should_configure_pool() -> None:
+    """Test pool settings are passed to the engine, the statement timeout only to postgres."""
+    options = PoolConfig.engine_options("postgresql://user@localhost/medical_app")
+
+    assert options["pool_size"] == 2
+    assert options["max_overflow"] == 1
+    assert options["connect_args"] == {"options": "-c statement_timeout=5000"}
+    assert "connect_args" not in PoolConfig.engine_options("sqlite:////tmp/app.db")
+    assert PoolConfig.engine_options("sqlite://") == {}
+
+
+def test_timed_pool_should_count_checkouts_and_timeouts(tmp_path) -> None:
+    """Test checkouts beyond pool size and overflow wait and time out, and are counted.
+
+    :param tmp_path: temporary directory of the database file
+    """
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/pool.db",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        assert pool_metrics(engine.pool)["checkedOut"] == 1
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    metrics = pool_metrics(engine.pool)
+    assert metrics["checkedOut"] == 0
+    assert metrics["checkouts"] == 2
+    assert metrics["timeouts"] == 1
+    assert metrics["connects"] == 1
+    assert metrics["waitMsMax"] >= 50
+
+
+def test_timed_pool_should_hand_over_released_connections(tmp_path) -> None:
+    """Test a checkout waiting for a full pool gets the next released connection.
+
+    :param tmp_path: temporary directory of the database file
+    """
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/pool.db",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=5,
+    )
+    connection = engine.connect()
+    release = threading.Timer(0.05, connection.close)
+    release.start()
+    with engine.connect():
+        pass
+    release.join()
+
+    metrics = pool_metrics(engine.pool)
+    assert metrics["timeouts"] == 0
+    assert metrics["waitMsMax"] >= 40
+
+
+def test_timed_pool_should_count_connects_once_after_dispose(tmp_path) -> None:
+    """Test connects of the pool created by engine.dispose are only counted on that pool.
+
+    :param tmp_path: temporary directory of the database file
+    """
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/pool.db", poolclass=TimedQueuePool, pool_size=1
+    )
+    with engine.connect():
+        pass
+    old_pool = engine.pool
+
+    engine.dispose()
+    with engine.connect():
+        pass
+    engine.dispose()
+    with engine.connect():
+        pass
+
+    assert engine.pool is not old_pool
+    assert pool_metrics(old_pool)["connects"] == 1
+    assert pool_metrics(engine.pool)["connects"] == 1
+    assert pool_metrics(engine.pool)["checkouts"] == 1
+
+
+def test_app_should_use_timed_pool(tmp_path) -> None:
+    """Test apps with pool settings measure their pool.
+
+    :param tmp_path: temporary directory of the database file
+    """
+    database_uri = f"sqlite:///{tmp_path}/app.db"
+
+    class FileConfig(TestConfigMedicRole):
+        SQLALCHEMY_DATABASE_URI = database_uri
+        SQLALCHEMY_ENGINE_OPTIONS = PoolConfig.engine_options(database_uri)
+
+    app = create_app(FileConfig)
+    with app.app_context():
+        assert isinstance(db.engine.pool, TimedQueuePool)
+        assert db.engine.pool.size() == 2
+        # checkouts of the session go through Pool.connect, where they are timed
+        db.session.execute(text("SELECT 1"))
+        assert pool_metrics(db.engine.pool)["checkouts"] == 1
+        db.session.remove()
+        db.engine.dispose()
+    # the options of the config class are left untouched
+    assert "poolclass" not in FileConfig.SQLALCHEMY_ENGINE_OPTIONS
+
+
+def test_get_pool_metrics(app, access_token_medic_role) -> None:
+    """Test pool metrics are reported, None where the pool does not provide them.
+
+    :param app: flask app instance
+    """
+    res: flask.Response = app.test_client().get(
+        "/metrics/pool",
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+
+    assert res.status_code == 200
+    assert set(res.json["data"]) >= {"checkedOut", "overflow", "waitMsTotal"}
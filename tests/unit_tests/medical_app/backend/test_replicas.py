@@ -0,0 +1,117 @@
+import shutil
+from typing import Iterator, Tuple
+
+import flask
+import pytest
+from sqlalchemy import text
+
+from config import Config, TestConfigMedicRole
+from medical_app.backend import create_app, db, response_cache
+from medical_app.backend.models import Medic
+from medical_app.backend.replicas import STICKY_COOKIE
+
+
+@pytest.fixture()
+def replicated_app(tmp_path) -> Iterator[Tuple[flask.Flask, str]]:
+    """App with a primary and a replica database file, the replica is a stale copy.
+
+    :param tmp_path: temporary directory of the database files
+    """
+    primary_path, replica_path = tmp_path / "primary.db", tmp_path / "replica.db"
+
+    class ReplicaConfig(TestConfigMedicRole):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{primary_path}"
+        SQLALCHEMY_REPLICAS = Config.replica_binds(f"sqlite:///{replica_path}")
+        RESPONSE_CACHE_SIZE = 0
+
+    app = create_app(ReplicaConfig)
+    with app.app_context():
+        db.create_all()
+        Medic(first_name="John", last_name="Doc", email="john.doc@mail.com").insert()
+        db.engine.dispose()
+        # replicate once, later writes to the primary are not replicated
+        shutil.copy(primary_path, replica_path)
+
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    for engine in app.extensions["read_replicas"].values():
+        engine.dispose()
+
+
+def execute_on_replica(app: flask.Flask, statement: str) -> None:
+    with app.app_context():
+        with app.extensions["read_replicas"]["replica_0"].begin() as connection:
+            connection.execute(text(statement))
+
+
+def test_get_should_read_from_replica(replicated_app) -> None:
+    """Test reads of GET requests go to the replica.
+
+    :param replicated_app: flask app with replica
+    """
+    execute_on_replica(
+        replicated_app, "UPDATE user SET first_name = 'Replica' WHERE id = 1"
+    )
+
+    res: flask.Response = replicated_app.test_client().get("/medics/1")
+
+    assert res.json["data"]["firstName"] == "Replica"
+    assert STICKY_COOKIE not in res.headers.get("Set-Cookie", "")
+
+
+def test_writes_should_go_to_primary_and_stick(
+    replicated_app, access_token_medic_role
+) -> None:
+    """Test a client reads its own writes, while others read from the lagging replica.
+
+    :param replicated_app: flask app with replica
+    """
+    client = replicated_app.test_client()
+    res: flask.Response = client.patch(
+        "/medics/1",
+        json={"firstName": "Jane"},
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+    assert res.status_code == 200
+    assert STICKY_COOKIE in res.headers["Set-Cookie"]
+
+    assert client.get("/medics/1").json["data"]["firstName"] == "Jane"
+    other_client = replicated_app.test_client()
+    assert other_client.get("/medics/1").json["data"]["firstName"] == "John"
+
+
+def test_failed_writes_should_not_stick(
+    replicated_app, access_token_medic_role
+) -> None:
+    """Test only successful mutations make the reads of a client go to the primary.
+
+    :param replicated_app: flask app with replica
+    """
+    res: flask.Response = replicated_app.test_client().patch(
+        "/medics/100",
+        json={"firstName": "Jane"},
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+
+    assert res.status_code == 404
+    assert "Set-Cookie" not in res.headers
+
+
+def test_cached_views_should_read_from_primary(replicated_app) -> None:
+    """Test cache misses are computed on the primary, so no stale replica reads are cached.
+
+    :param replicated_app: flask app with replica
+    """
+    replicated_app.config["RESPONSE_CACHE_SIZE"] = 16
+    response_cache.init_app(replicated_app)
+    execute_on_replica(
+        replicated_app, "UPDATE user SET first_name = 'Replica' WHERE id = 1"
+    )
+
+    res: flask.Response = replicated_app.test_client().get("/medics/1")
+
+    assert res.headers["X-Cache"] == "MISS"
+    assert res.json["data"]["firstName"] == "John"
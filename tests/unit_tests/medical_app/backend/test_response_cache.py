@@ -0,0 +1,165 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import flask
+import pytest
+
+from medical_app.backend import response_cache
+from medical_app.backend.response_cache import (
+    CachedResponse,
+    LRUCacheBackend,
+    SQLiteCacheBackend,
+    cache_backend_from_uri,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return LRUCacheBackend(maxsize=2)
+    return SQLiteCacheBackend(str(tmp_path / "cache.db"), maxsize=2)
+
+
+def test_backend_counts_hits_and_misses(backend) -> None:
+    """Test cached bodies are returned and lookups are counted."""
+    assert backend.get("key") is None
+    backend.set("key", CachedResponse(b"body"), ["tag"], backend.generation())
+
+    assert backend.get("key").body == b"body"
+    assert backend.hit_ratio == 0.5
+
+
+def test_backend_counts_concurrent_lookups(backend) -> None:
+    """Test no lookups are lost when threads count them at the same time."""
+    backend.set("key", CachedResponse(b"body"), [], backend.generation())
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(backend.get, ["key", "other"] * 200))
+
+    assert (backend.hits, backend.misses) == (200, 200)
+
+
+def test_backend_invalidates_entries_by_tag(backend) -> None:
+    """Test invalidating a tag drops exactly the entries carrying it."""
+    backend.set(
+        "page", CachedResponse(b"[1, 2]"), ["medic:1", "medic:2"], backend.generation()
+    )
+    backend.set("medic", CachedResponse(b"2"), ["medic:2"], backend.generation())
+
+    backend.invalidate("medic:1")
+
+    assert backend.get("page") is None
+    assert backend.get("medic").body == b"2"
+
+
+def test_backend_evicts_oldest_entries(backend) -> None:
+    """Test the backend never holds more than maxsize entries."""
+    for key in ("key-1", "key-2", "key-3"):
+        backend.set(key, CachedResponse(b"body"), [], backend.generation())
+
+    assert backend.get("key-1") is None
+    assert backend.get("key-2") and backend.get("key-3")
+
+
+def test_backend_skips_entries_computed_before_invalidation(backend) -> None:
+    """Test a response computed before a concurrent write is not cached."""
+    generation = backend.generation()
+    backend.invalidate("medic:1")
+    backend.set("medic", CachedResponse(b"stale"), ["medic:1"], generation)
+
+    assert backend.get("medic") is None
+
+
+def test_backend_expires_entries_after_ttl(backend, monkeypatch) -> None:
+    """Test entries are dropped ttl seconds after they were cached."""
+    now = 1000.0
+    monkeypatch.setattr(time, "time", lambda: now)
+    backend.ttl = 10
+    backend.set("medic", CachedResponse(b"1"), ["medic:1"], backend.generation())
+
+    now += 9
+    assert backend.get("medic").body == b"1"
+    now += 1
+    assert backend.get("medic") is None
+
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path) -> None:
+    """Test invalidations of one worker are seen by all workers using the same file."""
+    path = str(tmp_path / "cache.db")
+    worker_1 = cache_backend_from_uri(f"sqlite:///{path}")
+    worker_2 = cache_backend_from_uri(f"sqlite:///{path}")
+    worker_1.set("medic", CachedResponse(b"1"), ["medic:1"], worker_1.generation())
+
+    assert worker_2.get("medic").body == b"1"
+    worker_2.invalidate("medic:1")
+    assert worker_1.get("medic") is None
+
+
+def test_get_medic_is_served_from_cache_until_patched(
+    app, access_token_medic_role
+) -> None:
+    """Test a cached medic is invalidated by a patch of that medic only.
+
+    :param app: flask app instance
+    """
+    client = app.test_client()
+    assert client.get("/medics/1").headers["X-Cache"] == "MISS"
+    assert client.get("/medics").headers["X-Cache"] == "MISS"
+    assert client.get("/medics/2").headers["X-Cache"] == "MISS"
+    assert client.get("/medics/1").headers["X-Cache"] == "HIT"
+
+    client.patch(
+        "/medics/1",
+        json={"firstName": "Jane"},
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+
+    res: flask.Response = client.get("/medics/1")
+    assert res.headers["X-Cache"] == "MISS"
+    assert res.json["data"]["firstName"] == "Jane"
+    assert client.get("/medics").headers["X-Cache"] == "MISS"
+    assert client.get("/medics/2").headers["X-Cache"] == "HIT"
+    with app.app_context():
+        assert response_cache.backend.hit_ratio == 2 / 7
+
+
+def test_get_medics_is_invalidated_by_new_medic(app, access_token_medic_role) -> None:
+    """Test creating a medic invalidates all cached pages of medics.
+
+    :param app: flask app instance
+    """
+    client = app.test_client()
+    n_medics = len(client.get("/medics").json["data"])
+
+    client.post(
+        "/medics",
+        json={"firstName": "New", "lastName": "Medic", "email": "new.medic@mail.com"},
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+
+    res: flask.Response = client.get("/medics")
+    assert res.headers["X-Cache"] == "MISS"
+    assert len(res.json["data"]) == n_medics + 1
+
+
+def test_get_response_cache_metrics(app, access_token_medic_role) -> None:
+    """Test hits, misses and hit ratio of the response cache are served.
+
+    :param app: flask app instance
+    """
+    client = app.test_client()
+    client.get("/medics/1")
+    client.get("/medics/1")
+
+    res: flask.Response = client.get(
+        "/metrics/response-cache",
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+
+    assert res.status_code == 200
+    assert res.json["data"] == {
+        "enabled": True,
+        "hits": 1,
+        "misses": 1,
+        "hitRatio": 0.5,
+    }
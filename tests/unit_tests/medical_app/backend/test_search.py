@@ -0,0 +1,110 @@
+import datetime
+from typing import List
+
+import flask
+import pytest
+
+from medical_app.backend.models import Record, db
+from medical_app.backend.search import parse_search_terms
+
+
+def add_record(patient_id: int, title: str, description: str) -> Record:
+    record = Record(
+        title=title,
+        description=description,
+        date_diagnosis=datetime.datetime(2023, 3, 1),
+        date_symptom_onset=datetime.datetime(2023, 2, 1),
+        patient_id=patient_id,
+    )
+    db.session.add(record)
+    db.session.commit()
+    return record
+
+
+def search(app, token: str, query: str) -> List[str]:
+    res: flask.Response = app.test_client().get(
+        f"/records:search?{query}", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert res.status_code == 200, res.json
+    return [record["title"] for record in res.json["data"]]
+
+
+def test_search_should_rank_matching_records(app, access_token_medic_role) -> None:
+    """Test records matching all stemmed terms are found, the best matches first.
+
+    :param app: flask app instance
+    """
+    add_record(5, "Asthma", "asthma attack, asthmatic since childhood")
+    add_record(5, "Checkup", "no signs of asthma")
+    add_record(6, "Fracture", "broken arm")
+
+    assert search(app, access_token_medic_role, "q=asthma") == ["Asthma", "Checkup"]
+    assert search(app, access_token_medic_role, "q=asthma+childhood") == ["Asthma"]
+    assert search(app, access_token_medic_role, "q=break") == []
+    assert search(app, access_token_medic_role, "q=asthma&limit=1&offset=1") == [
+        "Checkup"
+    ]
+
+
+def test_search_should_be_narrowed_to_patient_or_medic(
+    app, access_token_medic_role
+) -> None:
+    """Test the search can be restricted to a patient or the patients of a medic.
+
+    :param app: flask app instance
+    """
+    add_record(5, "Asthma", "mild")
+    add_record(6, "Asthma", "severe")
+
+    assert search(app, access_token_medic_role, "q=asthma&patient_id=6") == ["Asthma"]
+    # patient 6 has no medics, patient 5 is a patient of medic 2
+    assert search(app, access_token_medic_role, "q=asthma&medic_id=2") == ["Asthma"]
+    assert search(app, access_token_medic_role, "q=asthma&medic_id=1") == []
+
+
+def test_search_index_should_follow_updates_and_deletes(
+    app, access_token_medic_role
+) -> None:
+    """Test changed and deleted records are reindexed incrementally.
+
+    :param app: flask app instance
+    """
+    record = add_record(5, "Asthma", "mild")
+    record.title = "Bronchitis"
+    db.session.commit()
+    assert search(app, access_token_medic_role, "q=bronchitis") == ["Bronchitis"]
+
+    db.session.delete(record)
+    db.session.commit()
+    assert search(app, access_token_medic_role, "q=bronchitis") == []
+
+
+def test_search_terms_should_be_matched_literally(app, access_token_medic_role) -> None:
+    """Test search syntax in user input neither fails nor changes the query.
+
+    :param app: flask app instance
+    """
+    add_record(5, "Asthma", "mild")
+
+    assert search(app, access_token_medic_role, 'q="asthma+OR+flu') == []
+    assert search(app, access_token_medic_role, "q=asthma*") == ["Asthma"]
+
+
+@pytest.mark.parametrize("query", ["", "   ", "a" * 257])
+def test_invalid_search_queries_should_raise(query: str) -> None:
+    """Test empty and overly long search queries are rejected."""
+    with pytest.raises(ValueError):
+        parse_search_terms(query)
+
+
+def test_search_without_query_should_return_422(app, access_token_medic_role) -> None:
+    """Test the search endpoint requires a query.
+
+    :param app: flask app instance
+    """
+    res: flask.Response = app.test_client().get(
+        "/records:search",
+        headers={"Authorization": f"Bearer {access_token_medic_role}"},
+    )
+
+    assert res.status_code == 422
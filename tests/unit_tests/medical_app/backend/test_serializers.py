@@ -0,0 +1,59 @@
+from sqlalchemy import select
+
+from medical_app.backend import db
+from medical_app.backend.models import Medic, Patient, Record
+from medical_app.backend.serializers import (
+    MEDIC_COLUMNS,
+    PATIENT_COLUMNS,
+    RECORD_COLUMNS,
+    serialize_medic_rows,
+    serialize_patient_rows,
+    serialize_record_rows,
+)
+
+
+def sort_ids(user_dict: dict, key: str) -> dict:
+    return {**user_dict, key: sorted(user_dict[key])}
+
+
+def test_serialized_rows_equal_format_for_json(app) -> None:
+    """Test serializing rows of column selects gives the dicts of format_for_json.
+
+    :param app: flask app instance
+    """
+    with app.app_context():
+        medic_rows = db.session.execute(select(*MEDIC_COLUMNS)).all()
+        patient_rows = db.session.execute(select(*PATIENT_COLUMNS)).all()
+        record_rows = db.session.execute(select(*RECORD_COLUMNS)).all()
+
+        medics, _ = serialize_medic_rows(medic_rows)
+        patients, _ = serialize_patient_rows(patient_rows)
+        records, _ = serialize_record_rows(record_rows)
+
+        assert medics == [
+            sort_ids(db.session.get(Medic, row.id).format_for_json(), "patients")
+            for row in medic_rows
+        ]
+        assert patients == [
+            sort_ids(db.session.get(Patient, row.id).format_for_json(), "medics")
+            for row in patient_rows
+        ]
+        assert records == [
+            db.session.get(Record, row.id).format_for_json() for row in record_rows
+        ]
+
+
+def test_etag_of_serialized_rows_changes_with_relationships(app) -> None:
+    """Test the entity tag of a page changes if a relationship of its rows changes.
+
+    :param app: flask app instance
+    """
+    with app.app_context():
+        rows = db.session.execute(select(*MEDIC_COLUMNS)).all()
+        _, etag = serialize_medic_rows(rows)
+
+        medic = db.session.get(Medic, rows[0].id)
+        medic.patients = []
+        db.session.commit()
+
+        assert serialize_medic_rows(rows)[1] != etag